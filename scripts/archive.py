@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Content-addressed archive of every raw upstream payload, for offline reprocessing.
+
+Each body a fetcher downloads (FINRA's XLSX, FRED and CBOE CSVs, NY Fed, BLS,
+CNN and EDGAR JSON) is stored once, gzipped, under its sha256:
+
+  data/archive/objects/<sha[:2]>/<sha>.gz
+
+and listed in the index of the run that fetched it, an NDJSON file appended
+one line per payload (so a per-day backfill costs O(1) index I/O per payload,
+and a run that is killed keeps the index of what it fetched):
+
+  data/archive/runs/<source>/<run-id>.ndjson   run-id = UTC start time, e.g. 20261019T140211Z
+  {"source": "sofr", "run": "...", "started": "..."}
+  {"key": "2026-10-16_2026-10-19", "url": "...", "sha256": "...", "bytes": 1843, "fetched_at": "..."}
+  ...
+
+A payload that didn't change since an earlier run costs one index line, not a
+second copy. Fetchers route downloads through `payload(source, key, download)`.
+build_graph.store_raw archives each new raw input under source "raw" (key =
+node), so a missing data/raw/ file is restored from its newest copy.
+
+The archive is not committed: CI keeps data/archive/ in the Actions cache and
+runs --prune before saving it. Runs older than ARCHIVE_KEEP_DAYS are dropped,
+except each source's latest run and, for sources in KEEP_NEWEST_PER_KEY, the
+run holding each key's newest payload; objects no run refers to are deleted.
+
+Every fetcher accepts --reprocess [run-id] (default: the source's latest run).
+Downloads are then answered from that run's payloads and nothing goes over the
+network, so a fix to a parser (find_debit_column, normalize_date,
+compute_indicator, the Fear & Greed merge, ...) can be applied to history as a
+local CPU job. While reprocessing, the release calendar always fetches,
+endpoint breakers are neither consulted nor updated, no vintages are recorded
+and nothing new is archived; outputs, raw inputs and series logs are rebuilt
+as in a live run.
+
+  python scripts/archive.py                  # runs per source, archive size
+  python scripts/archive.py sofr             # payloads of sofr's latest run
+  python scripts/archive.py sofr 20261019T140211Z
+  python scripts/archive.py --prune          # apply the retention policy
+  python scripts/fetch_finra_data.py --reprocess
+  python scripts/fetch_sofr_data.py --reprocess 20261019T140211Z
+"""
+
+import gzip
+import hashlib
+import json
+import sys
+import threading
+from datetime import datetime, timedelta, timezone
+
+from common import ROOT_DIR, atomic_write
+
+ARCHIVE_DIR = ROOT_DIR / "data" / "archive"
+OBJECTS_DIR = ARCHIVE_DIR / "objects"
+RUNS_DIR = ARCHIVE_DIR / "runs"
+
+ARCHIVE_KEEP_DAYS = 60
+KEEP_NEWEST_PER_KEY = ("raw",)   # sources with stable keys whose newest copy must survive pruning
+
+RUN_ID = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def _reprocess_arg():
+    """None, or the run id after --reprocess ("latest" when none is given)."""
+    if "--reprocess" not in sys.argv:
+        return None
+    i = sys.argv.index("--reprocess") + 1
+    return sys.argv[i] if i < len(sys.argv) and not sys.argv[i].startswith("-") else "latest"
+
+
+REPROCESS = _reprocess_arg()
+
+_lock = threading.Lock()   # fetchers download from thread pools
+_runs = set()              # sources whose index this process has started
+_replays = {}              # source -> Run being reprocessed
+
+
+class ArchiveMiss(KeyError):
+    """A payload the run being reprocessed doesn't have."""
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _object_path(sha: str):
+    return OBJECTS_DIR / sha[:2] / f"{sha}.gz"
+
+
+def put(body: bytes) -> str:
+    """Store `body` unless already present; returns its sha256."""
+    sha = hashlib.sha256(body).hexdigest()
+    path = _object_path(sha)
+    if not path.exists():
+        with atomic_write(path, "wb") as f:
+            f.write(gzip.compress(body, mtime=0))
+    return sha
+
+
+def get(sha: str) -> bytes:
+    with open(_object_path(sha), "rb") as f:
+        return gzip.decompress(f.read())
+
+
+def _index_path(source: str, run_id: str):
+    return RUNS_DIR / source / f"{run_id}.ndjson"
+
+
+def _line(obj: dict) -> bytes:
+    return (json.dumps(obj, separators=(",", ":")) + "\n").encode()
+
+
+def store(source: str, key: str, body: bytes, url: str = None) -> str:
+    """Archive one payload of this run and append it to the run's index."""
+    sha = put(body)
+    entry = {"key": key, "url": url, "sha256": sha, "bytes": len(body), "fetched_at": _now()}
+    with _lock:
+        path = _index_path(source, RUN_ID)
+        lines = _line(entry)
+        if source not in _runs:
+            _runs.add(source)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            lines = _line({"source": source, "run": RUN_ID, "started": _now()}) + lines
+        with open(path, "ab") as f:
+            f.write(lines)
+    return sha
+
+
+def run_ids(source: str) -> list:
+    """Archived run ids of `source`, oldest first."""
+    return sorted(p.stem for p in (RUNS_DIR / source).glob("*.ndjson"))
+
+
+class Run:
+    """The payloads of one archived run; the last one wins where a key was fetched twice (retries)."""
+
+    def __init__(self, source: str, run_id: str = "latest"):
+        if run_id == "latest":
+            ids = run_ids(source)
+            if not ids:
+                raise ArchiveMiss(f"no archived {source} runs in {RUNS_DIR / source}")
+            run_id = ids[-1]
+        path = _index_path(source, run_id)
+        if not path.exists():
+            raise ArchiveMiss(f"no archived {source} run {run_id}; available: {', '.join(run_ids(source)) or 'none'}")
+        self.source, self.id = source, run_id
+        self.started, self.entries = None, {}
+        with open(path, "rb") as f:
+            for line in f:
+                entry = json.loads(line)
+                if "key" not in entry:
+                    self.started = self.started or entry.get("started")
+                    continue
+                self.entries.pop(entry["key"], None)
+                self.entries[entry["key"]] = entry
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.entries
+
+    def get(self, key: str) -> bytes:
+        if key not in self.entries:
+            raise ArchiveMiss(f"{self.source} run {self.id} has no payload {key!r}")
+        return get(self.entries[key]["sha256"])
+
+    def items(self, prefix: str = "") -> list:
+        """[(key, body)] of the payloads whose key starts with `prefix`, in fetch order."""
+        return [(k, get(e["sha256"])) for k, e in self.entries.items() if k.startswith(prefix)]
+
+
+def latest(source: str, key: str) -> bytes:
+    """The newest archived payload for `key` across all of `source`'s runs."""
+    for run_id in reversed(run_ids(source)):
+        run = Run(source, run_id)
+        if key in run:
+            return run.get(key)
+    raise ArchiveMiss(f"no archived {source} payload {key!r}")
+
+
+def prune(keep_days: int = ARCHIVE_KEEP_DAYS) -> tuple:
+    """Apply the retention policy; returns (runs removed, objects removed)."""
+    if not RUNS_DIR.exists():
+        return 0, 0
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=keep_days)).strftime("%Y%m%dT%H%M%SZ")
+    runs_removed, live = 0, set()
+    for source_dir in sorted(p for p in RUNS_DIR.iterdir() if p.is_dir()):
+        source, seen = source_dir.name, set()
+        for i, run_id in enumerate(reversed(run_ids(source))):
+            run = Run(source, run_id)
+            newest = source in KEEP_NEWEST_PER_KEY and not seen.issuperset(run.entries)
+            seen.update(run.entries)
+            if i == 0 or run_id >= cutoff or newest:
+                live.update(e["sha256"] for e in run.entries.values())
+            else:
+                _index_path(source, run_id).unlink()
+                runs_removed += 1
+    objects_removed = 0
+    for path in OBJECTS_DIR.glob("*/*.gz"):
+        if path.name[:-len(".gz")] not in live:
+            path.unlink()
+            objects_removed += 1
+    return runs_removed, objects_removed
+
+
+def replay(source: str) -> Run:
+    """The run being reprocessed for `source` (--reprocess)."""
+    with _lock:
+        if source not in _replays:
+            _replays[source] = Run(source, REPROCESS)
+            print(f"Reprocessing archived {source} run {_replays[source].id} "
+                  f"({len(_replays[source].entries)} payloads) — no network")
+        return _replays[source]
+
+
+def payload(source: str, key: str, download, url: str = None) -> bytes:
+    """
+    The body for `key`: `download()` and archive it, or under --reprocess the
+    body archived by that run. A download returning None (nothing published)
+    is not archived.
+    """
+    if REPROCESS:
+        return replay(source).get(key)
+    body = download()
+    if body is not None:
+        store(source, key, body, url)
+    return body
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("-")]
+    if "--prune" in sys.argv:
+        runs, objects = prune(int(args[0]) if args else ARCHIVE_KEEP_DAYS)
+        print(f"Pruned {runs} run(s) and {objects} object(s)")
+        return
+    if args:
+        run = Run(args[0], args[1] if len(args) > 1 else "latest")
+        print(f"{run.source} run {run.id} (started {run.started}):")
+        for key, e in run.entries.items():
+            print(f"  {e['fetched_at']}  {e['sha256'][:12]}  {e['bytes']:>10,}  {key}")
+        return
+    if not RUNS_DIR.exists():
+        print("Nothing archived yet.")
+        return
+    for source_dir in sorted(p for p in RUNS_DIR.iterdir() if p.is_dir()):
+        ids = run_ids(source_dir.name)
+        if ids:
+            print(f"  {source_dir.name:<11} {len(ids):>4} runs  {ids[0]} → {ids[-1]}")
+    objects = list(OBJECTS_DIR.glob("*/*.gz"))
+    print(f"  {len(objects)} objects, {sum(p.stat().st_size for p in objects) / 1e6:.1f} MB compressed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Backtest the Sector Z-Score signals shown on the dashboard.
+
+For every sector in SECTOR_ETFS × benchmark in BENCHMARKS × window in Z_WINDOWS
+(all read from src/components/SectorZScore/constants.js), rebuild the z-score
+series exactly as useZScoreCalculation.js does and measure what happened after
+each threshold crossing in SIGNAL_THRESHOLDS:
+
+  1. trailing return over the dashboard's default return period (weekly closes)
+  2. relative return = sector − benchmark
+  3. z = (rel − mean of the previous W rows) / sample std of those rows, clamped to ±6
+     (the UI subtracts a structural baseline first; a constant shift cancels
+     out of the z-score, so it is skipped here)
+  4. keep the last weekly value of each month (aggregateToMonthly)
+
+A signal fires in the month z crosses its threshold (into ≤ for negative
+thresholds, ≥ for positive ones). For each firing we take the sector's forward
+3/6/12-month return minus the benchmark's. Hit rate = share of firings where
+that relative return had the expected sign (positive after CHEAP/CYCLICAL_LOW,
+negative after EXTENDED). Every month's forward return is reported alongside as
+the unconditional baseline.
+
+All rolling statistics are cumulative-sum array ops (no per-date Python loops);
+sectors run in parallel in a process pool.
+
+  python scripts/backtest_zscores.py                      # prices from yfinance
+  python scripts/backtest_zscores.py --prices weekly.csv  # wide CSV: date + one column per symbol
+Output: public/sector_backtest.json
+"""
+
+import argparse
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from common import PUBLIC_DIR, ROOT_DIR, write_json
+
+CONSTANTS_JS = ROOT_DIR / "src" / "components" / "SectorZScore" / "constants.js"
+OUTPUT_PATH = PUBLIC_DIR / "sector_backtest.json"
+
+HORIZONS_MONTHS = (3, 6, 12)
+DEFAULT_RETURN_PERIOD_INDEX = 2  # RETURN_PERIODS[2] — the dashboard's default (index.jsx)
+Z_CLAMP = 6
+PERCENTILES = (10, 25, 50, 75, 90)
+
+
+# ── constants.js ───────────────────────────────────────────────────────────
+
+def _js_block(source: str, name: str) -> str:
+    m = re.search(rf"export const {name}\s*=\s*([\[{{].*?[\]}}]);", source, re.S)
+    if not m:
+        raise ValueError(f"{name} not found in {CONSTANTS_JS}")
+    return m.group(1)
+
+
+def load_constants(path=CONSTANTS_JS) -> dict:
+    """The parts of the dashboard's SectorZScore constants the backtest needs."""
+    source = path.read_text()
+    return {
+        "sectors":        re.findall(r"symbol:\s*'([^']+)'", _js_block(source, "SECTOR_ETFS")),
+        "benchmarks":     re.findall(r"symbol:\s*'([^']+)'", _js_block(source, "BENCHMARKS")),
+        "z_windows":      [int(v) for v in re.findall(r"value:\s*(\d+)", _js_block(source, "Z_WINDOWS"))],
+        "return_periods": [int(v) for v in re.findall(r"value:\s*(\d+)", _js_block(source, "RETURN_PERIODS"))],
+        "thresholds":     {k: float(v) for k, v in
+                           re.findall(r"(\w+):\s*(-?\d+(?:\.\d+)?)", _js_block(source, "SIGNAL_THRESHOLDS"))},
+    }
+
+
+# ── Prices ─────────────────────────────────────────────────────────────────
+
+def fetch_weekly_prices(symbols: list) -> pd.DataFrame:
+    """Weekly adjusted closes, one column per symbol, from Yahoo Finance."""
+    try:
+        import yfinance as yf
+    except ImportError:
+        raise RuntimeError("yfinance not installed (or pass --prices)")
+    print(f"  Fetching weekly closes for {len(symbols)} symbols via yfinance...")
+    hist = yf.download(symbols, period="max", interval="1wk", auto_adjust=True, progress=False)
+    closes = hist["Close"]
+    closes.index = pd.to_datetime(closes.index).tz_localize(None)
+    return closes.sort_index()
+
+
+# ── Vectorized kernels ─────────────────────────────────────────────────────
+
+def trailing_return(prices: np.ndarray, periods: int) -> np.ndarray:
+    """(p[t] / p[t-periods] − 1) × 100, NaN where undefined."""
+    out = np.full(prices.shape, np.nan)
+    past = prices[:-periods]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out[periods:] = np.where(past > 0, (prices[periods:] / past - 1) * 100, np.nan)
+    return out
+
+
+def rolling_zscores(x: np.ndarray, window: int) -> np.ndarray:
+    """
+    z[i] = (x[i] − mean(x[i-window:i])) / std(x[i-window:i], ddof=1), clamped;
+    NaN for i < window. Window sums come from cumulative sums, so this is O(n).
+    """
+    n = len(x)
+    z = np.full(n, np.nan)
+    if n <= window:
+        return z
+    cs = np.concatenate(([0.0], np.cumsum(x)))
+    cs2 = np.concatenate(([0.0], np.cumsum(x * x)))
+    s = cs[window:n] - cs[:n - window]
+    s2 = cs2[window:n] - cs2[:n - window]
+    mean = s / window
+    std = np.sqrt(np.maximum(s2 - s * s / window, 0) / (window - 1))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        zz = np.where(std > 0, (x[window:] - mean) / std, 0.0)
+    z[window:] = np.clip(zz, -Z_CLAMP, Z_CLAMP)
+    return z
+
+
+def crossings(z: np.ndarray, threshold: float) -> np.ndarray:
+    """Indices where z crosses into the signal zone (NaNs never count)."""
+    prev, cur = z[:-1], z[1:]
+    if threshold < 0:
+        hit = (cur <= threshold) & (prev > threshold)
+    else:
+        hit = (cur >= threshold) & (prev < threshold)
+    return np.flatnonzero(hit) + 1
+
+
+def summarize(values: np.ndarray, bullish: bool) -> dict:
+    values = values[~np.isnan(values)]
+    if not len(values):
+        return {"n": 0}
+    pct = np.percentile(values, PERCENTILES)
+    return {
+        "n":        int(len(values)),
+        "hit_rate": round(float(np.mean(values > 0 if bullish else values < 0)), 3),
+        "mean":     round(float(values.mean()), 2),
+        **{f"p{p}": round(float(v), 2) for p, v in zip(PERCENTILES, pct)},
+    }
+
+
+def backtest_sector(symbol: str, dates: np.ndarray, sector: np.ndarray, benchmarks: dict,
+                    return_period: int, z_windows: list, thresholds: dict) -> dict:
+    """All benchmarks × windows for one sector. Runs in a worker process."""
+    months = dates.astype("datetime64[M]")
+    sector_ret = trailing_return(sector, return_period)
+    results = {}
+    for bench, bench_prices in benchmarks.items():
+        rel = sector_ret - trailing_return(bench_prices, return_period)
+        valid = np.flatnonzero(~np.isnan(rel))
+        if len(valid) < 2:
+            continue
+        # Rows the UI works with (aligned returns), then its month-end samples
+        x, m = rel[valid], months[valid]
+        month_end = np.flatnonzero(np.append(m[1:] != m[:-1], True))
+        ps, pb = sector[valid][month_end], bench_prices[valid][month_end]
+        forward = {}
+        for h in HORIZONS_MONTHS:
+            f = np.full(len(month_end), np.nan)
+            if len(month_end) > h:
+                f[:-h] = ((ps[h:] / ps[:-h]) - (pb[h:] / pb[:-h])) * 100
+            forward[h] = f
+        month_labels = np.datetime_as_string(m[month_end], unit="M")
+
+        by_window = {}
+        for w in z_windows:
+            z = rolling_zscores(x, w)[month_end]
+            scored = ~np.isnan(z)
+            if not scored.any():
+                continue
+            signals = {}
+            for name, th in thresholds.items():
+                idx = crossings(z, th)
+                signals[name] = {
+                    "threshold":  th,
+                    "events":     int(len(idx)),
+                    "last_event": str(month_labels[idx[-1]]) if len(idx) else None,
+                    "forward":    {str(h): summarize(forward[h][idx], th < 0) for h in HORIZONS_MONTHS},
+                }
+            by_window[str(w)] = {
+                "months":      int(scored.sum()),
+                "first_month": str(month_labels[scored][0]),
+                "current_z":   round(float(z[-1]), 2),
+                "signals":     signals,
+                "all_months":  {str(h): summarize(forward[h][scored], True) for h in HORIZONS_MONTHS},
+            }
+        if by_window:
+            results[bench] = by_window
+    return results
+
+
+# ── Driver ─────────────────────────────────────────────────────────────────
+
+def run_backtest(prices: pd.DataFrame, const: dict, return_period: int) -> dict:
+    dates = prices.index.values.astype("datetime64[D]")
+    bench = {b: prices[b].to_numpy(float) for b in const["benchmarks"] if b in prices}
+    sectors = [s for s in const["sectors"] if s in prices]
+    missing = sorted(set(const["sectors"] + const["benchmarks"]) - set(prices.columns))
+    if missing:
+        print(f"  No prices for {missing} — skipped")
+
+    with ProcessPoolExecutor(max_workers=min(len(sectors), os.cpu_count() or 1) or 1) as pool:
+        futures = {
+            s: pool.submit(backtest_sector, s, dates, prices[s].to_numpy(float), bench,
+                           return_period, const["z_windows"], const["thresholds"])
+            for s in sectors
+        }
+        return {s: f.result() for s, f in futures.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--prices", help="wide CSV of weekly closes (date column + one column per symbol)")
+    parser.add_argument("--return-period", type=int, help="trailing return period in weeks")
+    args = parser.parse_args()
+
+    const = load_constants()
+    return_period = args.return_period or const["return_periods"][DEFAULT_RETURN_PERIOD_INDEX]
+    print(f"Sector z-score backtest: {len(const['sectors'])} sectors × {len(const['benchmarks'])} benchmarks "
+          f"× windows {const['z_windows']} (return period {return_period}w)")
+
+    if args.prices:
+        prices = pd.read_csv(args.prices, index_col=0, parse_dates=True).sort_index()
+    else:
+        prices = fetch_weekly_prices(const["sectors"] + const["benchmarks"])
+
+    started = time.perf_counter()
+    results = run_backtest(prices, const, return_period)
+    elapsed = time.perf_counter() - started
+
+    output = {
+        "last_updated":        datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "price_range":         [str(prices.index.min().date()), str(prices.index.max().date())],
+        "return_period_weeks": return_period,
+        "horizons_months":     list(HORIZONS_MONTHS),
+        "thresholds":          const["thresholds"],
+        "note": ("Forward returns are sector minus benchmark, in percentage points, measured from the "
+                 "month-end where z first crosses the threshold. hit_rate: share with the expected sign. "
+                 "all_months: every scored month, for comparison."),
+        "results":             results,
+    }
+    write_json(OUTPUT_PATH, output, separators=(",", ":"))
+    combos = sum(len(w) for b in results.values() for w in b.values())
+    print(f"  {combos} sector/benchmark/window combinations in {elapsed:.2f}s → {OUTPUT_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Make-style rebuilds of derived datasets from content-fingerprinted inputs.
+
+Fetchers only download: they store what the upstream returned under data/raw/
+and ask the graph to bring their outputs up to date. A derived node is rebuilt
+only when something it depends on actually changed:
+
+  wilshire ─────┐
+  buffett_fred ─┴─ buffett   (public/buffett_indicator_data.json: ratio, trend, bands)
+  ppi_levels ──── ppi        (public/ppi_data.json: MoM / YoY)
+  finra_debits ── margin     (public/margin_data.json: YoY growth)
+
+Every node's fingerprint is the sha256 of its file. After a build, the node's
+entry in data/state/build_graph.json records the fingerprints of its inputs,
+of its recipe's source file, and of the output it wrote. A node is rebuilt
+when it was never built, its output is missing or was changed outside the
+graph, its recipe's code changed — the recipe module or any scripts/ module
+it imports, directly or through another (trends.py, percentiles.py, ...) —
+or any input fingerprint differs from the recorded one. An upstream rebuild that yields byte-identical output
+therefore does not cascade.
+
+data/raw/ is not committed. store_raw also archives each new raw input
+(archive.py, source "raw"), and a missing raw file is restored from its
+newest archived copy before the graph is evaluated.
+
+Recipes are "module:function" strings, imported on demand; the function
+receives {input node: path} and writes the node's file (plus manifest/delta).
+
+  python scripts/build_graph.py              # rebuild whatever is out of date
+  python scripts/build_graph.py --explain    # ... and say why for every node
+  python scripts/build_graph.py -n           # only say what would be rebuilt
+  python scripts/build_graph.py --force ppi  # rebuild ppi regardless
+"""
+
+import argparse
+import ast
+import hashlib
+import importlib
+import time
+from datetime import datetime, timezone
+from graphlib import TopologicalSorter
+from pathlib import Path
+
+from archive import REPROCESS, ArchiveMiss, latest, store
+from common import PUBLIC_DIR, RAW_DIR, ROOT_DIR, STATE_DIR, atomic_write, read_json, update_json
+
+BUILD_STATE_PATH = STATE_DIR / "build_graph.json"
+SCRIPTS_DIR = Path(__file__).resolve().parent
+
+# node -> (file, upstream nodes, recipe "module:function" — None for a raw input)
+NODES = {
+    "wilshire":     (RAW_DIR / "wilshire.csv",                       (), None),
+    "buffett_fred": (RAW_DIR / "buffett_fred.csv",                   (), None),
+    "ppi_levels":   (RAW_DIR / "ppi_levels.csv",                     (), None),
+    "finra_debits": (RAW_DIR / "finra_debits.csv",                   (), None),
+    "buffett":      (PUBLIC_DIR / "buffett_indicator_data.json", ("wilshire", "buffett_fred"),
+                     "fetch_buffett_indicator:build_buffett"),
+    "ppi":          (PUBLIC_DIR / "ppi_data.json",   ("ppi_levels",),   "fetch_ppi_data:build_ppi"),
+    "margin":       (PUBLIC_DIR / "margin_data.json", ("finra_debits",), "fetch_finra_data:build_margin"),
+}
+
+
+def store_raw(node: str, text: str) -> bool:
+    """Save a fetcher's raw download for `node`; True if its content changed."""
+    path = NODES[node][0]
+    body = text.encode()
+    if hashlib.sha256(body).hexdigest() == fingerprint(path):
+        return False
+    with atomic_write(path, "wb") as f:
+        f.write(body)
+    if not REPROCESS:
+        store("raw", node, body)
+    return True
+
+
+def restore_raw(node: str) -> bool:
+    """Recreate a missing raw input from the archive; False if it was never archived."""
+    try:
+        body = latest("raw", node)
+    except ArchiveMiss:
+        return False
+    with atomic_write(NODES[node][0], "wb") as f:
+        f.write(body)
+    print(f"  {node:<13} restored from the archive")
+    return True
+
+
+def fingerprint(path: Path) -> str:
+    """sha256 of a file's bytes, or None if it doesn't exist."""
+    if not path.exists():
+        return None
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def _local_imports(module: str) -> set:
+    """Names of the scripts/ modules `module` imports (top level or inside functions)."""
+    tree = ast.parse((SCRIPTS_DIR / f"{module}.py").read_text())
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(a.name.split(".")[0] for a in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.add(node.module.split(".")[0])
+    return {n for n in names if (SCRIPTS_DIR / f"{n}.py").exists()}
+
+
+def _code_closure(module: str) -> list:
+    """`module` plus every scripts/ module it imports, transitively; sorted."""
+    seen, stack = set(), [module]
+    while stack:
+        name = stack.pop()
+        if name not in seen:
+            seen.add(name)
+            stack.extend(_local_imports(name) - seen)
+    return sorted(seen)
+
+
+def _recipe_fingerprint(recipe: str) -> dict:
+    """{file: sha256} of the recipe's module and its local import closure."""
+    return {f"{m}.py": fingerprint(SCRIPTS_DIR / f"{m}.py") for m in _code_closure(recipe.split(":")[0])}
+
+
+def _short(fp: str) -> str:
+    return fp[:8] if fp else "none"
+
+
+def _closure(targets) -> list:
+    """`targets` plus everything upstream of them, in build order."""
+    wanted, stack = set(), list(targets)
+    while stack:
+        name = stack.pop()
+        if name not in wanted:
+            wanted.add(name)
+            stack.extend(NODES[name][1])
+    graph = {name: deps for name, (_, deps, _) in NODES.items() if name in wanted}
+    return list(TopologicalSorter(graph).static_order())
+
+
+def stale_reasons(name: str, state: dict, fps: dict) -> list:
+    """Why `name` needs rebuilding given current fingerprints `fps` ([] = up to date)."""
+    path, inputs, recipe = NODES[name]
+    entry = state.get(name)
+    if entry is None:
+        return ["never built"]
+    reasons = []
+    if fps[name] is None:
+        reasons.append("output missing")
+    elif fps[name] != entry.get("output"):
+        reasons.append(f"output changed outside the graph ({_short(entry.get('output'))} → {_short(fps[name])})")
+    code, recorded_code = _recipe_fingerprint(recipe), entry.get("recipe")
+    if not isinstance(recorded_code, dict):
+        reasons.append(f"recipe changed ({recipe.split(':')[0]}.py)")  # state from before code closures
+    elif code != recorded_code:
+        changed = sorted(f for f in code.keys() | recorded_code.keys() if code.get(f) != recorded_code.get(f))
+        reasons.append(f"recipe changed ({', '.join(changed)})")
+    recorded = entry.get("inputs", {})
+    for dep in inputs:
+        if dep not in recorded:
+            reasons.append(f"new input {dep}")
+        elif fps[dep] != recorded[dep]:
+            reasons.append(f"{dep} changed ({_short(recorded[dep])} → {_short(fps[dep])})")
+    return reasons
+
+
+def _record(name: str, fps: dict, duration_s: float):
+    path, inputs, recipe = NODES[name]
+
+    def apply(state):
+        state[name] = {
+            "inputs":     {dep: fps[dep] for dep in inputs},
+            "recipe":     _recipe_fingerprint(recipe),
+            "output":     fps[name],
+            "built_at":   datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "duration_s": round(duration_s, 2),
+        }
+        return state
+
+    update_json(BUILD_STATE_PATH, apply, indent=2, sort_keys=True)
+
+
+def build(targets=None, force=False, explain=False, dry_run=False) -> dict:
+    """
+    Bring `targets` (default: every derived node) up to date.
+
+    `force` rebuilds the targets themselves even if nothing changed (their
+    upstream nodes only when stale). Returns {node: "rebuilt" | "up to date" |
+    "raw" | "skipped" | "would rebuild"} for every node visited.
+    """
+    targets = list(targets or [n for n, (_, _, recipe) in NODES.items() if recipe])
+    state = read_json(BUILD_STATE_PATH, {})
+    fps, results = {}, {}
+
+    for name in _closure(targets):
+        path, inputs, recipe = NODES[name]
+        fps[name] = fingerprint(path)
+        if recipe is None and fps[name] is None and not dry_run and restore_raw(name):
+            fps[name] = fingerprint(path)
+        if recipe is None:
+            results[name] = "raw"
+            if explain:
+                print(f"  {name:<13} raw input  {_short(fps[name])}  {path.relative_to(ROOT_DIR)}")
+            continue
+
+        missing = [dep for dep in inputs if fps[dep] is None]
+        if missing:
+            results[name] = "skipped"
+            print(f"  {name:<13} skipped — no {', '.join(missing)} yet")
+            continue
+
+        reasons = stale_reasons(name, state, fps)
+        if force and name in targets:
+            reasons = ["forced"] + reasons
+        if not reasons:
+            results[name] = "up to date"
+            if explain:
+                print(f"  {name:<13} up to date ({', '.join(f'{d} {_short(fps[d])}' for d in inputs)})")
+            continue
+
+        print(f"  {name:<13} {'would rebuild' if dry_run else 'rebuilding'} — {'; '.join(reasons)}")
+        if dry_run:
+            results[name] = "would rebuild"
+            continue
+        module, func = recipe.split(":")
+        started = time.monotonic()
+        getattr(importlib.import_module(module), func)({dep: NODES[dep][0] for dep in inputs})
+        fps[name] = fingerprint(path)
+        _record(name, fps, time.monotonic() - started)
+        results[name] = "rebuilt"
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("targets", nargs="*", metavar="NODE", help="derived nodes to build (default: all)")
+    parser.add_argument("--explain", action="store_true", help="report every node's status and fingerprints")
+    parser.add_argument("-n", "--dry-run", action="store_true", help="report what would be rebuilt, build nothing")
+    parser.add_argument("--force", action="store_true", help="rebuild the targets even if up to date")
+    args = parser.parse_args()
+    derived = sorted(n for n, (_, _, recipe) in NODES.items() if recipe)
+    unknown = [t for t in args.targets if t not in derived]
+    if unknown:
+        parser.error(f"unknown node(s) {', '.join(unknown)}; choose from {', '.join(derived)}")
+
+    results = build(args.targets, force=args.force, explain=args.explain or args.dry_run, dry_run=args.dry_run)
+    counts = {}
+    for status in results.values():
+        counts[status] = counts.get(status, 0) + 1
+    print(", ".join(f"{n} {status}" for status, n in sorted(counts.items())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Regime changepoints for margin debt, valuation and funding stress.
+
+Three monthly series are segmented into regimes with PELT (Pruned Exact Linear
+Time, Killick et al. 2012) under a Gaussian model where both the mean and the
+variance change at each changepoint:
+
+  margin_yoy        FINRA margin debt YoY %
+  buffett_residual  log(Buffett ratio / trend) × 100 — % above/below the fitted trend
+  sofr_spread       SOFR 99th − 1st percentile (bp), monthly median
+
+A segment [s, t) costs m·log σ̂² (m points, σ̂² its MLE variance, from cumulative
+sums of x and x² so each evaluation is O(1)); the optimal partition minimizes
+Σ cost + β per changepoint. PELT drops every candidate start s once
+F(s) + C(s, t) > F(t), since it can never again be optimal, which keeps the
+search linear in practice.
+
+Penalty tuning: β = c·log n is swept over c = c₀ · PENALTY_GRID and the number
+of changepoints recorded for each c. The chosen β sits in the middle of the
+widest range of c giving the same (non-zero) count — the segmentation that is
+least sensitive to the penalty. YoY growth and trend residuals are strongly
+autocorrelated, and under the iid likelihood every swing looks like a regime,
+so the sweep starts at c₀ = max(1, log((1 + ρ) / (1 − ρ))), ρ the lag-1
+autocorrelation (the log of the variance inflation of a mean).
+
+Incremental mode: a changepoint followed by at least CONFIRM_POINTS points is
+confirmed. data/state/changepoints.json keeps, per series, the tuned β, the
+last confirmed changepoint and a hash of the data before it. When new points
+arrive and that history is unchanged, PELT re-runs only from the last confirmed
+changepoint, with the earlier ones kept as they were. Revised history, a
+missing state or --full triggers a full run with re-tuning.
+
+  python scripts/changepoints.py                 # incremental where possible
+  python scripts/changepoints.py --full          # re-tune and re-segment everything
+  python scripts/changepoints.py margin_yoy -v   # one series, with the penalty sweep
+Output: public/changepoints.json (segments with start/end month, mean, std)
+"""
+
+import argparse
+import hashlib
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from common import PUBLIC_DIR, STATE_DIR, read_json, update_json, write_json
+from correlations import monthly
+
+OUTPUT_PATH = PUBLIC_DIR / "changepoints.json"
+STATE_PATH = STATE_DIR / "changepoints.json"
+
+MIN_SEGMENT = 6                               # months
+CONFIRM_POINTS = 2 * MIN_SEGMENT              # points after a changepoint before it is final
+PENALTY_GRID = np.geomspace(1, 30, 61)        # multiples of c₀; β = c · log n
+VAR_FLOOR = 1e-3                              # segment variance floor, × series variance
+
+
+# ── Series ─────────────────────────────────────────────────────────────────
+
+def _margin_yoy():
+    margin = read_json(PUBLIC_DIR / "margin_data.json")
+    return monthly(margin["data"], "yoy_growth") if margin else None
+
+
+def _buffett_residual():
+    buffett = read_json(PUBLIC_DIR / "buffett_indicator_data.json")
+    if not buffett:
+        return None
+    rows = buffett.get("daily") or buffett["data"]
+    res = monthly(rows, lambda r: 100 * np.log(r["ratio_pct"] / r["trend_pct"]), "mean")
+    return res.resample("ME").mean().interpolate(limit_area="inside")
+
+
+def _sofr_spread():
+    sofr = read_json(PUBLIC_DIR / "sofr_data.json")
+    if not sofr:
+        return None
+    df = pd.DataFrame(sofr["data"])
+    spread = 100 * (pd.to_numeric(df["percentile_99"], errors="coerce")
+                    - pd.to_numeric(df["percentile_1"], errors="coerce"))
+    return pd.Series(spread.values, index=pd.to_datetime(df["date"])).dropna().resample("ME").median().dropna()
+
+
+# name -> (loader, unit)
+SERIES = {
+    "margin_yoy":       (_margin_yoy,       "% YoY"),
+    "buffett_residual": (_buffett_residual, "% vs trend (log)"),
+    "sofr_spread":      (_sofr_spread,      "bp"),
+}
+
+
+# ── PELT ───────────────────────────────────────────────────────────────────
+
+def _segment_cost(s1, s2, floor):
+    """C(starts, t) for an array of segment starts, from cumulative sums of x and x²."""
+    def cost(starts, t):
+        m = t - starts
+        mean = (s1[t] - s1[starts]) / m
+        var = (s2[t] - s2[starts]) / m - mean * mean
+        return m * np.log(np.maximum(var, floor))
+    return cost
+
+
+def pelt(x: np.ndarray, penalty: float, min_size: int = MIN_SEGMENT) -> list:
+    """Optimal changepoints of x (indices where a new segment starts) for penalty β."""
+    n = len(x)
+    if n < 2 * min_size:
+        return []
+    cost = _segment_cost(np.r_[0.0, np.cumsum(x)], np.r_[0.0, np.cumsum(x * x)],
+                         VAR_FLOOR * max(float(x.var()), 1e-12))
+    F = np.full(n + 1, np.inf)
+    F[0] = -penalty
+    prev = np.zeros(n + 1, dtype=int)
+    candidates = np.array([0])
+    for t in range(min_size, n + 1):
+        s = t - min_size
+        if s >= min_size:
+            candidates = np.append(candidates, s)
+        c = F[candidates] + cost(candidates, t)
+        best = int(np.argmin(c))
+        F[t] = c[best] + penalty
+        prev[t] = candidates[best]
+        candidates = candidates[c <= F[t]]
+    cps, t = [], n
+    while prev[t] > 0:
+        t = prev[t]
+        cps.append(int(t))
+    return cps[::-1]
+
+
+def tune_penalty(x: np.ndarray):
+    """(β, sweep): β from the widest plateau of changepoint counts over PENALTY_GRID."""
+    log_n = np.log(len(x))
+    d = x - x.mean()
+    rho = min(float(d[1:] @ d[:-1] / (d @ d)), 0.999) if d.any() else 0.0
+    grid = max(1.0, np.log((1 + rho) / (1 - rho))) * PENALTY_GRID
+    counts = [len(pelt(x, c * log_n)) for c in grid]
+    best, i = None, 0
+    while i < len(counts):
+        j = i
+        while j + 1 < len(counts) and counts[j + 1] == counts[i]:
+            j += 1
+        if counts[i] and (best is None or j - i > best[1] - best[0]):
+            best = (i, j)
+        i = j + 1
+    c = np.sqrt(grid[best[0]] * grid[best[1]]) if best else grid[-1]
+    return float(c * log_n), [[round(float(c), 3), k] for c, k in zip(grid, counts)]
+
+
+# ── Full / incremental runs ────────────────────────────────────────────────
+
+def _prefix_hash(dates: list, x: np.ndarray, end: int) -> str:
+    body = ",".join(f"{d}:{v:.6g}" for d, v in zip(dates[:end], x[:end]))
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+def segment(name: str, dates: list, x: np.ndarray, prior: dict = None, full: bool = False, verbose: bool = False):
+    """
+    Changepoints of one series: (indices, state entry, mode). Reuses `prior`
+    (this series' state entry) when the history up to its last confirmed
+    changepoint is unchanged.
+    """
+    n = len(x)
+    anchor = None
+    if prior and not full and prior["anchor"] in dates:
+        a = dates.index(prior["anchor"])
+        if _prefix_hash(dates, x, a) == prior["prefix"]:
+            anchor = a
+
+    if anchor is None:
+        penalty, sweep = tune_penalty(x)
+        if verbose:
+            print(f"  {name}: penalty sweep (c → changepoints): "
+                  + " ".join(f"{c}→{k}" for c, k in sweep[::4]))
+        cps = pelt(x, penalty)
+        mode = "full"
+    else:
+        penalty, sweep = prior["penalty"], prior.get("sweep", [])
+        kept = [dates.index(d) for d in prior["confirmed"]]
+        cps = kept + [anchor + i for i in pelt(x[anchor:], penalty) if i > 0]
+        mode = f"incremental from {prior['anchor']}"
+
+    confirmed = [i for i in cps if n - i >= CONFIRM_POINTS]
+    a = confirmed[-1] if confirmed else 0
+    entry = {
+        "penalty":   penalty,
+        "sweep":     sweep,
+        "confirmed": [dates[i] for i in confirmed],
+        "anchor":    dates[a],
+        "prefix":    _prefix_hash(dates, x, a),
+        "data":      _prefix_hash(dates, x, n),
+    }
+    return cps, entry, mode
+
+
+def segments(dates: list, x: np.ndarray, cps: list) -> list:
+    """Start/end month, length, mean and std of every segment."""
+    bounds = [0] + cps + [len(x)]
+    out = []
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        seg = x[lo:hi]
+        out.append({
+            "start":  dates[lo],
+            "end":    dates[hi - 1],
+            "months": hi - lo,
+            "mean":   round(float(seg.mean()), 3),
+            "std":    round(float(seg.std()), 3),
+        })
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("series", nargs="*", metavar="SERIES", help="series to segment (default: all)")
+    parser.add_argument("--full", action="store_true", help="ignore saved state: re-tune penalties and re-segment")
+    parser.add_argument("-v", "--verbose", action="store_true", help="print the penalty sweep")
+    args = parser.parse_args()
+    unknown = [s for s in args.series if s not in SERIES]
+    if unknown:
+        parser.error(f"unknown series {', '.join(unknown)}; choose from {', '.join(SERIES)}")
+
+    state = read_json(STATE_PATH, {})
+    previous = read_json(OUTPUT_PATH, {}).get("series", {})
+    results, entries = dict(previous), {}
+    for name in args.series or SERIES:
+        loader, unit = SERIES[name]
+        s = loader()
+        if s is None or len(s) < 2 * MIN_SEGMENT:
+            print(f"  {name}: not enough data — skipped")
+            continue
+        dates = [d.strftime("%Y-%m") for d in s.index]
+        x = s.to_numpy(dtype=float)
+        if state.get(name, {}).get("data") == _prefix_hash(dates, x, len(x)) and not args.full and name in previous:
+            print(f"  {name}: unchanged since the last run")
+            continue
+        cps, entries[name], mode = segment(name, dates, x, state.get(name), args.full, args.verbose)
+        results[name] = {
+            "unit":          unit,
+            "penalty":       round(entries[name]["penalty"], 3),
+            "changepoints":  [dates[i] for i in cps],
+            "confirmed":     entries[name]["confirmed"],
+            "segments":      segments(dates, x, cps),
+        }
+        print(f"  {name:<17} {len(cps)} changepoints ({mode}), β={entries[name]['penalty']:.1f}: "
+              + ", ".join(results[name]["changepoints"]))
+
+    if not entries:
+        return
+    write_json(OUTPUT_PATH, {
+        "last_updated": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "note": ("PELT changepoints (Gaussian mean and variance change, min segment "
+                 f"{MIN_SEGMENT} months). Segments give start/end month (inclusive), mean and std; "
+                 "changepoints not yet in 'confirmed' may still move as new data arrives."),
+        "series": results,
+    }, indent=2)
+    update_json(STATE_PATH, lambda st: {**st, **entries}, indent=2, sort_keys=True)
+
+
+if __name__ == "__main__":
+    main()
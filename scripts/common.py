@@ -0,0 +1,79 @@
+"""
+Shared paths and file helpers for the data fetch scripts.
+
+Several fetchers run in parallel in the workflow and touch shared files
+(the manifest, state files), so writes go through a temp file + rename and
+shared read-modify-write updates hold an exclusive lock.
+"""
+
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows — locking is best-effort only
+    fcntl = None
+
+ROOT_DIR   = Path(__file__).resolve().parent.parent
+PUBLIC_DIR = ROOT_DIR / "public"
+STATE_DIR  = ROOT_DIR / "data" / "state"
+SERIES_DIR = ROOT_DIR / "data" / "series"
+RAW_DIR    = ROOT_DIR / "data" / "raw"
+
+
+@contextmanager
+def atomic_write(path: Path, mode: str = "w"):
+    """Open a temp file next to `path`; it replaces `path` only if the block completes."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode) as f:
+            yield f
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def write_json(path: Path, obj, **dump_kwargs) -> Path:
+    """Atomically write `obj` as JSON to `path` (readers never see a partial file)."""
+    with atomic_write(path) as f:
+        json.dump(obj, f, **dump_kwargs)
+    return Path(path)
+
+
+def read_json(path: Path, default=None):
+    """Load JSON from `path`, returning `default` if missing or unreadable."""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+@contextmanager
+def file_lock(path: Path):
+    """Hold an exclusive lock associated with `path` (lock files live in STATE_DIR)."""
+    STATE_DIR.mkdir(parents=True, exist_ok=True)
+    lock_path = STATE_DIR / f"{Path(path).name}.lock"
+    with open(lock_path, "w") as lf:
+        if fcntl:
+            fcntl.flock(lf, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lf, fcntl.LOCK_UN)
+
+
+def update_json(path: Path, update_fn, default=None, **dump_kwargs):
+    """Locked read-modify-write of a shared JSON file. Returns the written object."""
+    with file_lock(path):
+        current = read_json(path, default if default is not None else {})
+        updated = update_fn(current)
+        write_json(path, updated, **dump_kwargs)
+        return updated
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Lead/lag cross-correlations between the dashboard's indicators.
+
+Every published dataset is reduced to one monthly series (month-end grid):
+
+  margin_yoy         FINRA margin debt YoY %
+  buffett_deviation  log(Buffett ratio / trend), in trend σ (daily series if present, else
+                     quarterly interpolated to months)
+  fear_greed         CNN Fear & Greed, monthly mean
+  sofr_change        monthly change in the average SOFR rate (pp)
+  ppi_yoy            PPI Final Demand YoY % (NSA)
+  aaii_stocks        AAII stock allocation %
+  put_call           CBOE equity put/call, monthly mean (when fetched)
+
+For every pair (x, y) the full cross-correlation function is computed by FFT
+over their common span: r(k) = Σ x[t]·y[t+k] / n on standardized series, so a
+peak at k > 0 means x leads y by k months. Rolling estimates repeat this on
+trailing windows of WINDOWS months; all windows of a pair go through one
+batched FFT, so the whole pair × window grid is a handful of array ops.
+
+  python scripts/correlations.py
+Output: public/correlations.json
+"""
+
+import time
+from datetime import datetime, timezone
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+from common import PUBLIC_DIR, read_json, write_json
+
+OUTPUT_PATH = PUBLIC_DIR / "correlations.json"
+MAX_LAG_MONTHS = 24
+WINDOWS = (36, 60, 120)     # rolling windows, months
+ROLLING_STEP = 3            # months between rolling estimates
+MIN_OVERLAP = 48            # pairs with fewer common months are skipped
+
+
+# ── Monthly series ─────────────────────────────────────────────────────────
+
+def monthly(rows: list, value, how: str = "last") -> pd.Series:
+    """Month-end series from [{date, ...}] rows; `value` is a key or a row -> number function."""
+    get = value if callable(value) else (lambda r: r.get(value))
+    s = pd.Series(
+        pd.to_numeric([get(r) for r in rows], errors="coerce"),
+        index=pd.to_datetime([r["date"] for r in rows], format="mixed"),
+    ).dropna()
+    if s.empty:
+        return s
+    return getattr(s.resample("ME"), how)().dropna()
+
+
+def load_series() -> dict:
+    """name -> monthly pd.Series for every dataset present in public/."""
+    out = {}
+    margin = read_json(PUBLIC_DIR / "margin_data.json")
+    if margin:
+        out["margin_yoy"] = monthly(margin["data"], "yoy_growth")
+
+    buffett = read_json(PUBLIC_DIR / "buffett_indicator_data.json")
+    if buffett:
+        rows = buffett.get("daily") or buffett["data"]
+        dev = monthly(rows, lambda r: np.log(r["ratio_pct"] / r["trend_pct"]) / np.log(r["band_plus1"] / r["trend_pct"]))
+        out["buffett_deviation"] = dev.resample("ME").mean().interpolate(limit_area="inside")
+
+    fg = read_json(PUBLIC_DIR / "fear_greed_index.json")
+    if fg:
+        out["fear_greed"] = monthly(fg["historical"], "value", "mean")
+
+    sofr = read_json(PUBLIC_DIR / "sofr_data.json")
+    if sofr:
+        out["sofr_change"] = monthly(sofr["data"], "rate", "mean").diff().dropna()
+
+    ppi = read_json(PUBLIC_DIR / "ppi_data.json")
+    if ppi:
+        out["ppi_yoy"] = monthly(ppi["series"]["WPUFD4"]["data"], "yoy")
+
+    aaii = read_json(PUBLIC_DIR / "aaii_allocation_data.json")
+    if aaii:
+        out["aaii_stocks"] = monthly(aaii["data"], "stocks")
+
+    put_call = read_json(PUBLIC_DIR / "put_call_data.json")
+    if put_call:
+        out["put_call"] = monthly(put_call["data"], "ratio", "mean")
+    return {k: s for k, s in out.items() if len(s)}
+
+
+def align(x: pd.Series, y: pd.Series):
+    """Both series on their common monthly span; interior gaps linearly interpolated."""
+    start, end = max(x.index[0], y.index[0]), min(x.index[-1], y.index[-1])
+    if start > end:
+        return None, None
+    grid = pd.date_range(start, end, freq="ME")
+    xs = x.reindex(grid).interpolate(limit_area="inside")
+    ys = y.reindex(grid).interpolate(limit_area="inside")
+    ok = (xs.notna() & ys.notna()).values
+    return grid[ok], np.column_stack([xs.values[ok], ys.values[ok]])
+
+
+# ── FFT kernels ────────────────────────────────────────────────────────────
+
+def _standardize(a: np.ndarray) -> np.ndarray:
+    """Zero mean, unit variance along the last axis (constant rows → zeros)."""
+    a = a - a.mean(axis=-1, keepdims=True)
+    sd = a.std(axis=-1, keepdims=True)
+    return np.divide(a, sd, out=np.zeros_like(a), where=sd > 0)
+
+
+def xcorr(x: np.ndarray, y: np.ndarray, max_lag: int) -> np.ndarray:
+    """
+    Cross-correlation r(k), k = -max_lag..max_lag, of x and y along the last
+    axis (rows are independent windows). r(k) = Σ_t x[t]·y[t+k] / n on
+    standardized inputs, via zero-padded FFTs — O(n log n) per row.
+    """
+    n = x.shape[-1]
+    size = 1 << int(np.ceil(np.log2(2 * n - 1)))
+    fx = np.fft.rfft(_standardize(x), size)
+    fy = np.fft.rfft(_standardize(y), size)
+    full = np.fft.irfft(np.conj(fx) * fy, size) / n  # full[k] = Σ x[t]·y[t+k], negative k wrapped to the end
+    lags = np.arange(-max_lag, max_lag + 1)
+    return full[..., lags % size]
+
+
+def peak(r: np.ndarray, max_lag: int):
+    """(lag, r) of the largest |r| along the last axis."""
+    i = np.abs(r).argmax(axis=-1)
+    return i - max_lag, np.take_along_axis(r, i[..., None], axis=-1)[..., 0]
+
+
+def rolling(grid, values: np.ndarray, window: int, max_lag: int) -> dict:
+    """Peak lag and r for trailing windows ending every ROLLING_STEP months."""
+    n = len(values)
+    if n < window:
+        return None
+    ends = np.arange(window, n + 1)[::-1][::ROLLING_STEP][::-1]
+    idx = ends[:, None] - window + np.arange(window)
+    lag_cap = min(max_lag, window // 3)
+    lags, rs = peak(xcorr(values[idx, 0], values[idx, 1], lag_cap), lag_cap)
+    return {
+        "dates": [d.strftime("%Y-%m") for d in grid[ends - 1]],
+        "lag":   lags.tolist(),
+        "r":     np.round(rs, 3).tolist(),
+    }
+
+
+def analyze_pair(grid, values: np.ndarray) -> dict:
+    n = len(values)
+    max_lag = min(MAX_LAG_MONTHS, n // 3)
+    r = xcorr(values[:, 0], values[:, 1], max_lag)
+    lag, best = peak(r, max_lag)
+    return {
+        "months":     n,
+        "max_lag":    max_lag,
+        "span":       [grid[0].strftime("%Y-%m"), grid[-1].strftime("%Y-%m")],
+        "r0":         round(float(r[max_lag]), 3),
+        "peak_lag":   int(lag),
+        "peak_r":     round(float(best), 3),
+        "band95":     round(1.96 / np.sqrt(n), 3),
+        "ccf":        np.round(r, 3).tolist(),
+        "rolling":    {str(w): roll for w in WINDOWS
+                       if (roll := rolling(grid, values, w, max_lag)) is not None},
+    }
+
+
+def main():
+    started = time.perf_counter()
+    series = load_series()
+    print(f"Cross-correlations for {len(series)} indicators: {', '.join(series)}")
+
+    pairs = {}
+    for a, b in combinations(series, 2):
+        grid, values = align(series[a], series[b])
+        if grid is None or len(grid) < MIN_OVERLAP:
+            print(f"  {a} × {b}: {0 if grid is None else len(grid)} common months — skipped")
+            continue
+        res = analyze_pair(grid, values)
+        pairs[f"{a}|{b}"] = res
+        print(f"  {a:<17} × {b:<17} n={res['months']:>3}  r0={res['r0']:+.2f}  "
+              f"peak r={res['peak_r']:+.2f} at lag {res['peak_lag']:+d}")
+
+    output = {
+        "last_updated": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "note": ("Pairs are keyed 'x|y'. ccf[i] is the correlation of x[t] with y[t+k], k = i − max_lag "
+                 f"(months, max_lag ≤ {MAX_LAG_MONTHS}); a peak at k > 0 means x leads y. band95 ≈ ±1.96/√n. "
+                 "rolling: peak lag and r over trailing windows (months), lags capped at a third of the window."),
+        "windows":    list(WINDOWS),
+        "indicators": {k: {"from": s.index[0].strftime("%Y-%m"), "to": s.index[-1].strftime("%Y-%m"),
+                           "months": len(s)} for k, s in series.items()},
+        "pairs":      pairs,
+    }
+    write_json(OUTPUT_PATH, output, separators=(",", ":"))
+    print(f"  {len(pairs)} pairs × {len(WINDOWS)} windows in {time.perf_counter() - started:.2f}s → {OUTPUT_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Delta feeds: public/<dataset>.delta.json next to each full file.
+
+A client holding a cached copy at version V (the sha256 recorded in the
+manifest when it downloaded the file) fetches the small delta, finds V in
+`bases`, and applies only the rows changed after that point instead of
+re-downloading the full history.
+
+State per dataset lives in data/state/delta/<dataset>.json:
+  seq       publish counter, incremented whenever the file content changes
+  versions  the last KEEP_VERSIONS (version, seq) pairs clients can patch from
+  rows      key -> [row hash, seq when the row last changed]
+  removed   key -> seq when the row disappeared
+
+Delta file layout:
+  {"dataset", "version", "array_key", "key",
+   "bases":   {old_version: seq, ...},
+   "changes": [[seq, row], ...],     rows added/revised after the oldest base
+   "removed": [[seq, key], ...],
+   "meta":    every top-level field except the row array}
+A client applies changes/removed with seq > bases[its version].
+"""
+
+import hashlib
+import json
+
+from common import PUBLIC_DIR, STATE_DIR, read_json, write_json
+
+DELTA_STATE_DIR = STATE_DIR / "delta"
+KEEP_VERSIONS = 8
+
+# dataset -> (full file, row array key, row key)
+DELTA_DATASETS = {
+    "sofr":       ("sofr_data.json",        "data",       "date"),
+    "fear_greed": ("fear_greed_index.json", "historical", "date"),
+    "margin":     ("margin_data.json",      "data",       "date"),
+    "put_call":   ("put_call_data.json",    "data",       "date"),
+}
+
+
+def delta_path(dataset: str):
+    fname = DELTA_DATASETS[dataset][0]
+    return PUBLIC_DIR / fname.replace(".json", ".delta.json")
+
+
+def _row_hash(row: dict) -> str:
+    return hashlib.sha1(json.dumps(row, sort_keys=True, separators=(",", ":")).encode()).hexdigest()[:16]
+
+
+def write_delta(dataset: str, output: dict) -> dict:
+    """
+    Record this publish of `dataset` and rewrite its delta file.
+
+    Call after the full file has been written; the version is the sha256 of
+    that file (the same value the manifest records). Returns the delta.
+    """
+    fname, array_key, key = DELTA_DATASETS[dataset]
+    version = hashlib.sha256((PUBLIC_DIR / fname).read_bytes()).hexdigest()
+    state_path = DELTA_STATE_DIR / f"{dataset}.json"
+    state = read_json(state_path, {"seq": 0, "versions": [], "rows": {}, "removed": {}})
+
+    versions = state["versions"]
+    if versions and versions[-1]["version"] == version:
+        return read_json(delta_path(dataset))  # unchanged since last publish
+
+    seq = state["seq"] + 1
+    versions.append({"version": version, "seq": seq})
+    versions = versions[-KEEP_VERSIONS:]
+    oldest = versions[0]["seq"] if len(versions) > 1 else seq
+
+    # One pass over the rows, so `output[array_key]` may be a streamed view (series_log.LogRows)
+    rows_state = state["rows"]
+    removed = state["removed"]
+    current = {}
+    changes = []
+    for row in output.get(array_key, []):
+        k = row[key]
+        h = _row_hash(row)
+        prev = rows_state.get(k)
+        current[k] = [h, prev[1] if prev and prev[0] == h else seq]
+        removed.pop(k, None)
+        if current[k][1] > oldest:
+            changes.append([current[k][1], row])
+    for k in rows_state.keys() - current.keys():
+        removed[k] = seq
+    removed = {k: s for k, s in removed.items() if s > oldest}
+
+    delta = {
+        "dataset":   dataset,
+        "version":   version,
+        "array_key": array_key,
+        "key":       key,
+        "bases":     {v["version"]: v["seq"] for v in versions[:-1]},
+        "changes":   changes,
+        "removed":   sorted([[s, k] for k, s in removed.items()]),
+        "meta":      {k: v for k, v in output.items() if k != array_key},
+    }
+
+    write_json(state_path, {"seq": seq, "versions": versions, "rows": current, "removed": removed},
+               separators=(",", ":"))
+    write_json(delta_path(dataset), delta, separators=(",", ":"))
+    print(f"  Delta: {len(delta['changes'])} changed row(s) across {len(delta['bases'])} base version(s) "
+          f"→ {delta_path(dataset).name}")
+    return delta
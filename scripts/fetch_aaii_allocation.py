@@ -13,6 +13,11 @@ from pathlib import Path
 from bs4 import BeautifulSoup
 import re
 
+from common import write_json
+from health import guarded
+from manifest import update_manifest
+from release_calendar import should_fetch
+
 AAII_URL = "https://www.aaii.com/assetallocation"
 AAII_MEMBERS_URL = "https://www.aaii.com/sentimentsurvey"
 OUTPUT_PATH = Path(__file__).parent.parent / "public" / "aaii_allocation_data.json"
@@ -34,10 +39,13 @@ def fetch_aaii_allocation_data():
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
 
-        # Try to fetch the AAII page
-        response = requests.get(AAII_URL, headers=headers, timeout=30)
+        # Try to fetch the AAII page. A page that loads but yields no data counts as a
+        # failure too, so the breaker stops re-fetching a login wall every run.
+        with guarded('aaii'):
+            response = requests.get(AAII_URL, headers=headers, timeout=30)
 
-        if response.status_code == 200:
+            if response.status_code != 200:
+                raise RuntimeError(f"Failed to access AAII website: Status {response.status_code}")
             print("Successfully connected to AAII website")
 
             # Try to parse any publicly available data
@@ -48,17 +56,10 @@ def fetch_aaii_allocation_data():
 
             # Check if page requires login
             if 'login' in response.text.lower() or 'member' in response.text.lower():
-                print("AAII data appears to require member login")
-                print("Keeping existing data")
-            else:
-                # Try to find allocation data in page
-                # This would need to be customized based on actual page structure
-                print("Page accessible but data extraction needs customization")
-                print("Keeping existing data")
-
-        else:
-            print(f"Failed to access AAII website: Status {response.status_code}")
-            print("Keeping existing data")
+                raise RuntimeError("AAII data appears to require member login")
+            # Try to find allocation data in page
+            # This would need to be customized based on actual page structure
+            raise RuntimeError("Page accessible but data extraction needs customization")
 
     except Exception as e:
         print(f"Error fetching AAII data: {e}")
@@ -88,15 +89,15 @@ def fetch_aaii_allocation_data():
     return output
 
 def main():
+    if not should_fetch('aaii'):
+        return
+
     try:
         data = fetch_aaii_allocation_data()
 
-        # Ensure output directory exists
-        OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-
-        # Write JSON
-        with open(OUTPUT_PATH, 'w') as f:
-            json.dump(data, f, indent=2)
+        # Write JSON (atomic replace, creates the directory if needed)
+        write_json(OUTPUT_PATH, data, indent=2)
+        update_manifest('aaii', data)
 
         if data['data']:
             latest = data['data'][-1]
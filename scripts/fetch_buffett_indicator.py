@@ -4,29 +4,70 @@ Fetch Buffett Indicator data.
 
 Buffett Indicator = Total US Public Equity Market Cap / Nominal GDP × 100
 
-Data sources (tried in order, first success wins):
-  Wilshire 5000 Full Cap:
-    1. FRED WILL5000INDFC CSV (no API key, CORS-friendly)
-    2. Yahoo Finance ^W5000 via yfinance (fallback; history starts 1989)
+Data sources:
+  Wilshire 5000 Full Cap (hedged — see fetch_inputs_hedged):
+    1. FRED WILL5000INDFC CSV (no API key, CORS-friendly; preferred)
+    2. Yahoo Finance ^W5000 via yfinance (started if FRED is slow or fails; history starts 1989)
   GDP:
     FRED GDP CSV (Nominal, billions USD, SAAR, quarterly)
 
+The FRED series for this dataset (BUFFETT_FRED_SERIES) come from two
+fredgraph.csv requests started together: Wilshire alone, and the quarterly
+macro series in one request with a comma-separated id list.
+
+Besides the quarterly series ("data", one point per quarter-end), a daily
+series ("daily") divides every Wilshire close by GDP interpolated between
+quarterly prints, nowcast past the latest print, and is downsampled before
+publishing (see compute_daily / downsample_daily). Alternative trends (HP,
+LOESS, piecewise-linear, rolling; trends.py) are fitted in a process pool and
+published next to the headline log-linear trend (see compute_trends).
+
+The downloaded Wilshire and FRED frames are stored in data/raw/; the indicator
+is only recomputed when they changed (build_graph.py, node "buffett"). Every
+FRED, Yahoo and EDGAR response is archived; --reprocess [run-id] rebuilds from
+an archived run offline (archive.py).
+
 Berkshire Hathaway cash hoard is embedded in the output JSON so the browser
 never needs to make a live external API call for it.
 """
 
 import json
 import sys
+import threading
 import time
 import numpy as np
 import pandas as pd
 import requests
+from concurrent.futures import FIRST_COMPLETED, Future, wait
 from datetime import datetime
 from io import StringIO
 from pathlib import Path
 
-FRED_WILSHIRE_URL = 'https://fred.stlouisfed.org/graph/fredgraph.csv?id=WILL5000INDFC'
-FRED_GDP_URL      = 'https://fred.stlouisfed.org/graph/fredgraph.csv?id=GDP'
+from archive import ArchiveMiss, payload
+from build_graph import NODES, build, restore_raw, store_raw
+from common import read_json, write_json
+from health import Cancelled, guarded
+from manifest import update_manifest
+from percentiles import percentile_of, rank_rows
+from release_calendar import FORCE, should_fetch
+from trends import MODELS as TREND_MODELS, decimal_years, fit_all
+from vintages import record_frame
+
+FRED_CSV_URL = 'https://fred.stlouisfed.org/graph/fredgraph.csv'
+# Revised after release: every run's values are kept as vintages (vintages.py)
+VINTAGE_SERIES = ('gdp', 'corp_equities', 'real_gdp', 'gdp_deflator')
+
+# Declarative FRED inputs: column name -> FRED series id.
+# Wilshire is requested on its own (it races yfinance); the rest share one request.
+BUFFETT_FRED_SERIES = {
+    'wilshire':      'WILL5000INDFC',  # Wilshire 5000 Full Cap, index pts ≈ $B, daily
+    'gdp':           'GDP',            # Nominal GDP, $B SAAR, quarterly
+    'corp_equities': 'NCBEILQ027S',    # Nonfinancial corporate equities, market value ($M), quarterly (Z.1)
+    'real_gdp':      'GDPC1',          # Real GDP, chained 2017 $B SAAR, quarterly
+    'gdp_deflator':  'GDPDEF',         # GDP implicit price deflator, 2017=100, quarterly
+}
+WILSHIRE_SERIES = {'wilshire': BUFFETT_FRED_SERIES['wilshire']}
+MACRO_SERIES = {k: v for k, v in BUFFETT_FRED_SERIES.items() if k != 'wilshire'}
 EDGAR_CONCEPT_URL = (
     'https://data.sec.gov/api/xbrl/companyconcept/'
     'CIK0001067983/us-gaap/CashCashEquivalentsRestrictedCashAndRestrictedCashEquivalents.json'
@@ -83,29 +124,116 @@ BERKSHIRE_CASH_HISTORY = {
 FRED_TIMEOUT_S = 60
 FRED_RETRIES = 3
 FRED_BACKOFF_S = 5  # doubles each retry: 5s, 10s, 20s
+HEDGE_AFTER_S = 10  # launch yfinance if the FRED batch hasn't answered by then
+HEDGE_GRACE_S = 3   # if yfinance answers first, FRED still gets this long to catch up
+MACRO_WAIT_S = 15   # once Wilshire is settled, how much longer the macro request gets before stored inputs are used
 
+QUARTER_DAYS = 365.25 / 4
+GDP_ANCHOR_OFFSET_DAYS = 45  # FRED dates a quarter's GDP at its first day; anchor it mid-quarter
+GDP_NOWCAST_QUARTERS = 8     # prints used for the trend that extends GDP past the latest release
+DAILY_FULL_DAYS = 365        # published daily series: every day for the last year,
+DAILY_WEEKLY_YEARS = 5       # weekly back to 5 years, monthly before that
 
-def fetch_fred_csv(url, label):
-    print(f'  Fetching {label} from FRED...')
-    last_err = None
-    for attempt in range(1, FRED_RETRIES + 1):
-        try:
+
+_FRED_CACHE = {}  # FRED id -> single-column DataFrame, shared by every request this run
+
+
+def fred_url(series_ids):
+    return f'{FRED_CSV_URL}?id={",".join(series_ids)}'
+
+
+def parse_fredgraph_csv(text, series):
+    """Parse a (multi-id) fredgraph CSV into a wide date-indexed frame with our column names."""
+    df = pd.read_csv(StringIO(text))
+    df = df.rename(columns={df.columns[0]: 'date'})
+    df['date'] = pd.to_datetime(df['date'])
+    df = df.set_index('date').sort_index()
+    by_id = {sid: name for name, sid in series.items()}
+    missing = [sid for sid in by_id if sid not in df.columns]
+    if missing:
+        raise ValueError(f'FRED response missing series {missing}')
+    df = df[list(by_id)].rename(columns=by_id)
+    # FRED marks missing observations with '.'
+    return df.apply(pd.to_numeric, errors='coerce').dropna(how='all')
+
+
+def fetch_fred_series(series, label='FRED series', cancel=None):
+    """
+    Fetch several FRED series in one request.
+
+    `series` maps column name -> FRED id. Returns one wide DataFrame indexed by
+    date with a column per name (NaN where a series has no observation, e.g.
+    quarterly GDP on non-quarter dates). Series already fetched this run are
+    served from the cache; only the rest go over the wire, with retry/backoff.
+    Setting the optional `cancel` event stops the retry loop at its next attempt.
+    """
+    wanted = {name: sid for name, sid in series.items() if sid not in _FRED_CACHE}
+    if wanted:
+        url = fred_url(list(wanted.values()))
+        print(f'  Fetching {label} from FRED ({", ".join(wanted.values())})...')
+        last_err = None
+
+        def download():
             r = requests.get(url, headers=FRED_HEADERS, timeout=FRED_TIMEOUT_S)
             r.raise_for_status()
-            df = pd.read_csv(StringIO(r.text))
-            df.columns = ['date', 'value']
-            df['date'] = pd.to_datetime(df['date'])
-            df['value'] = pd.to_numeric(df['value'], errors='coerce')
-            df = df.dropna(subset=['value']).set_index('date').sort_index()
-            print(f'    {label}: {len(df)} obs  latest={df.index[-1].date()}  val={df["value"].iloc[-1]:,.1f}')
-            return df
-        except Exception as e:
-            last_err = e
-            if attempt < FRED_RETRIES:
-                wait = FRED_BACKOFF_S * (2 ** (attempt - 1))
-                print(f'    Attempt {attempt}/{FRED_RETRIES} failed ({e}); retrying in {wait}s...')
-                time.sleep(wait)
-    raise last_err
+            return r.content
+
+        # One breaker outcome per fetch (not per attempt), so a single bad run can't open it
+        with guarded('fred'):
+            for attempt in range(1, FRED_RETRIES + 1):
+                if cancel is not None and cancel.is_set():
+                    raise Cancelled(f'{label} fetch cancelled')
+                try:
+                    body = payload('buffett', f'fred:{",".join(wanted.values())}', download, url)
+                    wide = parse_fredgraph_csv(body.decode(), wanted)
+                    break
+                except ArchiveMiss:
+                    raise
+                except Exception as e:
+                    last_err = e
+                    if attempt < FRED_RETRIES:
+                        delay = FRED_BACKOFF_S * (2 ** (attempt - 1))
+                        print(f'    Attempt {attempt}/{FRED_RETRIES} failed ({e}); retrying in {delay}s...')
+                        if cancel is not None:
+                            cancel.wait(delay)
+                        else:
+                            time.sleep(delay)
+            else:
+                raise last_err
+        for name, sid in wanted.items():
+            col = wide[[name]].dropna()
+            _FRED_CACHE[sid] = col.rename(columns={name: sid})
+            if len(col):
+                print(f'    {sid}: {len(col)} obs  latest={col.index[-1].date()}  val={col[name].iloc[-1]:,.1f}')
+
+    frames = [_FRED_CACHE[sid].rename(columns={sid: name}) for name, sid in series.items()]
+    return pd.concat(frames, axis=1).sort_index()
+
+
+def fred_column(frame, name):
+    """Single FRED column as the legacy DataFrame(date index, 'value') shape."""
+    df = frame[[name]].dropna().rename(columns={name: 'value'})
+    if df.empty:
+        raise RuntimeError(f'FRED returned no observations for {name}')
+    return df
+
+
+def download_yfinance(ticker):
+    """Monthly closes of `ticker` from Yahoo Finance as CSV bytes (date,value); raises if it has none."""
+    try:
+        import yfinance as yf
+    except ImportError:
+        raise RuntimeError('yfinance not installed')
+    with guarded('yfinance'):
+        hist = yf.download(ticker, period='max', interval='1mo', auto_adjust=True, progress=False)
+        # yf.download reports failures as an empty frame rather than raising
+        if hist is None or hist.empty:
+            raise RuntimeError(f'yfinance returned no data for {ticker}')
+    df = hist[['Close']].copy()
+    df.columns = ['value']
+    df.index = pd.to_datetime(df.index).tz_localize(None)
+    df.index.name = 'date'
+    return df.to_csv().encode()
 
 
 def fetch_wilshire_yfinance():
@@ -114,19 +242,14 @@ def fetch_wilshire_yfinance():
     Yahoo's ticker changed from ^W5000 to ^FTW5000 after FTSE Russell took
     over calculation of the index; ^W5000 stopped updating in mid-2023.
     """
-    try:
-        import yfinance as yf
-    except ImportError:
-        raise RuntimeError('yfinance not installed')
     for ticker in ('^FTW5000', '^W5000'):
         print(f'  Fetching Wilshire 5000 via Yahoo Finance ({ticker})...')
-        hist = yf.download(ticker, period='max', interval='1mo', auto_adjust=True, progress=False)
-        if hist.empty:
-            print(f'    {ticker}: no data')
+        try:
+            body = payload('buffett', f'yfinance:{ticker}', lambda: download_yfinance(ticker))
+        except (ArchiveMiss, RuntimeError) as e:
+            print(f'    {ticker}: no data ({e})')
             continue
-        df = hist[['Close']].copy()
-        df.columns = ['value']
-        df.index = pd.to_datetime(df.index).tz_localize(None)
+        df = pd.read_csv(StringIO(body.decode()), index_col='date', parse_dates=['date'])
         df = df.dropna().sort_index()
         # Discontinued tickers return a single stale point instead of raising — skip those.
         if len(df) < 2:
@@ -137,17 +260,18 @@ def fetch_wilshire_yfinance():
     raise RuntimeError('yfinance returned no usable data for ^FTW5000 or ^W5000')
 
 
-def get_wilshire(existing_data=None):
+def get_wilshire(existing_data=None, fred=None):
     """
-    Try FRED first, then yfinance.
+    Use the FRED batch's Wilshire column if we have it, then yfinance.
     If yfinance only covers from 1989, splice with existing historical data.
     Returns DataFrame indexed by date with 'value' column.
     """
-    # 1. Try FRED
-    try:
-        return fetch_fred_csv(FRED_WILSHIRE_URL, 'Wilshire 5000 Full Cap')
-    except Exception as e:
-        print(f'  FRED WILL5000INDFC unavailable: {e}')
+    # 1. FRED (already fetched by the Wilshire request)
+    if fred is not None:
+        try:
+            return fred_column(fred, 'wilshire')
+        except Exception as e:
+            print(f'  FRED WILL5000INDFC unavailable: {e}')
 
     # 2. Try yfinance
     try:
@@ -173,6 +297,118 @@ def get_wilshire(existing_data=None):
         raise RuntimeError('All Wilshire data sources failed')
 
 
+def _fred_with_wilshire(job):
+    """(fred frame, wilshire) from a finished FRED batch job, or None if it has no Wilshire."""
+    try:
+        fred = job.result()
+        return fred, fred_column(fred, 'wilshire')
+    except Exception as e:
+        print(f'  FRED WILL5000INDFC unavailable: {e}')
+        return None
+
+
+def _start(fn, *args):
+    """
+    Run fn(*args) on a daemon thread and return its Future. Unlike a
+    ThreadPoolExecutor worker, an abandoned call (a FRED request blocked in its
+    60s read) is not joined at interpreter exit, so it cannot delay the run.
+    """
+    future = Future()
+
+    def run():
+        future.set_running_or_notify_cancel()
+        try:
+            future.set_result(fn(*args))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, daemon=True).start()
+    return future
+
+
+def _race_wilshire(fred_job, existing_data):
+    """(FRED Wilshire frame or None, wilshire DataFrame): the FRED request raced against yfinance."""
+    wait([fred_job], timeout=HEDGE_AFTER_S)
+    if fred_job.done():
+        result = _fred_with_wilshire(fred_job)
+        if result:
+            return result
+    else:
+        print(f'  FRED has not answered in {HEDGE_AFTER_S}s — hedging with yfinance')
+
+    yf_job = _start(get_wilshire, existing_data)
+    pending = {yf_job} if fred_job.done() else {fred_job, yf_job}
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        if fred_job in done:
+            result = _fred_with_wilshire(fred_job)
+            if result:
+                return result
+        if yf_job in done and yf_job.exception() is None:
+            if fred_job in pending:
+                wait([fred_job], timeout=HEDGE_GRACE_S)
+                if fred_job.done():
+                    result = _fred_with_wilshire(fred_job)
+                    if result:
+                        return result
+            print('  Using yfinance Wilshire')
+            return None, yf_job.result()
+    raise RuntimeError('All Wilshire data sources failed')
+
+
+def stored_macro_inputs():
+    """Macro columns of the last stored FRED inputs (data/raw/buffett_fred.csv), or None."""
+    path = NODES['buffett_fred'][0]
+    if not path.exists() and not restore_raw('buffett_fred'):
+        return None
+    frame = pd.read_csv(path, index_col=0, parse_dates=True)
+    if not set(MACRO_SERIES) <= set(frame.columns):
+        return None
+    return frame[list(MACRO_SERIES)].dropna(how='all')
+
+
+def _macro_inputs(macro_job):
+    """The macro request's frame, or the stored inputs if it failed or is still out after MACRO_WAIT_S."""
+    wait([macro_job], timeout=MACRO_WAIT_S)
+    if macro_job.done() and macro_job.exception() is None:
+        return macro_job.result()
+    reason = macro_job.exception() if macro_job.done() else f'no answer after a further {MACRO_WAIT_S}s'
+    print(f'  FRED macro inputs unavailable ({reason}) — using the last stored inputs')
+    stored = stored_macro_inputs()
+    if stored is None:
+        raise RuntimeError('FRED macro inputs unavailable and none stored')
+    return stored
+
+
+def fetch_inputs_hedged(existing_data=None):
+    """
+    Race FRED against yfinance for the Wilshire series.
+
+    Two FRED requests start together: Wilshire alone, and the macro series
+    (MACRO_SERIES). If the Wilshire request hasn't answered within
+    HEDGE_AFTER_S, or has already failed, yfinance is launched alongside it and
+    the first valid Wilshire series wins. FRED is preferred: if yfinance
+    answers first, FRED still gets HEDGE_GRACE_S. The macro request, in flight
+    since the start, then gets at most MACRO_WAIT_S more; if it failed or is
+    still out, the last stored macro inputs are used. No FRED request is
+    retried after the race, so the run is never slower than the faster source
+    plus those bounds. Every request runs on a daemon thread (_start), so a
+    losing one is abandoned rather than waited for at exit; its retry loop
+    stops at the next attempt and is not counted against the FRED breaker.
+    Returns (fred frame, wilshire DataFrame with 'value' column).
+    """
+    cancel = threading.Event()
+    fred_job = _start(fetch_fred_series, WILSHIRE_SERIES, 'Wilshire', cancel)
+    macro_job = _start(fetch_fred_series, MACRO_SERIES, 'macro inputs', cancel)
+    try:
+        fred_wilshire, wilshire = _race_wilshire(fred_job, existing_data)
+        macro = _macro_inputs(macro_job)
+        fred = macro if fred_wilshire is None else pd.concat([fred_wilshire, macro], axis=1).sort_index()
+        return fred, wilshire
+    finally:
+        cancel.set()
+
+
 def compute_indicator(wilshire_raw, gdp_raw):
     wilshire_q = wilshire_raw.resample('QE').last()
     gdp_q = gdp_raw.resample('QE').ffill()
@@ -201,37 +437,171 @@ def compute_indicator(wilshire_raw, gdp_raw):
     return df, coeffs, std_res
 
 
-def compute_current(df, wilshire_raw, gdp_raw, coeffs, std_res):
-    latest_wilshire = float(wilshire_raw['value'].iloc[-1])
-    latest_gdp      = float(gdp_raw['value'].iloc[-1])
-    current_ratio   = (latest_wilshire / latest_gdp) * 100.0
+def interpolate_gdp_daily(gdp_raw, days):
+    """
+    Nominal GDP at each of `days` (a DatetimeIndex).
+
+    Each quarterly print is anchored at the middle of its quarter and log GDP
+    is interpolated linearly between anchors. Past the last anchor, GDP is
+    extrapolated along the log-linear trend of the last GDP_NOWCAST_QUARTERS
+    prints (the nowcast). Returns (gdp, nowcast_mask) as numpy arrays.
+    """
+    gdp = gdp_raw['value']
+    anchors = (gdp.index + pd.Timedelta(days=GDP_ANCHOR_OFFSET_DAYS)).values.astype('datetime64[D]').astype(float)
+    log_gdp = np.log(gdp.values.astype(float))
+    x = days.values.astype('datetime64[D]').astype(float)
 
-    last_q  = df.index[-1]
-    today   = datetime.utcnow()
-    months  = (today.year - last_q.year) * 12 + (today.month - last_q.month)
-    t_cur   = float(len(df) - 1) + months / 3.0
-    log_tr  = float(np.polyval(coeffs, t_cur))
-    trend   = float(np.exp(log_tr))
-    std_devs = (np.log(current_ratio) - log_tr) / std_res
+    out = np.interp(x, anchors, log_gdp)
+    tail = min(GDP_NOWCAST_QUARTERS, len(anchors))
+    slope = np.polyfit(anchors[-tail:], log_gdp[-tail:], 1)[0] if tail > 1 else 0.0
+    nowcast = x > anchors[-1]
+    out[nowcast] = log_gdp[-1] + slope * (x[nowcast] - anchors[-1])
+    return np.exp(out), nowcast
+
+
+def quarter_t(days, quarter_ends):
+    """Fractional quarter index of each day on the quarterly fit's t axis (extrapolated at both ends)."""
+    x = days.values.astype('datetime64[D]').astype(float)
+    q = quarter_ends.values.astype('datetime64[D]').astype(float)
+    t = np.interp(x, q, np.arange(len(q), dtype=float))
+    t = np.where(x < q[0], (x - q[0]) / QUARTER_DAYS, t)
+    return np.where(x > q[-1], len(q) - 1 + (x - q[-1]) / QUARTER_DAYS, t)
+
+
+def compute_daily(wilshire_raw, gdp_raw, df, coeffs, std_res):
+    """
+    Daily Buffett Indicator: every Wilshire close ÷ interpolated/nowcast GDP,
+    with the quarterly log-linear trend and bands evaluated at daily t.
+    """
+    w = wilshire_raw['value'].dropna()
+    w = w[(w.index >= '1971-01-01') & (w > 0)]
+    gdp, nowcast = interpolate_gdp_daily(gdp_raw, w.index)
+    log_trend = np.polyval(coeffs, quarter_t(w.index, df.index))
+
+    return pd.DataFrame({
+        'wilshire':    w.values,
+        'gdp':         gdp,
+        'ratio_pct':   w.values / gdp * 100.0,
+        'trend_pct':   np.exp(log_trend),
+        'band_plus1':  np.exp(log_trend + std_res),
+        'band_plus2':  np.exp(log_trend + 2.0 * std_res),
+        'band_minus1': np.exp(log_trend - std_res),
+        'band_minus2': np.exp(log_trend - 2.0 * std_res),
+        'nowcast':     nowcast,
+    }, index=w.index)
+
+
+def downsample_daily(daily):
+    """
+    Thin the daily series for publishing: every day for the last
+    DAILY_FULL_DAYS, the last day of each week back to DAILY_WEEKLY_YEARS,
+    and the last day of each month before that.
+    """
+    end = daily.index[-1]
+    full_from = end - pd.Timedelta(days=DAILY_FULL_DAYS)
+    weekly_from = end - pd.DateOffset(years=DAILY_WEEKLY_YEARS)
+    old = daily[daily.index < weekly_from]
+    mid = daily[(daily.index >= weekly_from) & (daily.index < full_from)]
+    return pd.concat([
+        old.groupby(old.index.to_period('M')).tail(1),
+        mid.groupby(mid.index.to_period('W')).tail(1),
+        daily[daily.index >= full_from],
+    ])
+
+
+def compute_trends(df, daily):
+    """
+    Alternative trend models (trends.py), fitted to the quarterly log ratio in
+    parallel processes. Adds a trend_<model> column to `df` and `daily`;
+    returns {model: σ of its log residuals}.
+    """
+    fits = fit_all(decimal_years(df.index), np.log(df['ratio_pct'].values), decimal_years(daily.index))
+    for name, fit in fits.items():
+        df[f'trend_{name}'] = np.exp(fit['trend'])
+        daily[f'trend_{name}'] = np.exp(fit['at'])
+    return {name: fit['sigma'] for name, fit in fits.items()}
+
+
+def valuation_label(std_devs):
+    if std_devs > 2.0:    return 'STRONGLY OVERVALUED'
+    elif std_devs > 1.0:  return 'OVERVALUED'
+    elif std_devs > -1.0: return 'FAIR VALUE'
+    elif std_devs > -2.0: return 'UNDERVALUED'
+    else:                 return 'STRONGLY UNDERVALUED'
+
+
+def compute_current(daily, gdp_raw, std_res, trend_sigmas=None):
+    """Latest reading; with `trend_sigmas` (compute_trends), also its σ-deviation under each alternative trend."""
+    last = daily.iloc[-1]
+    current_ratio = float(last['ratio_pct'])
+    trend    = float(last['trend_pct'])
+    std_devs = (np.log(current_ratio) - np.log(trend)) / std_res
     dev_pct  = ((current_ratio - trend) / trend) * 100.0
+    valuation = valuation_label(std_devs)
 
-    if std_devs > 2.0:    valuation = 'STRONGLY OVERVALUED'
-    elif std_devs > 1.0:  valuation = 'OVERVALUED'
-    elif std_devs > -1.0: valuation = 'FAIR VALUE'
-    elif std_devs > -2.0: valuation = 'UNDERVALUED'
-    else:                 valuation = 'STRONGLY UNDERVALUED'
+    trends = {}
+    for name, sigma in (trend_sigmas or {}).items():
+        t = float(last[f'trend_{name}'])
+        if np.isnan(t):
+            continue
+        sd = (np.log(current_ratio) - np.log(t)) / sigma
+        trends[name] = {
+            'trend_pct':     round(t, 1),
+            'deviation_pct': round((current_ratio - t) / t * 100.0, 1),
+            'sigma':         round(sigma, 4),
+            'std_devs':      round(float(sd), 2),
+            'valuation':     valuation_label(sd),
+        }
 
     return {
         'ratio_pct':           round(current_ratio, 1),
-        'market_cap_billions': round(latest_wilshire, 0),
-        'gdp_billions':        round(latest_gdp, 0),
+        'market_cap_billions': round(float(last['wilshire']), 0),
+        'gdp_billions':        round(float(last['gdp']), 0),
+        'gdp_reported_billions': round(float(gdp_raw['value'].iloc[-1]), 0),
+        'gdp_nowcast':         bool(last['nowcast']),
         'trend_pct':           round(trend, 1),
         'deviation_pct':       round(dev_pct, 1),
         'std_devs':            round(float(std_devs), 2),
         'valuation':           valuation,
+        'as_of':               daily.index[-1].strftime('%Y-%m-%d'),
+        'gdp_date':            gdp_raw.index[-1].strftime('%Y-%m-%d'),
+        'trends':              trends,
     }
 
 
+def compute_variants(fred):
+    """Latest values of alternative Buffett ratios built from the extra FRED series."""
+    variants = {}
+    if fred is None:
+        return variants
+    q = fred.dropna(subset=['corp_equities', 'gdp']) if {'corp_equities', 'gdp'} <= set(fred.columns) else None
+    if q is not None and len(q):
+        last = q.iloc[-1]
+        variants['corporate_equities_to_gdp'] = {
+            'label': 'Nonfinancial corporate equities (Z.1) / Nominal GDP',
+            'date': q.index[-1].strftime('%Y-%m-%d'),
+            'ratio_pct': round(float(last['corp_equities'] / 1000.0 / last['gdp'] * 100.0), 1),
+        }
+    q = fred.dropna(subset=['real_gdp', 'gdp_deflator']) if {'real_gdp', 'gdp_deflator'} <= set(fred.columns) else None
+    w = fred['wilshire'].dropna() if 'wilshire' in fred.columns else None
+    if q is not None and len(q) and w is not None and len(w):
+        last = q.iloc[-1]
+        real_cap = float(w.iloc[-1]) / (float(last['gdp_deflator']) / 100.0)
+        variants['real_market_cap_to_real_gdp'] = {
+            'label': 'Wilshire 5000 deflated by GDP deflator / Real GDP',
+            'date': w.index[-1].strftime('%Y-%m-%d'),
+            'ratio_pct': round(real_cap / float(last['real_gdp']) * 100.0, 1),
+        }
+    return variants
+
+
+def download_edgar():
+    with guarded('sec_edgar'):
+        r = requests.get(EDGAR_CONCEPT_URL, headers=EDGAR_HEADERS, timeout=20)
+        r.raise_for_status()
+    return r.content
+
+
 def fetch_berkshire_edgar():
     """
     Query SEC EDGAR for recent Berkshire cash data (cross-check only).
@@ -240,9 +610,7 @@ def fetch_berkshire_edgar():
     """
     try:
         print('  Querying SEC EDGAR for Berkshire cash cross-check...')
-        r = requests.get(EDGAR_CONCEPT_URL, headers=EDGAR_HEADERS, timeout=20)
-        r.raise_for_status()
-        d = r.json()
+        d = json.loads(payload('buffett', 'edgar', download_edgar, EDGAR_CONCEPT_URL))
         usd = d.get('units', {}).get('USD', [])
         annual = [x for x in usd if x.get('form') == '10-K' and str(x.get('end', '')).endswith('-12-31')]
         deduped = {}
@@ -267,8 +635,8 @@ def build_berkshire_series(edgar_data):
     return [{'year': yr, 'cash': val} for yr, val in sorted(merged.items())]
 
 
-def build_output(df, current_info, berkshire_series):
-    records = [
+def _chart_records(frame):
+    return [
         {
             'date':        d.strftime('%Y-%m-%d'),
             'ratio_pct':   round(float(r['ratio_pct']), 2),
@@ -278,19 +646,48 @@ def build_output(df, current_info, berkshire_series):
             'band_minus1': round(float(r['band_minus1']), 2),
             'band_minus2': round(float(r['band_minus2']), 2),
         }
-        for d, r in df.iterrows()
+        for d, r in frame.iterrows()
     ]
+
+
+def _trend_sets(df, thin, trend_sigmas):
+    """Published alternative trends: label, σ and trend_pct per "data" / "daily" row."""
+    def values(frame, name):
+        return [None if np.isnan(v) else round(float(v), 2) for v in frame[f'trend_{name}']]
+    return {
+        name: {'label': TREND_MODELS[name], 'sigma': round(sigma, 4),
+               'data': values(df, name), 'daily': values(thin, name)}
+        for name, sigma in trend_sigmas.items()
+    }
+
+
+def build_output(df, daily, current_info, berkshire_series, variants=None, trend_sigmas=None):
+    nowcast_days = daily.index[daily['nowcast'].values]
+    thin = downsample_daily(daily)
     return {
         'last_updated': datetime.utcnow().isoformat() + 'Z',
         'source': 'FRED — Wilshire 5000 Full Cap (WILL5000INDFC) / Nominal GDP',
         'source_note': (
             'Wilshire 5000 Full Cap Index ÷ US Nominal GDP × 100. '
             'Index points ≈ total US public equity market cap in $B. '
-            'Bands = ±1σ / ±2σ from log-linear trend over full history.'
+            'Bands = ±1σ / ±2σ from log-linear trend over full history. '
+            'ratio_pct_pctile(_5y/_10y) = percentile rank of the quarterly ratio in its history '
+            '(all / trailing 5 or 10 years); current.ratio_pctile ranks today\'s ratio against all quarters. '
+            '"data" is quarterly; "daily" divides each Wilshire close by GDP interpolated '
+            'between quarterly prints (log-linear, anchored mid-quarter) and extended past the '
+            'latest print along its recent trend (nowcast from gdp_nowcast_from). '
+            'daily is thinned to weekly points beyond 1 year and monthly beyond 5 years. '
+            'trends: alternative trend models (HP filter, LOESS, piecewise-linear, trailing '
+            '20-year) with trend_pct aligned to the "data" and "daily" rows; their bands are '
+            'trend_pct × exp(±k·sigma). current.trends gives the σ-deviation under each.'
         ),
-        'source_urls': [FRED_WILSHIRE_URL, FRED_GDP_URL],
+        'source_urls': [fred_url(WILSHIRE_SERIES.values()), fred_url(MACRO_SERIES.values())],
         'current': current_info,
-        'data': records,
+        'variants': variants or {},
+        'data': rank_rows(_chart_records(df), 'ratio_pct'),
+        'daily': _chart_records(thin),
+        'trends': _trend_sets(df, thin, trend_sigmas or {}),
+        'gdp_nowcast_from': nowcast_days[0].strftime('%Y-%m-%d') if len(nowcast_days) else None,
         'berkshire_cash': {
             'source': 'Berkshire Hathaway Annual Reports (10-K)',
             'source_url': 'https://www.berkshirehathaway.com/reports.html',
@@ -300,12 +697,37 @@ def build_output(df, current_info, berkshire_series):
     }
 
 
+def build_buffett(inputs):
+    """Build recipe for the "buffett" node (build_graph.py): raw Wilshire + FRED frames → indicator JSON."""
+    wilshire_raw = pd.read_csv(inputs['wilshire'], index_col=0, parse_dates=True)
+    fred         = pd.read_csv(inputs['buffett_fred'], index_col=0, parse_dates=True)
+    gdp_raw      = fred_column(fred, 'gdp')
+
+    df, coeffs, std_res = compute_indicator(wilshire_raw, gdp_raw)
+    daily = compute_daily(wilshire_raw, gdp_raw, df, coeffs, std_res)
+    trend_sigmas = compute_trends(df, daily)
+    current_info = compute_current(daily, gdp_raw, std_res, trend_sigmas)
+    current_info['ratio_pctile'] = percentile_of(
+        sorted(df['ratio_pct'].round(1).tolist() + [current_info['ratio_pct']]), current_info['ratio_pct'])
+
+    edgar_data = fetch_berkshire_edgar()
+    berkshire_series = build_berkshire_series(edgar_data)
+
+    data = build_output(df, daily, current_info, berkshire_series, compute_variants(fred), trend_sigmas)
+    write_json(OUTPUT_PATH, data, indent=2)
+    update_manifest('buffett', data)
+    print(f'  Daily records:      {len(data["daily"])}  (from {len(daily)} days)')
+
+
 def check_staleness(data):
     d = datetime.strptime(data['data'][-1]['date'][:10], '%Y-%m-%d')
     return max((datetime.utcnow() - d).days - 30, 0)
 
 
 def main():
+    if not should_fetch('buffett'):
+        return
+
     fetch_succeeded = False
     data = None
     existing_data = None
@@ -320,26 +742,23 @@ def main():
 
     try:
         print('Fetching Buffett Indicator data...')
-        wilshire_raw = get_wilshire(existing_data)
-        gdp_raw      = fetch_fred_csv(FRED_GDP_URL, 'US Nominal GDP')
-
-        df, coeffs, std_res = compute_indicator(wilshire_raw, gdp_raw)
-        current_info = compute_current(df, wilshire_raw, gdp_raw, coeffs, std_res)
-
-        edgar_data = fetch_berkshire_edgar()
-        berkshire_series = build_berkshire_series(edgar_data)
-
-        data = build_output(df, current_info, berkshire_series)
+        fred, wilshire_raw = fetch_inputs_hedged(existing_data)
+        record_frame(fred, 'fred_', VINTAGE_SERIES)
+        store_raw('wilshire', wilshire_raw.to_csv())
+        store_raw('buffett_fred', fred.to_csv())
+
+        if build(['buffett'], force=FORCE)['buffett'] != 'rebuilt':
+            print('  Wilshire and FRED inputs unchanged — published indicator kept as is')
+        data = read_json(OUTPUT_PATH)
         fetch_succeeded = True
-
-        OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-        with open(OUTPUT_PATH, 'w') as f:
-            json.dump(data, f, indent=2)
+        current_info = data['current']
+        berkshire_series = data['berkshire_cash']['data']
 
         print(f'\nSuccess!')
         print(f'  Buffett Indicator:  {current_info["ratio_pct"]}%  ({current_info["valuation"]})')
         print(f'  Wilshire index:     {current_info["market_cap_billions"]:,.0f}')
-        print(f'  GDP ($B):           {current_info["gdp_billions"]:,.0f}')
+        print(f'  GDP ($B):           {current_info["gdp_billions"]:,.0f}'
+              f'{"  (nowcast)" if current_info.get("gdp_nowcast") else ""}')
         print(f'  Trend:              {current_info["trend_pct"]}%')
         print(f'  Deviation:          {current_info["deviation_pct"]:+.1f}%  ({current_info["std_devs"]:+.2f}σ)')
         print(f'  Quarterly records:  {len(data["data"])}')
@@ -365,8 +784,8 @@ def main():
                 'data': berkshire_series,
             }
             data = existing_data
-            with open(OUTPUT_PATH, 'w') as f:
-                json.dump(data, f, indent=2)
+            write_json(OUTPUT_PATH, data, indent=2)
+            update_manifest('buffett', data)
             print('  Updated existing JSON with Berkshire cash data.')
         else:
             print('No existing data file found.')
@@ -1,87 +1,253 @@
 #!/usr/bin/env python3
 """
 Fetch CBOE Put/Call Ratio data and convert to JSON for the dashboard.
-CBOE provides equity put/call ratio data at: https://www.cboe.com/us/options/market_statistics/
+
+Sources:
+  Archive CSVs (daily equity / index / total ratios through Oct 2019), read once on backfill:
+    https://cdn.cboe.com/resources/options/volume_and_call_put_ratios/{equitypc,indexpc,totalpc}.csv
+  Daily market statistics (one JSON per trading day, used for everything after the archive):
+    https://cdn.cboe.com/data/us/options/market_statistics/daily/<YYYY-MM-DD>_daily_options
+
+Raw daily ratios are kept in an append-only log (data/series/put_call.ndjson, see
+series_log.py). Each run fetches only the NYSE trading days after the last stored
+date. Moving averages (5/10/20 days) and 1-year rolling percentile ranks are then
+recomputed for the whole series in one vectorized pass.
+
+Every downloaded CSV and daily JSON is archived (archive.py).
+
+  python scripts/fetch_cboe_putcall.py --backfill   # rebuild the log from the CBOE archive CSVs
+  python scripts/fetch_cboe_putcall.py --reprocess  # replay the latest archived run offline
+Output: public/put_call_data.json
 """
 
 import json
+import sys
 import pandas as pd
 import requests
-from datetime import datetime
-from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
 from io import StringIO
+from pathlib import Path
+
+from archive import REPROCESS, payload, replay
+from common import write_json
+from delta import write_delta
+from health import guarded
+from manifest import update_manifest
+from release_calendar import is_business_day, nyse_holidays, should_fetch
+from series_log import SeriesLog
 
-# CBOE data endpoints
-CBOE_DATA_URL = "https://cdn.cboe.com/api/global/us_indices/daily_prices/VIX_History.csv"
-CBOE_PC_RATIO_URL = "https://cdn.cboe.com/resources/us_indices/dashboard/data.json"
+ARCHIVE_URLS = {
+    "equity": "https://cdn.cboe.com/resources/options/volume_and_call_put_ratios/equitypc.csv",
+    "index":  "https://cdn.cboe.com/resources/options/volume_and_call_put_ratios/indexpc.csv",
+    "total":  "https://cdn.cboe.com/resources/options/volume_and_call_put_ratios/totalpc.csv",
+}
+DAILY_URL = "https://cdn.cboe.com/data/us/options/market_statistics/daily/{day}_daily_options"
+# ratio kind -> name in the daily statistics "ratios" list
+RATIO_NAMES = {
+    "equity": "EQUITY PUT/CALL RATIO",
+    "index":  "INDEX PUT/CALL RATIO",
+    "total":  "TOTAL PUT/CALL RATIO",
+}
 OUTPUT_PATH = Path(__file__).parent.parent / "public" / "put_call_data.json"
 
-def fetch_cboe_putcall_data():
-    """Fetch CBOE Put/Call ratio data."""
-    print(f"Fetching CBOE Put/Call data...")
+MA_WINDOWS = (5, 10, 20)
+PCTILE_WINDOW = 252      # ~1 trading year
+PCTILE_MIN_PERIODS = 60
+DAILY_MAX_WORKERS = 8    # concurrent daily files during a backfill
 
-    # Try to load existing data first
-    existing_data = []
-    if OUTPUT_PATH.exists():
-        with open(OUTPUT_PATH, 'r') as f:
-            existing_json = json.load(f)
-            existing_data = existing_json.get('data', [])
-            print(f"Loaded {len(existing_data)} existing records")
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+}
 
-    # Try multiple sources for Put/Call ratio data
-    # Unfortunately, CBOE doesn't provide a simple public API for historical Put/Call ratios
-    # The data typically requires scraping or paid data services
 
-    # For now, we'll try to fetch from the CBOE data portal API
-    try:
-        # This endpoint may require authentication or may not be available
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
+def trading_days(after: date, through: date) -> list:
+    """NYSE trading days in (after, through]."""
+    days = []
+    d = after + timedelta(days=1)
+    while d <= through:
+        if is_business_day(d, nyse_holidays):
+            days.append(d)
+        d += timedelta(days=1)
+    return days
+
+
+def parse_archive_csv(text: str) -> pd.Series:
+    """Parse one archive CSV (disclaimer lines, then a DATE,...,P/C Ratio table) into a date-indexed Series."""
+    lines = text.splitlines()
+    start = next(i for i, line in enumerate(lines) if line.strip().upper().startswith("DATE"))
+    df = pd.read_csv(StringIO("\n".join(lines[start:])))
+    df.columns = [c.strip().upper() for c in df.columns]
+    ratio_col = next(c for c in df.columns if "P/C" in c or "RATIO" in c)
+    dates = pd.to_datetime(df["DATE"], format="%m/%d/%Y", errors="coerce")
+    s = pd.Series(pd.to_numeric(df[ratio_col], errors="coerce").values, index=dates.dt.strftime("%Y-%m-%d"))
+    return s[dates.notna().values].dropna()
+
+
+def fetch_archive() -> pd.DataFrame:
+    """Archive ratios as one frame: index = date string, columns = equity / index / total."""
+    series = {}
+    for kind, url in ARCHIVE_URLS.items():
+        print(f"  Fetching archive: {url}")
+        with guarded("cboe_archive"):
+            body = payload("put_call", f"archive:{kind}", lambda: _get(url, timeout=60), url)
+            series[kind] = parse_archive_csv(body.decode())
+        s = series[kind]
+        print(f"    {kind}: {len(s)} days ({s.index.min()} → {s.index.max()})")
+    return pd.DataFrame(series).sort_index()
+
+
+def _get(url: str, timeout: int, missing=()) -> bytes:
+    """Response body, or None for a status in `missing`."""
+    r = requests.get(url, headers=HEADERS, timeout=timeout)
+    if r.status_code in missing:
+        return None
+    r.raise_for_status()
+    return r.content
+
+
+def fetch_daily(day: date) -> dict:
+    """
+    Ratios for one trading day, or None if CBOE hasn't published that day or
+    its file has no usable ratios. A failed download raises.
+    """
+    url = DAILY_URL.format(day=day.isoformat())
+    with guarded("cboe_daily"):
+        body = payload("put_call", f"daily:{day.isoformat()}", lambda: _get(url, timeout=30, missing=(403, 404)), url)
+    if body is None:
+        return None
+    return parse_body(day.isoformat(), body)
 
-        # Try the CBOE market statistics page
-        response = requests.get(
-            "https://www.cboe.com/us/options/market_statistics/daily/",
-            headers=headers,
-            timeout=30
-        )
 
-        if response.status_code == 200:
-            print("Successfully connected to CBOE market statistics page")
-            # The actual scraping would require parsing HTML/JavaScript
-            # This is a placeholder that keeps existing data
-            print("CBOE Put/Call data requires manual update or paid data feed")
-            print("Keeping existing data")
+def replay_days() -> list:
+    """--reprocess: rows of every daily file the archived run fetched."""
+    rows = [parse_body(key.partition(":")[2], body) for key, body in replay("put_call").items("daily:")]
+    return [row for row in rows if row]
 
+
+def parse_daily(day: str, stats: dict) -> dict:
+    """Row of ratios from one day's market statistics JSON."""
+    by_name = {str(item.get("name", "")).strip().upper(): item.get("value") for item in stats.get("ratios", [])}
+    row = {"date": day}
+    for kind, name in RATIO_NAMES.items():
+        try:
+            row[kind] = round(float(by_name[name]), 2)
+        except (KeyError, TypeError, ValueError):
+            row[kind] = None
+    if row["equity"] is None and row["total"] is None:
+        raise ValueError(f"No put/call ratios in CBOE daily statistics for {day}")
+    return row
+
+
+def parse_body(day: str, body: bytes) -> dict:
+    """parse_daily of a raw daily file, or None (logged) if it is malformed or has no ratios."""
+    try:
+        return parse_daily(day, json.loads(body))
+    except (ValueError, AttributeError) as e:
+        print(f"    {day}: {e} — skipped")
+        return None
+
+
+def _attempt(day: date) -> tuple:
+    """(row or None, exception or None) for one day, so one failure doesn't cancel the pool."""
+    try:
+        return fetch_daily(day), None
     except Exception as e:
-        print(f"Error fetching CBOE data: {e}")
-        print("Keeping existing data")
+        return None, e
+
 
-    # Return existing data with updated timestamp
-    output = {
-        'last_updated': datetime.utcnow().isoformat() + 'Z',
-        'source': 'CBOE Equity Put/Call Ratio',
-        'source_url': 'https://www.cboe.com/tradable_products/sp_500/put-call_ratio/',
-        'data': existing_data,
-        'note': 'CBOE Put/Call ratio data requires manual updates or paid data feed access'
-    }
+def fetch_days(days: list) -> list:
+    """
+    Fetch daily files concurrently. Days CBOE hasn't published, or whose file
+    has no ratios, are skipped. A day that failed to download (network error,
+    5xx, open breaker) ends the result there: later days are dropped so the log
+    never moves past a hole, and the next run retries from that day.
+    """
+    if not days:
+        return []
+    print(f"  Fetching {len(days)} trading day(s) {days[0]} → {days[-1]}")
+    with ThreadPoolExecutor(max_workers=min(DAILY_MAX_WORKERS, len(days))) as pool:
+        results = list(pool.map(_attempt, days))
+    rows = []
+    for i, (day, (row, error)) in enumerate(zip(days, results)):
+        if error is not None:
+            print(f"    {day}: {type(error).__name__}: {error} — stopping; "
+                  f"{len(days) - i} day(s) left for the next run")
+            break
+        if row:
+            rows.append(row)
+    skipped = sum(1 for row, error in results[:i + 1] if row is None and error is None)
+    if skipped:
+        print(f"    {skipped} day(s) not published (yet) or without ratios")
+    return rows
+
+
+def fetch_history() -> list:
+    """Full history: archive CSVs, then daily files from the day after the archive ends."""
+    archive = fetch_archive()
+    rows = [
+        {"date": d, **{k: (None if pd.isna(v) else round(float(v), 2)) for k, v in vals.items()}}
+        for d, vals in archive.to_dict("index").items()
+    ]
+    if REPROCESS:
+        return rows + replay_days()
+    last = datetime.strptime(archive.index.max(), "%Y-%m-%d").date()
+    return rows + fetch_days(trading_days(last, date.today()))
+
+
+def compute_indicators(rows: list) -> list:
+    """Add moving averages and rolling percentile ranks to every row (vectorized over the full series)."""
+    df = pd.DataFrame(rows).set_index("date")
+    out = pd.DataFrame(index=df.index)
+    out["ratio"] = df["equity"].astype(float)
+    for kind in RATIO_NAMES:
+        s = df[kind].astype(float)
+        out[kind] = s
+        for w in MA_WINDOWS:
+            out[f"{kind}_ma{w}"] = s.rolling(w, min_periods=w).mean().round(3)
+        out[f"{kind}_pctile"] = (s.rolling(PCTILE_WINDOW, min_periods=PCTILE_MIN_PERIODS)
+                                 .rank(pct=True) * 100).round(1)
+    out = out.astype(object).where(out.notna(), None)
+    return [{"date": d, **vals} for d, vals in out.to_dict("index").items()]
 
-    return output
 
 def main():
+    # Reprocessing a backfill run (it read the archive CSVs) rebuilds the log
+    backfill = "--backfill" in sys.argv or bool(REPROCESS and "archive:equity" in replay("put_call"))
+    if not backfill and not should_fetch("put_call"):
+        return
+
+    print("Fetching CBOE Put/Call data...")
+    log = SeriesLog("put_call")
+
     try:
-        data = fetch_cboe_putcall_data()
+        if backfill or not log.exists():
+            rows = fetch_history()
+            if not rows:
+                raise RuntimeError("CBOE archive returned no rows")
+            log.rewrite(rows)
+            print(f"Backfilled {len(rows)} days into {log.path.name}")
+        else:
+            last = datetime.strptime(log.last_key(), "%Y-%m-%d").date()
+            new = replay_days() if REPROCESS else fetch_days(trading_days(last, date.today()))
+            print(f"Appended {log.append(new)} new trading day(s)")
 
-        # Ensure output directory exists
-        OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "last_updated": datetime.utcnow().isoformat() + "Z",
+            "source": "CBOE Equity Put/Call Ratio",
+            "source_url": "https://www.cboe.com/us/options/market_statistics/daily/",
+            "note": (f"ratio = equity put/call. *_ma{{n}} = n-day moving average; "
+                     f"*_pctile = percentile rank within the trailing {PCTILE_WINDOW} trading days."),
+            "data": compute_indicators(list(log.iter_rows())),
+        }
 
-        # Write JSON
-        with open(OUTPUT_PATH, 'w') as f:
-            json.dump(data, f, indent=2)
+        write_json(OUTPUT_PATH, data, separators=(",", ":"))
+        write_delta('put_call', data)
+        update_manifest('put_call', data)
 
-        if data['data']:
-            latest = data['data'][-1]
-            print(f"Latest data: {latest['date']} - Ratio: {latest['ratio']}")
+        latest = data['data'][-1]
+        print(f"Latest data: {latest['date']} - Ratio: {latest['ratio']} "
+              f"(5d MA {latest['equity_ma5']}, 1y pctile {latest['equity_pctile']})")
         print(f"Total records: {len(data['data'])}")
         print(f"Output: {OUTPUT_PATH}")
 
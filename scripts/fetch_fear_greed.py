@@ -2,14 +2,31 @@
 """
 Fetch Fear & Greed Index directly from CNN's API.
 Merges with the whit3rabbit archive (2011-present) for older history.
-Output: public/fear_greed_index.json
+
+History is kept in an append-only log (data/series/fear_greed.ndjson, see
+series_log.py). Each run appends CNN points from the last stored date on;
+the archive is only downloaded on --backfill (or when there is neither a log
+nor a published file to seed it from). Both responses are archived;
+--reprocess [run-id] replays an archived run offline, redoing the archive +
+CNN merge if that run downloaded the archive (archive.py).
+Output: public/fear_greed_index.json (streamed from the log)
 """
 
 import json
+import os
 import sys
 import requests
 from datetime import datetime, timezone
 
+from archive import REPROCESS, payload, replay
+from delta import write_delta
+from health import guarded
+from manifest import update_manifest
+from percentiles import rank_log, rank_new_rows
+from pyramid import write_levels
+from release_calendar import should_fetch
+from series_log import SeriesLog
+
 OUTPUT_FILE = "public/fear_greed_index.json"
 
 CNN_API = "https://production.dataviz.cnn.io/index/fearandgreed/graphdata"
@@ -33,18 +50,29 @@ COMPONENT_MAP = {
 }
 
 
+def download_cnn():
+    with guarded("cnn_fear_greed"):
+        r = requests.get(CNN_API, headers=HEADERS, timeout=30)
+        r.raise_for_status()
+        return r.content
+
+
+def download_archive():
+    with guarded("fear_greed_archive"):
+        r = requests.get(ARCHIVE_URL, timeout=30)
+        r.raise_for_status()
+        return r.content
+
+
 def fetch_cnn():
-    r = requests.get(CNN_API, headers=HEADERS, timeout=30)
-    r.raise_for_status()
-    return r.json()
+    return json.loads(payload("fear_greed", "cnn", download_cnn, CNN_API))
 
 
 def fetch_archive():
     """Historical CNN values from whit3rabbit's archive (2011-present)."""
-    r = requests.get(ARCHIVE_URL, timeout=30)
-    r.raise_for_status()
+    text = payload("fear_greed", "archive", download_archive, ARCHIVE_URL).decode()
     records = {}
-    for line in r.text.strip().splitlines()[1:]:
+    for line in text.strip().splitlines()[1:]:
         parts = line.strip().split(",")
         if len(parts) >= 2:
             try:
@@ -55,6 +83,11 @@ def fetch_archive():
 
 
 def main():
+    # Reprocessing a backfill run redoes the archive + CNN merge from its payloads
+    backfill = "--backfill" in sys.argv or bool(REPROCESS and "archive" in replay("fear_greed"))
+    if not backfill and not should_fetch("fear_greed"):
+        return
+
     print("Fetching CNN Fear & Greed Index...")
 
     # 1. Fetch from CNN API
@@ -80,23 +113,35 @@ def main():
           f"({min(cnn_historical) if cnn_historical else '?'} → "
           f"{max(cnn_historical) if cnn_historical else '?'})")
 
-    # 2. Fetch archive for older history
-    archive = {}
-    try:
-        archive = fetch_archive()
-        print(f"  Archive:        {len(archive)} points "
-              f"({min(archive) if archive else '?'} → {max(archive) if archive else '?'})")
-    except Exception as e:
-        print(f"  Archive fetch failed: {e}")
-
-    # 3. Merge: archive (2011+) → CNN API (most recent ~1yr, most authoritative)
-    # No fallback to old reconstructed data — only real CNN-published values.
-    merged = {**archive, **cnn_historical}
-    historical = [
-        {"date": date, "value": val}
-        for date, val in sorted(merged.items())
-    ]
-    print(f"  Total historical: {len(historical)} points")
+    # 2. Make sure the log holds the older history
+    log = SeriesLog("fear_greed")
+    if backfill or not log.exists():
+        if not backfill and os.path.exists(OUTPUT_FILE):
+            with open(OUTPUT_FILE) as f:
+                seeded = log.rewrite(json.load(f).get("historical", []))
+            print(f"  Seeded {log.path.name} with {seeded} points from {OUTPUT_FILE}")
+        else:
+            archive = {}
+            try:
+                archive = fetch_archive()
+                print(f"  Archive:        {len(archive)} points "
+                      f"({min(archive) if archive else '?'} → {max(archive) if archive else '?'})")
+            except Exception as e:
+                print(f"  Archive fetch failed: {e}")
+            # Merge: archive (2011+) → CNN API (most recent ~1yr, most authoritative)
+            # No fallback to old reconstructed data — only real CNN-published values.
+            merged = {**archive, **cnn_historical}
+            log.rewrite({"date": date, "value": val} for date, val in sorted(merged.items()))
+            cnn_historical = {}
+
+    # 3. Append CNN points from the last stored date on (that day's value may have moved since)
+    ranks = rank_log(log, "value")
+    last_date = log.last_key() or ""
+    new_points = rank_new_rows(ranks, [{"date": date, "value": val}
+                                       for date, val in sorted(cnn_historical.items()) if date >= last_date])
+    print(f"  Appended {log.append(new_points)} new/revised point(s); "
+          f"total historical: {log.index()['rows']} points")
+    ranks.save()
 
     # 4. Extract current component scores
     components = {}
@@ -115,8 +160,9 @@ def main():
         except (TypeError, ValueError):
             return default
 
-    output = {
+    meta = {
         "last_updated": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "note": "value_pctile(_5y/_10y) = percentile rank of the score in its history (all / trailing 5 or 10 years).",
         "current": {
             "score":            _f("score"),
             "rating":           fg_current.get("rating", ""),
@@ -127,11 +173,13 @@ def main():
             "previous_1_year":  _f("previous_1_year"),
             "components":       components,
         },
-        "historical": historical,
     }
 
-    with open(OUTPUT_FILE, "w") as f:
-        json.dump(output, f, separators=(",", ":"))
+    log.publish(OUTPUT_FILE, meta, "historical")
+    output = {**meta, "historical": log.rows()}
+    write_delta("fear_greed", output)
+    write_levels("fear_greed", output)
+    update_manifest("fear_greed", output)
 
     print(f"  Saved → {OUTPUT_FILE}")
     print(f"  Current: {output['current']['score']} ({output['current']['rating']})")
@@ -3,23 +3,46 @@
 Fetch FINRA margin statistics and convert to JSON for the dashboard.
 FINRA publishes data at: https://www.finra.org/investors/learn-to-invest/advanced-investing/margin-statistics
 Excel download: https://www.finra.org/sites/default/files/2021-03/margin-statistics.xlsx
+
+Debit balances are stored in data/raw/finra_debits.csv; YoY growth is only
+recomputed when they changed (build_graph.py, node "margin"). The downloaded
+workbook is archived; --reprocess [run-id] re-parses an archived one offline
+(archive.py).
 """
 
 import json
 import sys
 import pandas as pd
 import requests
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
 from io import BytesIO
 from pathlib import Path
 from bs4 import BeautifulSoup
 
+from archive import REPROCESS, replay, store
+from build_graph import build, store_raw
+from common import STATE_DIR, read_json, write_json
+from delta import write_delta
+from health import guarded
+from manifest import update_manifest
+from percentiles import rank_rows
+from release_calendar import FORCE, should_fetch
+from vintages import record
+
 # Primary page for investor-facing margin statistics
 FINRA_LANDING_URL = "https://www.finra.org/investors/learn-to-invest/advanced-investing/margin-statistics"
 # Known working Excel URL (contains all historical data through the latest published month)
 FINRA_EXCEL_URL = "https://www.finra.org/sites/default/files/2021-03/margin-statistics.xlsx"
 OUTPUT_PATH = Path(__file__).parent.parent / "public" / "margin_data.json"
 STALE_THRESHOLD_DAYS = 65  # FINRA publishes monthly data with ~4-8 week lag
+# Candidate probing: cheap ranged GETs run in parallel, only the winner is downloaded
+PROBE_MAX_WORKERS = 6
+PROBE_TIMEOUT_S = 15
+MIN_SPREADSHEET_BYTES = 1000
+XLSX_MAGIC = b'PK\x03\x04'  # .xlsx files are zip archives
+# Last URL that produced a valid file — probed first on the next run
+SOURCE_STATE_PATH = STATE_DIR / 'finra_source.json'
 
 
 def make_session():
@@ -44,8 +67,9 @@ def discover_finra_urls():
     print(f"Discovering download URLs from {FINRA_LANDING_URL}")
     try:
         session = make_session()
-        response = session.get(FINRA_LANDING_URL, timeout=30)
-        response.raise_for_status()
+        with guarded('finra_landing'):
+            response = session.get(FINRA_LANDING_URL, timeout=30)
+            response.raise_for_status()
         soup = BeautifulSoup(response.text, 'html.parser')
 
         urls = []
@@ -107,12 +131,100 @@ def try_fetch_excel(url):
         raise ValueError("Response is HTML, not Excel")
     if len(response.content) < 1000:
         raise ValueError("Response too small to be a valid spreadsheet")
-    df = pd.read_excel(BytesIO(response.content), engine='openpyxl')
+    df = read_finra_excel(response.content)
+    store('margin', 'margin-statistics.xlsx', response.content, url)
+    return df
+
+
+def read_finra_excel(body):
+    """Parse the margin statistics workbook (raw .xlsx bytes)."""
+    df = pd.read_excel(BytesIO(body), engine='openpyxl')
     if len(df) < 10:
         raise ValueError(f"Too few rows ({len(df)}), likely not valid data")
     return df
 
 
+def probe_candidate(url):
+    """Check that a URL serves an .xlsx without downloading it.
+
+    Requests the first few bytes only (servers that ignore Range still send
+    headers first and the stream is closed after 4 bytes). Returns the
+    advertised size in bytes, or None if the server did not say.
+    """
+    session = make_session()
+    with session.get(url, headers={'Range': 'bytes=0-3'}, stream=True, timeout=PROBE_TIMEOUT_S) as response:
+        response.raise_for_status()
+        content_type = response.headers.get('content-type', '').lower()
+        if 'html' in content_type and 'spreadsheet' not in content_type:
+            raise ValueError("Response is HTML, not Excel")
+        total = response.headers.get('content-range', '').rpartition('/')[2] or response.headers.get('content-length', '')
+        size = int(total) if total.isdigit() else None
+        if size is not None and size < MIN_SPREADSHEET_BYTES:
+            raise ValueError("Response too small to be a valid spreadsheet")
+        head = next(response.iter_content(len(XLSX_MAGIC)), b'')
+        if not head.startswith(XLSX_MAGIC):
+            raise ValueError("Response is not an .xlsx file")
+    return size
+
+
+def download_first_qualifying():
+    """Probe all candidate URLs concurrently and download the first that qualifies.
+
+    The remembered URL and FINRA_EXCEL_URL are probed straight away while the
+    landing page is scraped in parallel; discovered links join as soon as
+    discovery returns. The first probe that passes is downloaded and parsed;
+    if that fails the next passing probe is tried. Probes still queued when a
+    download succeeds are cancelled. Returns (url, DataFrame).
+    """
+    remembered = read_json(SOURCE_STATE_PATH, {}).get('url')
+    pool = ThreadPoolExecutor(max_workers=PROBE_MAX_WORKERS)
+    probes = {}  # future -> url
+    last_error = None
+
+    def submit(urls):
+        for url in urls:
+            if url and url not in probes.values():
+                probes[pool.submit(probe_candidate, url)] = url
+
+    try:
+        discovery = pool.submit(discover_finra_urls)
+        submit([remembered, FINRA_EXCEL_URL])
+        pending = {discovery, *probes}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future is discovery:
+                    before = set(probes)
+                    submit(future.result())
+                    pending |= set(probes) - before
+                    print(f"Probing {len(probes)} candidate URL(s)...")
+                    continue
+
+                url = probes[future]
+                try:
+                    size = future.result()
+                    print(f"  Probe ok ({f'{size:,} bytes' if size else 'size unknown'}): {url}")
+                    df = try_fetch_excel(url)
+                except Exception as e:
+                    last_error = e
+                    print(f"  Failed: {url}: {e}")
+                    continue
+                print(f"  Success: {url}")
+                return url, df
+    finally:
+        # Don't wait on probes still in flight — they are bounded by PROBE_TIMEOUT_S
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    raise RuntimeError(f"All {len(probes)} URL(s) failed. Last error: {last_error}")
+
+
+def remember_source(url):
+    write_json(SOURCE_STATE_PATH, {
+        'url': url,
+        'last_success': datetime.utcnow().isoformat() + 'Z',
+    }, indent=2)
+
+
 def normalize_date(date_val):
     """Normalize date values to YYYY-MM format string."""
     s = str(date_val).strip()
@@ -128,38 +240,12 @@ def normalize_date(date_val):
     return s
 
 
-def fetch_finra_data():
-    """Download and parse FINRA margin statistics Excel file."""
-    # Strategy: try discovered URLs first, then the known-working Excel URL
-    discovered = discover_finra_urls()
-
-    # Build candidate list: discovered first, then known-working Excel URL
-    # Removed dead CSV URL (https://www.finra.org/sites/default/files/Industry_Margin_Statistics.csv)
-    candidate_urls = discovered + [FINRA_EXCEL_URL]
-
-    # Deduplicate while preserving order
-    seen = set()
-    unique_urls = []
-    for url in candidate_urls:
-        if url not in seen:
-            seen.add(url)
-            unique_urls.append(url)
-
-    print(f"Trying {len(unique_urls)} candidate URL(s)...")
-    last_error = None
-    df = None
-
-    for url in unique_urls:
-        try:
-            df = try_fetch_excel(url)
-            print(f"  Success: {url}")
-            break
-        except Exception as e:
-            last_error = e
-            print(f"  Failed: {e}")
-
-    if df is None:
-        raise RuntimeError(f"All {len(unique_urls)} URL(s) failed. Last error: {last_error}")
+def fetch_finra_debits():
+    """Download and parse the FINRA margin statistics Excel file into (date, margin_debt) rows."""
+    if REPROCESS:
+        url, df = None, read_finra_excel(replay('margin').get('margin-statistics.xlsx'))
+    else:
+        url, df = download_first_qualifying()
 
     # Clean column names
     df.columns = df.columns.str.strip()
@@ -176,22 +262,32 @@ def fetch_finra_data():
     # Sort by date ascending (YYYY-MM string sort is chronologically correct)
     df = df.sort_values('_date_norm').reset_index(drop=True)
 
-    # Calculate YoY growth
     df['margin_debt'] = pd.to_numeric(df[debit_col], errors='coerce')
     df = df[df['margin_debt'].notna()].reset_index(drop=True)
+    if df.empty:
+        raise RuntimeError("Parsed data but got zero valid records")
+    if url:
+        remember_source(url)
+    return df[['_date_norm', 'margin_debt']].rename(columns={'_date_norm': 'date'})
+
+
+def build_margin(inputs):
+    """Build recipe for the "margin" node (build_graph.py): raw debit balances → YoY growth JSON."""
+    df = pd.read_csv(inputs['finra_debits'], dtype={'date': str})
+
+    # Calculate YoY growth
     df['yoy_growth'] = df['margin_debt'].pct_change(periods=12) * 100
 
     # Prepare output records
     records = []
     for _, row in df.iterrows():
         records.append({
-            'date': row['_date_norm'],
+            'date': row['date'],
             'margin_debt': int(row['margin_debt']),
             'yoy_growth': round(float(row['yoy_growth']), 1) if pd.notna(row['yoy_growth']) else None
         })
 
-    if not records:
-        raise RuntimeError("Parsed data but got zero valid records")
+    records = rank_rows(records, 'yoy_growth')
 
     latest = records[-1]
     print(f"  Latest data point: {latest['date']} — ${latest['margin_debt']:,}M (YoY: {latest['yoy_growth']}%)")
@@ -200,10 +296,13 @@ def fetch_finra_data():
         'last_updated': datetime.utcnow().isoformat() + 'Z',
         'source': 'FINRA Margin Statistics',
         'source_url': FINRA_LANDING_URL,
+        'note': 'yoy_growth_pctile(_5y/_10y) = percentile rank of YoY growth in its history (all / trailing 5 or 10 years).',
         'data': records
     }
 
-    return output
+    write_json(OUTPUT_PATH, output, indent=2)
+    write_delta('margin', output)
+    update_manifest('margin', output)
 
 
 def check_staleness(data):
@@ -219,17 +318,21 @@ def check_staleness(data):
 
 
 def main():
+    if not should_fetch('margin'):
+        return
+
     fetch_succeeded = False
     data = None
 
     try:
-        data = fetch_finra_data()
+        debits = fetch_finra_debits()
+        record('finra_debits', dict(zip(debits['date'], debits['margin_debt'].tolist())))
+        store_raw('finra_debits', debits.to_csv(index=False))
+        if build(['margin'], force=FORCE)['margin'] != 'rebuilt':
+            print("Debit balances unchanged — published margin data kept as is")
+        data = read_json(OUTPUT_PATH)
         fetch_succeeded = True
 
-        OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-        with open(OUTPUT_PATH, 'w') as f:
-            json.dump(data, f, indent=2)
-
         latest = data['data'][-1]
         print(f"Success! Latest data: {latest['date']} - ${latest['margin_debt']:,}M")
         print(f"YoY Growth: {latest['yoy_growth']}%")
@@ -5,52 +5,116 @@ Fetch Producer Price Index (PPI) - Final Demand data from the BLS Public API.
 Source: https://www.bls.gov/charts/producer-price-index/final-demand-1-month-percent-change.htm
 BLS API: https://api.bls.gov/publicAPI/v1/timeseries/data/
 
-Series fetched:
-  WPUFD4     = PPI Final Demand (not seasonally adjusted)
-  WPUFD49104 = PPI Final Demand (seasonally adjusted)
+Series fetched: every entry in PPI_SERIES — headline final demand plus its
+goods / foods / energy / services / trade / transportation / construction
+components and the intermediate demand stages. WPUFD4 and WPUFD49104 keep
+their original keys and labels for the existing charts.
 
-The BLS public API (no key) allows:
-  - Up to 25 series per request
-  - Up to 20 years per request (2 chunks needed for 2010→today)
+BLS API limits (all series are packed into as few requests as possible):
+  v1 (no key):                         25 series, 10 years per request
+  v2 (BLS_API_KEY env var, optional):  50 series, 20 years per request
+
+Index levels are stored in data/raw/ppi_levels.csv; MoM / YoY changes are only
+recomputed when they changed (build_graph.py, node "ppi"). API responses are
+archived; --reprocess [run-id] rebuilds from an archived run offline (archive.py).
 
 Output: public/ppi_data.json
 """
 
 import json
+import os
 import sys
+import pandas as pd
 import requests
 from datetime import datetime, date
 from pathlib import Path
 
-BLS_API_URL = "https://api.bls.gov/publicAPI/v1/timeseries/data/"
+from archive import REPROCESS, payload, replay
+from build_graph import build, store_raw
+from common import read_json, write_json
+from health import guarded
+from manifest import update_manifest
+from release_calendar import FORCE, should_fetch
+from vintages import record_frame
+
+BLS_API_V1_URL = "https://api.bls.gov/publicAPI/v1/timeseries/data/"
+BLS_API_V2_URL = "https://api.bls.gov/publicAPI/v2/timeseries/data/"
+BLS_API_KEY    = os.environ.get("BLS_API_KEY", "").strip()
 SERIES_UNADJ = "WPUFD4"       # PPI Final Demand, Not Seasonally Adjusted
 SERIES_ADJ   = "WPUFD49104"   # PPI Final Demand, Seasonally Adjusted
 START_YEAR   = 2009            # BLS started publishing PPI Final Demand in Nov 2009
-CHUNK_YEARS  = 10             # BLS API v1 free tier cap is 10 years per request
 OUTPUT_PATH  = Path(__file__).parent.parent / "public" / "ppi_data.json"
 
+# (max series per request, max years per request)
+API_LIMITS = {
+    "v1": (25, 10),   # BLS API v1 free tier
+    "v2": (50, 20),   # BLS API v2 with registration key
+}
+
+# Series registry: id -> label, description, group.
+# Groups drive the breakdown panels in the dashboard.
+PPI_SERIES = {
+    SERIES_UNADJ:  {"label": "PPI Final Demand (NSA)", "description": "Not Seasonally Adjusted",                    "group": "headline"},
+    SERIES_ADJ:    {"label": "PPI Final Demand (SA)",  "description": "Seasonally Adjusted",                        "group": "headline"},
+    "WPUFD49116":  {"label": "Final Demand less Foods, Energy & Trade Services", "description": "Not Seasonally Adjusted", "group": "core"},
+    "WPUFD41":     {"label": "Final Demand Goods",                      "description": "Not Seasonally Adjusted",  "group": "goods"},
+    "WPUFD411":    {"label": "Final Demand Foods",                      "description": "Not Seasonally Adjusted",  "group": "goods"},
+    "WPUFD412":    {"label": "Final Demand Energy",                     "description": "Not Seasonally Adjusted",  "group": "goods"},
+    "WPUFD4131":   {"label": "Final Demand Goods less Foods & Energy",  "description": "Not Seasonally Adjusted",  "group": "goods"},
+    "WPUFD42":     {"label": "Final Demand Services",                   "description": "Not Seasonally Adjusted",  "group": "services"},
+    "WPUFD421":    {"label": "Trade Services",                          "description": "Not Seasonally Adjusted",  "group": "services"},
+    "WPUFD422":    {"label": "Transportation & Warehousing",            "description": "Not Seasonally Adjusted",  "group": "services"},
+    "WPUFD423":    {"label": "Services less Trade & Transportation",    "description": "Not Seasonally Adjusted",  "group": "services"},
+    "WPUFD43":     {"label": "Final Demand Construction",               "description": "Not Seasonally Adjusted",  "group": "construction"},
+    "WPUID61":     {"label": "Processed Goods for Intermediate Demand", "description": "Not Seasonally Adjusted",  "group": "intermediate"},
+    "WPUID62":     {"label": "Unprocessed Goods for Intermediate Demand", "description": "Not Seasonally Adjusted", "group": "intermediate"},
+    "WPUID63":     {"label": "Services for Intermediate Demand",        "description": "Not Seasonally Adjusted",  "group": "intermediate"},
+    "WPUID54":     {"label": "Stage 4 Intermediate Demand",             "description": "Not Seasonally Adjusted",  "group": "stages"},
+    "WPUID53":     {"label": "Stage 3 Intermediate Demand",             "description": "Not Seasonally Adjusted",  "group": "stages"},
+    "WPUID52":     {"label": "Stage 2 Intermediate Demand",             "description": "Not Seasonally Adjusted",  "group": "stages"},
+    "WPUID51":     {"label": "Stage 1 Intermediate Demand",             "description": "Not Seasonally Adjusted",  "group": "stages"},
+}
+
 HEADERS = {
     "User-Agent": "margin-debt-tracker/1.0 (data@example.com)",
     "Content-Type": "application/json",
 }
 
 
+def api_version() -> str:
+    return "v2" if BLS_API_KEY else "v1"
+
+
 def fetch_bls_chunk(series_ids: list, start_year: int, end_year: int) -> dict:
     """Fetch one chunk from the BLS API, returns dict keyed by seriesID -> list of points."""
-    payload = {
+    params = {
         "seriesid": series_ids,
         "startyear": str(start_year),
         "endyear": str(end_year),
     }
-    print(f"  Fetching {series_ids} for {start_year}–{end_year}...")
-    r = requests.post(BLS_API_URL, json=payload, headers=HEADERS, timeout=30)
-    r.raise_for_status()
-    data = r.json()
+    url = BLS_API_V1_URL
+    if BLS_API_KEY:
+        params["registrationkey"] = BLS_API_KEY
+        url = BLS_API_V2_URL
+    print(f"  Fetching {len(series_ids)} series for {start_year}–{end_year} ({api_version()})...")
+
+    def download():
+        with guarded("bls"):
+            r = requests.post(url, json=params, headers=HEADERS, timeout=30)
+            r.raise_for_status()
+            data = r.json()
+
+            if data.get("status") not in ("REQUEST_SUCCEEDED", "200"):
+                msgs = data.get("message", [])
+                raise RuntimeError(f"BLS API error: {msgs}")
+        return r.content
+
+    key = f"{start_year}-{end_year}:{','.join(series_ids)}"
+    return bls_series(json.loads(payload("ppi", key, download, url)))
 
-    if data.get("status") not in ("REQUEST_SUCCEEDED", "200"):
-        msgs = data.get("message", [])
-        raise RuntimeError(f"BLS API error: {msgs}")
 
+def bls_series(data: dict) -> dict:
+    """Points of a BLS API response keyed by seriesID."""
     result = {}
     for s in data.get("Results", {}).get("series", []):
         result[s["seriesID"]] = s.get("data", [])
@@ -61,120 +125,148 @@ def bls_point_to_date(point: dict) -> str:
     """Convert BLS period ('M03', 'M12') + year to YYYY-MM string."""
     year = point["year"]
     period = point["period"]   # e.g. 'M01' .. 'M12'
-    if not period.startswith("M"):
+    if not period.startswith("M") or period == "M13":
         return None  # skip annual / quarterly markers
     month = period[1:]  # strip 'M'
     return f"{year}-{month.zfill(2)}"
 
 
-def fetch_all_ppi() -> tuple[list, list]:
-    """
-    Returns (unadj_records, adj_records) sorted ascending by date.
-    Fetches in chunks to respect the 20-year BLS API limit.
+def plan_requests(series_ids: list, start_year: int, end_year: int, version: str) -> list:
+    """Pack series × years into the fewest (series_batch, start, end) requests the API allows."""
+    max_series, max_years = API_LIMITS[version]
+    batches = [series_ids[i:i + max_series] for i in range(0, len(series_ids), max_series)]
+    plan = []
+    y = start_year
+    while y <= end_year:
+        chunk_end = min(y + max_years - 1, end_year)
+        plan.extend((batch, y, chunk_end) for batch in batches)
+        y += max_years
+    return plan
+
+
+def fetch_all_ppi(series_ids: list = None) -> pd.DataFrame:
     """
-    current_year = date.today().year
-    chunks = []
-    y = START_YEAR
-    while y <= current_year:
-        chunks.append((y, min(y + CHUNK_YEARS - 1, current_year)))
-        y += CHUNK_YEARS
-
-    raw_unadj: dict[str, float] = {}  # date -> index value
-    raw_adj:   dict[str, float] = {}
-
-    for start, end in chunks:
-        chunk = fetch_bls_chunk([SERIES_UNADJ, SERIES_ADJ], start, end)
-        for pt in chunk.get(SERIES_UNADJ, []):
-            d = bls_point_to_date(pt)
-            if d:
-                raw_unadj[d] = float(pt["value"])
-        for pt in chunk.get(SERIES_ADJ, []):
-            d = bls_point_to_date(pt)
-            if d:
-                raw_adj[d] = float(pt["value"])
-
-    # Sort ascending
-    sorted_unadj = sorted(raw_unadj.items())
-    sorted_adj   = sorted(raw_adj.items())
-
-    return sorted_unadj, sorted_adj
-
-
-def compute_changes(sorted_pairs: list) -> list:
+    Returns a wide DataFrame of index levels: monthly PeriodIndex × one column per series.
+    Months a series did not publish are NaN.
     """
-    Given [(date, index_value), ...] sorted ascending,
-    compute MoM % change and YoY % change.
+    series_ids = list(series_ids or PPI_SERIES)
+    if REPROCESS:
+        chunks = [bls_series(json.loads(body)) for _, body in replay("ppi").items()]
+    else:
+        plan = plan_requests(series_ids, START_YEAR, date.today().year, api_version())
+        print(f"  {len(series_ids)} series in {len(plan)} request(s)")
+        chunks = (fetch_bls_chunk(batch, start, end) for batch, start, end in plan)
+
+    points = []  # (series_id, YYYY-MM, value)
+    for chunk in chunks:
+        for sid, pts in chunk.items():
+            for pt in pts:
+                d = bls_point_to_date(pt)
+                if not d:
+                    continue
+                try:
+                    points.append((sid, d, float(pt["value"])))
+                except (TypeError, ValueError):
+                    continue  # '-' placeholders for unavailable months
+
+    if not points:
+        return pd.DataFrame(columns=series_ids)
+
+    long = pd.DataFrame(points, columns=["series", "date", "value"])
+    wide = long.pivot_table(index="date", columns="series", values="value", aggfunc="last")
+    wide.index = pd.PeriodIndex(wide.index, freq="M")
+    full_range = pd.period_range(wide.index.min(), wide.index.max(), freq="M")
+    return wide.reindex(index=full_range, columns=series_ids)
+
+
+def compute_changes(levels: pd.DataFrame) -> tuple:
     """
-    records = []
-    date_map = {d: v for d, v in sorted_pairs}
-    dates = [d for d, _ in sorted_pairs]
-
-    for i, (d, val) in enumerate(sorted_pairs):
-        # MoM change
-        prev_date = dates[i - 1] if i > 0 else None
-        prev_val  = date_map.get(prev_date) if prev_date else None
-        mom = round((val / prev_val - 1) * 100, 3) if prev_val else None
-
-        # YoY: find the date 12 months back
-        y, m = d.split("-")
-        yoy_date = f"{int(y)-1}-{m}"
-        yoy_val  = date_map.get(yoy_date)
-        yoy = round((val / yoy_val - 1) * 100, 3) if yoy_val else None
+    MoM and YoY % change for every series at once.
 
-        records.append({
-            "date":  d,
-            "index": round(val, 3),
-            "mom":   mom,
-            "yoy":   yoy,
-        })
+    MoM compares against the previous published month (gaps are skipped, as
+    before); YoY compares against the same calendar month a year earlier.
+    Returns (mom, yoy) frames aligned with `levels`.
+    """
+    prev = levels.ffill().shift(1)
+    mom = ((levels / prev - 1) * 100).where(levels.notna())
+    yoy = (levels / levels.shift(12) - 1) * 100
+    return mom.round(3), yoy.round(3)
+
+
+def series_records(levels: pd.DataFrame, mom: pd.DataFrame, yoy: pd.DataFrame, sid: str) -> list:
+    """Ascending [{date, index, mom, yoy}] for one series, skipping unpublished months."""
+    frame = pd.DataFrame({
+        "date":  levels.index.strftime("%Y-%m"),
+        "index": levels[sid].round(3).values,
+        "mom":   mom[sid].values,
+        "yoy":   yoy[sid].values,
+    })
+    frame = frame[frame["index"].notna()]
+    frame = frame.astype(object).where(frame.notna(), None)
+    return frame.to_dict("records")
+
+
+def build_ppi(inputs):
+    """Build recipe for the "ppi" node (build_graph.py): raw index levels → MoM / YoY JSON."""
+    levels = pd.read_csv(inputs["ppi_levels"], index_col=0)
+    levels.index = pd.PeriodIndex(levels.index, freq="M")
+
+    mom, yoy = compute_changes(levels)
+    series_out = {}
+    for sid, meta in PPI_SERIES.items():
+        if sid not in levels:
+            continue
+        records = series_records(levels, mom, yoy, sid)
+        if not records:
+            print(f"  WARNING: no data for {sid} ({meta['label']})")
+            continue
+        series_out[sid] = {**meta, "data": records}
+
+    if not series_out.get(SERIES_UNADJ, {}).get("data"):
+        raise RuntimeError("No PPI records after processing")
+
+    output = {
+        "last_updated": datetime.utcnow().isoformat() + "Z",
+        "source":       "U.S. Bureau of Labor Statistics — PPI Final Demand",
+        "source_url":   "https://www.bls.gov/ppi/",
+        "series":       series_out,
+    }
 
-    return records
+    write_json(OUTPUT_PATH, output, indent=2)
+    update_manifest("ppi", output)
 
 
 def main():
     print("=== PPI Final Demand Fetcher ===")
-    print(f"Source: {BLS_API_URL}")
-    print(f"Series: {SERIES_UNADJ} (unadj), {SERIES_ADJ} (seasonally adj)")
+    if not should_fetch("ppi"):
+        return
+
+    print(f"Source: {BLS_API_V2_URL if BLS_API_KEY else BLS_API_V1_URL}")
+    print(f"Series: {len(PPI_SERIES)} (headline {SERIES_UNADJ}, {SERIES_ADJ} + components)")
     print()
 
     fetch_succeeded = False
 
     try:
-        unadj_pairs, adj_pairs = fetch_all_ppi()
-        print(f"\nRaw records: unadj={len(unadj_pairs)}, adj={len(adj_pairs)}")
-
-        unadj_records = compute_changes(unadj_pairs)
-        adj_records   = compute_changes(adj_pairs)
+        levels = fetch_all_ppi()
+        counts = levels.notna().sum()
+        print(f"\nRaw records: {int(counts.sum())} across {int((counts > 0).sum())} series")
 
-        if not unadj_records:
+        if not levels[SERIES_UNADJ].notna().any():
             raise RuntimeError("No PPI records after processing")
+        record_frame(levels, "ppi_", date_format="%Y-%m")
+        store_raw("ppi_levels", levels.to_csv())
 
-        output = {
-            "last_updated": datetime.utcnow().isoformat() + "Z",
-            "source":       "U.S. Bureau of Labor Statistics — PPI Final Demand",
-            "source_url":   "https://www.bls.gov/ppi/",
-            "series": {
-                SERIES_UNADJ: {
-                    "label":       "PPI Final Demand (NSA)",
-                    "description": "Not Seasonally Adjusted",
-                    "data":        unadj_records,
-                },
-                SERIES_ADJ: {
-                    "label":       "PPI Final Demand (SA)",
-                    "description": "Seasonally Adjusted",
-                    "data":        adj_records,
-                },
-            },
-        }
-
-        OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-        with open(OUTPUT_PATH, "w") as f:
-            json.dump(output, f, indent=2)
+        if build(["ppi"], force=FORCE)["ppi"] != "rebuilt":
+            print("Index levels unchanged — published PPI data kept as is")
+        series_out = read_json(OUTPUT_PATH)["series"]
+        unadj_records = series_out[SERIES_UNADJ]["data"]
+        adj_records   = series_out.get(SERIES_ADJ, {}).get("data", [])
 
         latest = unadj_records[-1]
         print(f"\nSuccess!")
         print(f"  Latest (unadj): {latest['date']} — index={latest['index']}, MoM={latest['mom']}%, YoY={latest['yoy']}%")
-        print(f"  Total records:  {len(unadj_records)} (unadj), {len(adj_records)} (adj)")
+        print(f"  Total records:  {len(unadj_records)} (unadj), {len(adj_records)} (adj), {len(series_out)} series")
         print(f"  Output: {OUTPUT_PATH}")
         fetch_succeeded = True
 
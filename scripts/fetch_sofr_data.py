@@ -6,16 +6,36 @@ Source: https://markets.newyorkfed.org/api/rates/secured/sofr/
 API Docs: https://markets.newyorkfed.org/static/docs/markets-api.html
 
 The NY Fed publishes SOFR each U.S. business day after 8:00 AM ET.
-This script fetches all available history (from April 2018 when SOFR was first published).
-Output: public/sofr_data.json
+History is kept in an append-only log (data/series/sofr.ndjson, see series_log.py):
+each run fetches only from the last stored date and appends. The log is seeded
+from the published file on first run; --backfill refetches all history (from
+April 2018 when SOFR was first published) and rewrites it. Every window's
+response is archived; --reprocess [run-id] replays an archived run offline
+(archive.py).
+Each row also carries the 30/90/180-day compounded SOFR averages, the SOFR
+Index and the p99 − p1 dispersion, derived incrementally on append
+(sofr_averages.py).
+Output: public/sofr_data.json (streamed from the log)
 """
 
 import json
 import sys
+import time
 import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, date, timedelta
 from pathlib import Path
 
+from archive import REPROCESS, ArchiveMiss, payload, replay
+from delta import write_delta
+from health import guarded
+from manifest import update_manifest
+from percentiles import rank_log, rank_new_rows
+from pyramid import write_levels
+from release_calendar import should_fetch
+from series_log import SeriesLog
+from sofr_averages import average_log, average_new_rows
+
 # NY Fed Markets API - SOFR endpoint
 # /search.json supports date range queries; returns newest-first by default
 SOFR_API_BASE = "https://markets.newyorkfed.org/api/rates/secured/sofr"
@@ -24,6 +44,10 @@ SOFR_START_DATE = "2018-04-02"  # First SOFR publication date
 OUTPUT_PATH = Path(__file__).parent.parent / "public" / "sofr_data.json"
 STALE_THRESHOLD_DAYS = 5  # SOFR is daily; warn if data is more than 5 business days old
 
+BACKFILL_MAX_WORKERS = 4  # concurrent yearly windows against markets.newyorkfed.org
+CHUNK_RETRIES = 3
+CHUNK_BACKOFF_S = 2       # doubles each retry: 2s, 4s
+
 HEADERS = {
     "User-Agent": (
         "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
@@ -37,44 +61,101 @@ def fetch_sofr_range(start_date: str, end_date: str) -> list:
     """Fetch SOFR data for a given date range from the NY Fed API."""
     url = f"{SOFR_API_BASE}/search.json?startDate={start_date}&endDate={end_date}"
     print(f"  Fetching: {url}")
-    response = requests.get(url, headers=HEADERS, timeout=30)
-    response.raise_for_status()
-    data = response.json()
+
+    def download():
+        response = requests.get(url, headers=HEADERS, timeout=30)
+        response.raise_for_status()
+        return response.content
+
+    data = json.loads(payload("sofr", f"{start_date}_{end_date}", download, url))
     return data.get("refRates", [])
 
 
-def fetch_all_sofr() -> list:
-    """
-    Fetch the full SOFR history by chunking into yearly batches.
-    The NY Fed API handles large ranges fine, but chunking provides
-    better progress logging and resilience.
-    """
-    all_records = []
-    today = date.today()
-    current_start = datetime.strptime(SOFR_START_DATE, "%Y-%m-%d").date()
+def replay_sofr() -> list:
+    """--reprocess: raw records of every window the archived run fetched."""
+    return [r for _, body in replay("sofr").items() for r in json.loads(body).get("refRates", [])]
+
 
-    while current_start <= today:
-        # Fetch one year at a time
+def year_windows(start: date, end: date) -> list:
+    """Split [start, end] into consecutive one-year (start_str, end_str) windows."""
+    windows = []
+    current_start = start
+    while current_start <= end:
         current_end = min(
             date(current_start.year + 1, current_start.month, current_start.day) - timedelta(days=1),
-            today
+            end
         )
-        start_str = current_start.strftime("%Y-%m-%d")
-        end_str = current_end.strftime("%Y-%m-%d")
-
-        try:
-            records = fetch_sofr_range(start_str, end_str)
-            print(f"    Got {len(records)} records for {start_str} → {end_str}")
-            all_records.extend(records)
-        except Exception as e:
-            print(f"    ERROR fetching {start_str} → {end_str}: {e}")
-            raise
-
+        windows.append((current_start.strftime("%Y-%m-%d"), current_end.strftime("%Y-%m-%d")))
         current_start = current_end + timedelta(days=1)
+    return windows
+
+
+def fetch_chunk_with_retry(start_str: str, end_str: str) -> list:
+    """Fetch one window, retrying just this window with exponential backoff."""
+    last_err = None
+    # One breaker outcome per window (not per attempt), so one window's retries can't open it
+    with guarded("nyfed_sofr"):
+        for attempt in range(1, CHUNK_RETRIES + 1):
+            try:
+                return fetch_sofr_range(start_str, end_str)
+            except ArchiveMiss:
+                raise
+            except Exception as e:
+                last_err = e
+                if attempt < CHUNK_RETRIES:
+                    wait = CHUNK_BACKOFF_S * (2 ** (attempt - 1))
+                    print(f"    Attempt {attempt}/{CHUNK_RETRIES} for {start_str} → {end_str} failed ({e}); "
+                          f"retrying in {wait}s...")
+                    time.sleep(wait)
+        raise last_err
+
+
+def fetch_all_sofr(max_workers: int = BACKFILL_MAX_WORKERS) -> list:
+    """
+    Fetch the full SOFR history as yearly windows issued concurrently.
+
+    Windows run through a bounded thread pool (a polite per-host limit for the
+    NY Fed API) and each retries on its own, so a full backfill takes roughly
+    as long as the slowest window. Results arrive in arbitrary order;
+    normalize_records() de-duplicates and sorts them.
+    """
+    if REPROCESS:
+        return replay_sofr()
+    start = datetime.strptime(SOFR_START_DATE, "%Y-%m-%d").date()
+    windows = year_windows(start, date.today())
+    print(f"  Backfilling {len(windows)} yearly windows ({max_workers} concurrent)")
 
+    all_records = []
+    failed = []
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(fetch_chunk_with_retry, s, e): (s, e) for s, e in windows}
+        for future in as_completed(futures):
+            start_str, end_str = futures[future]
+            try:
+                records = future.result()
+                print(f"    Got {len(records)} records for {start_str} → {end_str}")
+                all_records.extend(records)
+            except Exception as e:
+                print(f"    ERROR fetching {start_str} → {end_str}: {e}")
+                failed.append((start_str, end_str))
+
+    if failed:
+        # A history with holes must not replace the published file
+        raise RuntimeError(f"{len(failed)} window(s) failed after retries: {sorted(failed)}")
     return all_records
 
 
+def fetch_sofr_since(last_date: str) -> list:
+    """Fetch from `last_date` (inclusive, so a revised last print is picked up) to today."""
+    if REPROCESS:
+        return replay_sofr()
+    start = datetime.strptime(last_date, "%Y-%m-%d").date()
+    raw = []
+    for start_str, end_str in year_windows(start, date.today()):
+        raw.extend(fetch_chunk_with_retry(start_str, end_str))
+    return raw
+
+
 def normalize_records(raw_records: list) -> list:
     """
     Normalize and sort raw API records into clean output format.
@@ -120,38 +201,70 @@ def check_staleness(records: list) -> int:
 
 def main():
     print("=== SOFR Data Fetcher ===")
+    # Reprocessing a backfill run (its first window starts at SOFR_START_DATE) rebuilds the log
+    backfill = "--backfill" in sys.argv or bool(
+        REPROCESS and any(k.startswith(SOFR_START_DATE) for k in replay("sofr").entries))
+    if not backfill and not should_fetch("sofr"):
+        return
+
     print(f"Source: {SOFR_API_BASE}")
     print(f"Start date: {SOFR_START_DATE}")
     print()
 
     fetch_succeeded = False
     records = []
+    log = SeriesLog("sofr")
 
     try:
-        raw = fetch_all_sofr()
-        print(f"\nTotal raw records: {len(raw)}")
-
-        records = normalize_records(raw)
-        print(f"Valid normalized records: {len(records)}")
-
+        if backfill or not log.exists():
+            if not backfill and OUTPUT_PATH.exists():
+                with open(OUTPUT_PATH) as f:
+                    seeded = log.rewrite(json.load(f).get("data", []))
+                print(f"Seeded {log.path.name} with {seeded} rows from {OUTPUT_PATH.name}")
+            else:
+                raw = fetch_all_sofr()
+                print(f"\nTotal raw records: {len(raw)}")
+                full = normalize_records(raw)
+                if not full:
+                    raise RuntimeError("No valid SOFR records after normalization")
+                log.rewrite(full)
+                print(f"Backfilled {len(full)} records into {log.path.name}")
+
+        ranks = rank_log(log, "rate")
+        averages = average_log(log)
+        if not backfill:
+            last_date = log.last_key()
+            print(f"Fetching since last stored date {last_date}")
+            new = rank_new_rows(ranks, normalize_records(fetch_sofr_since(last_date)))
+            new = average_new_rows(averages, new)
+            print(f"Appended {log.append(new)} new/revised record(s) ({len(new)} fetched)")
+            ranks.save()
+            averages.save()
+
+        records = log.rows()
         if not records:
             raise RuntimeError("No valid SOFR records after normalization")
 
-        output = {
+        meta = {
             "last_updated": datetime.utcnow().isoformat() + "Z",
             "source": "Federal Reserve Bank of New York — SOFR",
             "source_url": "https://www.newyorkfed.org/markets/reference-rates/sofr",
-            "data": records,
+            "note": "rate_pctile(_5y/_10y) = percentile rank of the rate in its history (all / trailing 5 or 10 years). "
+                    "avg_30d/_90d/_180d and sofr_index = NY Fed SOFR Averages and Index methodology (compounded, "
+                    "actual/360, rates through the prior business day). dispersion = percentile_99 − percentile_1.",
         }
-
-        OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-        with open(OUTPUT_PATH, "w") as f:
-            json.dump(output, f, indent=2)
+        log.publish(OUTPUT_PATH, meta, "data", indent=2)
+        output = {**meta, "data": records}
+        write_delta("sofr", output)
+        write_levels("sofr", output)
+        update_manifest("sofr", output)
 
         latest = records[-1]
         print(f"\nSuccess!")
         print(f"  Latest SOFR: {latest['date']} — {latest['rate']}%")
         print(f"  Volume: ${latest['volume_bn']}B")
+        print(f"  30/90/180-day averages: {latest.get('avg_30d')}% / {latest.get('avg_90d')}% / "
+              f"{latest.get('avg_180d')}%  index {latest.get('sofr_index')}")
         print(f"  Total records: {len(records)}")
         print(f"  Output: {OUTPUT_PATH}")
         fetch_succeeded = True
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Per-endpoint circuit breaker, persisted in data/state/endpoint_health.json.
+
+Each upstream endpoint (FRED, CNN, the CBOE statistics page, ...) has an entry:
+  state         closed | open | half_open
+  failures      current failure streak
+  last_success, last_failure, last_error
+  latency_ms    duration of the most recent call
+  next_probe    while open: when the endpoint may be tried again
+  cooldown_s    current open period; doubles after each failed probe
+
+  closed     calls go through; FAILURE_THRESHOLD failures in a row → open
+  open       calls are refused immediately (CircuitOpenError) until next_probe
+  half_open  next_probe has passed: one run probes the endpoint; success →
+             closed, failure → open again with a doubled cooldown (≤ MAX_COOLDOWN)
+
+Fetchers wrap each network call:
+
+    with guarded("fred"):
+        r = requests.get(...)
+
+An exception inside the block counts as a failure. Raise one yourself when the
+response is reachable but unusable (a login wall, a placeholder page). Raise
+Cancelled when the caller abandoned the call (a lost hedge race): it is
+recorded as neither success nor failure. The
+--force flag / FORCE_FETCH=1 bypasses open breakers. Under --reprocess
+(archive.py) payloads come from the archive, so blocks run unguarded and
+nothing is recorded.
+
+  python scripts/health.py           # show every endpoint's state
+  python scripts/health.py --reset   # close all breakers
+"""
+
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+from archive import REPROCESS
+from common import STATE_DIR, read_json, update_json, write_json
+from release_calendar import FORCE
+
+HEALTH_PATH = STATE_DIR / "endpoint_health.json"
+FAILURE_THRESHOLD = 3
+BASE_COOLDOWN = timedelta(days=1)
+MAX_COOLDOWN = timedelta(days=14)
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling an endpoint whose breaker is open."""
+
+
+class Cancelled(RuntimeError):
+    """The caller gave up on the call; says nothing about the endpoint's health."""
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _iso(dt: datetime) -> str:
+    return dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _parse(s: str) -> datetime:
+    return datetime.strptime(s, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+
+
+def load_health() -> dict:
+    return read_json(HEALTH_PATH, {})
+
+
+def allow(endpoint: str, now: datetime = None) -> bool:
+    """True if a call to `endpoint` should be attempted now."""
+    entry = load_health().get(endpoint)
+    if FORCE or not entry or entry["state"] != "open":
+        return True
+    return (now or _now()) >= _parse(entry["next_probe"])
+
+
+def _record(endpoint: str, ok: bool, latency_s: float, error: str = None) -> dict:
+    now = _now()
+
+    def apply(health):
+        entry = health.setdefault(endpoint, {"state": "closed", "failures": 0})
+        entry["latency_ms"] = round(latency_s * 1000)
+        if ok:
+            entry.update(state="closed", failures=0, last_success=_iso(now))
+            entry.pop("next_probe", None)
+            entry.pop("cooldown_s", None)
+            return health
+
+        entry["failures"] += 1
+        entry["last_failure"] = _iso(now)
+        entry["last_error"] = (error or "")[:200]
+        was_probe = entry["state"] == "half_open"
+        if was_probe or entry["failures"] >= FAILURE_THRESHOLD:
+            cooldown = (timedelta(seconds=min(entry["cooldown_s"] * 2, MAX_COOLDOWN.total_seconds()))
+                        if was_probe and "cooldown_s" in entry else BASE_COOLDOWN)
+            entry.update(state="open", cooldown_s=int(cooldown.total_seconds()),
+                         next_probe=_iso(now + cooldown))
+        return health
+
+    return update_json(HEALTH_PATH, apply, indent=2, sort_keys=True)[endpoint]
+
+
+def _mark_half_open(endpoint: str):
+    """An open breaker whose probe time has come lets this one call through as a probe."""
+    def apply(health):
+        entry = health.get(endpoint)
+        if entry and entry["state"] == "open" and _now() >= _parse(entry["next_probe"]):
+            entry["state"] = "half_open"
+        return health
+
+    if load_health().get(endpoint, {}).get("state") == "open":
+        update_json(HEALTH_PATH, apply, indent=2, sort_keys=True)
+
+
+@contextmanager
+def guarded(endpoint: str):
+    """Run the block as one call to `endpoint`, recording its outcome."""
+    if REPROCESS:
+        yield
+        return
+    if not allow(endpoint):
+        entry = load_health()[endpoint]
+        raise CircuitOpenError(
+            f"{endpoint} circuit open after {entry['failures']} failures "
+            f"(last: {entry.get('last_error')}); next probe {entry['next_probe']}")
+    _mark_half_open(endpoint)
+    start = time.monotonic()
+    try:
+        yield
+    except Cancelled:
+        raise
+    except Exception as e:
+        _record(endpoint, False, time.monotonic() - start, f"{type(e).__name__}: {e}")
+        raise
+    _record(endpoint, True, time.monotonic() - start)
+
+
+def main():
+    if "--reset" in sys.argv:
+        write_json(HEALTH_PATH, {}, indent=2)
+        print(f"Reset {HEALTH_PATH}")
+        return
+    health = load_health()
+    if not health:
+        print("No endpoint calls recorded yet.")
+        return
+    print(f"{'endpoint':<22} {'state':<10} {'streak':>6} {'latency':>9}  {'last success':<21} next probe")
+    for name, entry in sorted(health.items()):
+        print(f"{name:<22} {entry['state']:<10} {entry['failures']:>6} {entry.get('latency_ms', 0):>7}ms  "
+              f"{entry.get('last_success', '—'):<21} {entry.get('next_probe', '')}")
+
+
+if __name__ == "__main__":
+    main()
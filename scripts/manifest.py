@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Maintain public/manifest.json — a small per-dataset summary file.
+
+Each fetcher calls `update_manifest(<dataset>, output)` after writing its
+JSON, so the freshness report and the dashboard's first paint can read one
+~2 KB file instead of every full history.
+
+Entry per dataset:
+  file, latest_date, rows, sha256, bytes, last_updated, headline
+  delta   name of the dataset's delta feed, when it has one (see delta.py)
+  levels  reduced-resolution copies, smallest first, when it has them (see pyramid.py)
+
+Run directly to rebuild the manifest from whatever is currently in public/:
+  python scripts/manifest.py
+"""
+
+import hashlib
+import json
+from datetime import datetime, timezone
+
+from common import PUBLIC_DIR, read_json, update_json
+
+MANIFEST_PATH = PUBLIC_DIR / "manifest.json"
+LEVELS = (250, 1000)  # pyramid level sizes, in points; kept here so publish.py stays stdlib-only
+
+
+def _last(rows):
+    return rows[-1] if rows else {}
+
+
+def _ppi_rows(d):
+    return d.get("series", {}).get("WPUFD4", {}).get("data", [])
+
+
+def _ppi_headline(d):
+    series = d.get("series", {})
+    nsa = _last(series.get("WPUFD4", {}).get("data", []))
+    sa = _last(series.get("WPUFD49104", {}).get("data", []))
+    return {"index": nsa.get("index"), "mom": nsa.get("mom"), "yoy": nsa.get("yoy"),
+            "sa_mom": sa.get("mom")}
+
+
+def _fear_greed_headline(d):
+    cur = d.get("current", {})
+    return {"score": cur.get("score"), "rating": cur.get("rating"),
+            "previous_close": cur.get("previous_close"),
+            "value_pctile": _last(d.get("historical", [])).get("value_pctile")}
+
+
+# dataset name -> (file name, rows extractor, headline extractor)
+DATASETS = {
+    "margin": (
+        "margin_data.json",
+        lambda d: d.get("data", []),
+        lambda d: {k: _last(d.get("data", [])).get(k) for k in ("margin_debt", "yoy_growth", "yoy_growth_pctile")},
+    ),
+    "aaii": (
+        "aaii_allocation_data.json",
+        lambda d: d.get("data", []),
+        lambda d: {k: _last(d.get("data", [])).get(k) for k in ("stocks", "bonds", "cash")},
+    ),
+    "buffett": (
+        "buffett_indicator_data.json",
+        lambda d: d.get("data", []),
+        lambda d: d.get("current", {}),
+    ),
+    "sofr": (
+        "sofr_data.json",
+        lambda d: d.get("data", []),
+        lambda d: {k: _last(d.get("data", [])).get(k) for k in ("rate", "volume_bn", "rate_pctile", "avg_30d")},
+    ),
+    "ppi": (
+        "ppi_data.json",
+        _ppi_rows,
+        _ppi_headline,
+    ),
+    "fear_greed": (
+        "fear_greed_index.json",
+        lambda d: d.get("historical", []),
+        _fear_greed_headline,
+    ),
+    "put_call": (
+        "put_call_data.json",
+        lambda d: d.get("data", []),
+        lambda d: {"ratio": _last(d.get("data", [])).get("ratio")},
+    ),
+}
+
+
+def level_path(fname: str, points: int):
+    return PUBLIC_DIR / fname.replace(".json", f".{points}.json")
+
+
+def level_files(fname: str) -> list:
+    """Manifest records for the level files currently next to `fname`, smallest first."""
+    records = []
+    for points in LEVELS:
+        path = level_path(fname, points)
+        if path.exists():
+            raw = path.read_bytes()
+            records.append({"points": points, "file": path.name,
+                            "rows": json.loads(raw)["level"]["rows"], "bytes": len(raw)})
+    return records
+
+
+def summarize(name: str, data: dict = None) -> dict:
+    """Build the manifest entry for one dataset from its file on disk."""
+    fname, rows_fn, headline_fn = DATASETS[name]
+    path = PUBLIC_DIR / fname
+    raw = path.read_bytes()
+    if data is None:
+        data = json.loads(raw)
+    rows = rows_fn(data)
+    entry = {
+        "file":         fname,
+        "latest_date":  _last(rows).get("date"),
+        "rows":         len(rows),
+        "sha256":       hashlib.sha256(raw).hexdigest(),
+        "bytes":        len(raw),
+        "last_updated": data.get("last_updated"),
+        "headline":     headline_fn(data),
+    }
+    delta_name = fname.replace(".json", ".delta.json")
+    if (PUBLIC_DIR / delta_name).exists():
+        entry["delta"] = delta_name
+    levels = level_files(fname)
+    if levels:
+        entry["levels"] = levels
+    return entry
+
+
+def update_manifest(name: str, data: dict = None) -> dict:
+    """Refresh one dataset's entry in the shared manifest (safe under parallel fetchers)."""
+    entry = summarize(name, data)
+
+    def apply(manifest):
+        manifest.setdefault("datasets", {})[name] = entry
+        manifest["generated_at"] = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        return manifest
+
+    update_json(MANIFEST_PATH, apply, indent=2)
+    return entry
+
+
+def load_manifest() -> dict:
+    return read_json(MANIFEST_PATH, {"datasets": {}})
+
+
+def main():
+    print(f"Rebuilding {MANIFEST_PATH}")
+    for name, (fname, _, _) in DATASETS.items():
+        if not (PUBLIC_DIR / fname).exists():
+            print(f"  {name}: {fname} missing — skipped")
+            continue
+        entry = update_manifest(name)
+        print(f"  {name}: latest={entry['latest_date']}  rows={entry['rows']}  bytes={entry['bytes']:,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Historical percentile ranks: how extreme is a reading against its own history?
+
+Next to a value column the datasets carry, e.g. for SOFR's `rate`:
+
+  rate_pctile       rank among every observation so far (expanding)
+  rate_pctile_5y    rank within the trailing 5 years
+  rate_pctile_10y   rank within the trailing 10 years
+
+A rank is the current value's average rank within the window × 100 / window
+size — pandas' rank(pct=True), as in put_call's *_pctile. Expanding ranks start
+after MIN_HISTORY_YEARS of history, windowed ranks once the history covers the
+whole window. Windows are calendar years (the same month/day n years back), so
+daily, monthly and quarterly series share one definition.
+
+Batch (`rank_rows`): for every row i, #{j in window(i) : x_j < x_i} is a
+difference of two prefix counts #{j < q : x_j < v}. Values are replaced by
+their dense rank; at each level L positions are cut into aligned blocks of 2^L
+and every block's codes sorted (one global sort per level). A prefix [0, q) is
+the union of the blocks given by the set bits of q, so each count is at most
+log₂ n searchsorted lookups — O(n log² n) for a whole series, vectorized over
+rows. Used by the build-graph recipes (margin, Buffett) and for backfills.
+
+Incremental (`PercentileState`): for the append-only logs (SOFR, Fear & Greed)
+data/state/percentiles/<name>.json keeps the sorted values of every window and
+the last 10 years in time order (to expire values leaving a window). A new
+point costs one bisect per window, O(log n), plus an insertion into the sorted
+lists; ranks are stored with the row in the log and never recomputed.
+
+  python scripts/percentiles.py   # latest ranks of every ranked dataset
+"""
+
+from bisect import bisect_left, bisect_right, insort
+
+import numpy as np
+
+from common import PUBLIC_DIR, STATE_DIR, read_json, write_json
+
+PERCENTILE_STATE_DIR = STATE_DIR / "percentiles"
+WINDOW_YEARS = (5, 10)
+MIN_HISTORY_YEARS = 1
+
+# dataset -> (file, row array key, ranked column) — for the summary below
+RANKED = {
+    "margin":     ("margin_data.json",            "data",       "yoy_growth"),
+    "buffett":    ("buffett_indicator_data.json", "data",       "ratio_pct"),
+    "sofr":       ("sofr_data.json",              "data",       "rate"),
+    "fear_greed": ("fear_greed_index.json",       "historical", "value"),
+}
+
+
+def years_before(date: str, years: int) -> str:
+    """The same ISO date (or month) `years` earlier; string comparison does the rest."""
+    return f"{int(date[:4]) - years:04d}{date[4:]}"
+
+
+def percentile_of(sorted_values: list, value: float) -> float:
+    """Average-rank percentile of `value` in `sorted_values` (which include it)."""
+    less, le = bisect_left(sorted_values, value), bisect_right(sorted_values, value)
+    return round(50 * (less + le + 1) / len(sorted_values), 1)
+
+
+def _fields(key: str) -> dict:
+    """Output field per window: None (expanding) and each of WINDOW_YEARS."""
+    return {None: f"{key}_pctile", **{y: f"{key}_pctile_{y}y" for y in WINDOW_YEARS}}
+
+
+# ── Batch ──────────────────────────────────────────────────────────────────
+
+def _prefix_counter(codes: np.ndarray):
+    """count(q, v) = #{j < q : codes[j] < v}, vectorized over arrays q and v."""
+    n = len(codes)
+    m = int(codes.max()) + 1
+    pos = np.arange(n)
+    levels = [np.sort((pos >> L) * m + codes) for L in range(max(n.bit_length(), 1))]
+
+    def count(q, v):
+        total = np.zeros(len(q), dtype=np.int64)
+        for L, keys in enumerate(levels):
+            base = ((q >> (L + 1)) << 1) * m  # block of size 2^L just below q's bits above L
+            hit = np.searchsorted(keys, base + v) - np.searchsorted(keys, base)
+            total += np.where((q >> L) & 1, hit, 0)
+        return total
+
+    return count
+
+
+def rank_series(dates: list, values) -> dict:
+    """{window years or None: array of percentile ranks (NaN where not defined)} for ascending dates."""
+    x = np.asarray(values, dtype=float)
+    n = len(x)
+    out = {w: np.full(n, np.nan) for w in (None, *WINDOW_YEARS)}
+    if n == 0:
+        return out
+    codes = np.unique(x, return_inverse=True)[1]
+    count = _prefix_counter(codes)
+    d = np.array(dates)
+    end = np.arange(1, n + 1)
+    less_end, le_end = count(end, codes), count(end, codes + 1)
+    for w in out:
+        if w is None:
+            start = np.zeros(n, dtype=np.int64)
+            valid = np.array([years_before(s, MIN_HISTORY_YEARS) for s in dates]) >= d[0]
+        else:
+            cutoff = np.array([years_before(s, w) for s in dates])
+            start = np.searchsorted(d, cutoff, side="right")
+            valid = cutoff >= d[0]
+        less = less_end - count(start, codes)
+        le = le_end - count(start, codes + 1)
+        pct = np.round(50 * (less + le + 1) / (end - start), 1)
+        out[w] = np.where(valid, pct, np.nan)
+    return out
+
+
+def rank_rows(rows: list, key: str, name: str = None) -> list:
+    """
+    Rows with `key`'s percentile fields added (rows lacking `key` get None).
+    With `name`, also saves the incremental state for that series.
+    """
+    idx = [i for i, r in enumerate(rows) if r.get(key) is not None]
+    dates = [rows[i]["date"] for i in idx]
+    ranks = rank_series(dates, [rows[i][key] for i in idx])
+    fields = _fields(key)
+    out = [{**r, **{f: None for f in fields.values()}} for r in rows]
+    for w, field in fields.items():
+        for i, v in zip(idx, ranks[w].tolist()):
+            out[i][field] = None if np.isnan(v) else v
+    if name:
+        through = rows[-1]["date"] if rows else None
+        PercentileState.from_history(name, key, dates, [rows[i][key] for i in idx], through).save()
+    return out
+
+
+# ── Incremental ────────────────────────────────────────────────────────────
+
+class PercentileState:
+    """Persisted order statistics of one series for O(log n) ranks of appended points."""
+
+    def __init__(self, name: str, key: str, state: dict = None):
+        self.name, self.key = name, key
+        state = state or {}
+        self.first = state.get("first")
+        self.through = state.get("through")
+        self.all = state.get("all", [])
+        self.recent = state.get("recent", [])          # [[date, value]] of the longest window, oldest first
+        self.windows = {int(y): v for y, v in state.get("windows", {}).items()}
+        self.start = {int(y): v for y, v in state.get("start", {}).items()}  # index into recent
+
+    @property
+    def path(self):
+        return PERCENTILE_STATE_DIR / f"{self.name}.json"
+
+    @classmethod
+    def load(cls, name: str, key: str):
+        """The saved state, or None if there is none for this series/column."""
+        state = read_json(PERCENTILE_STATE_DIR / f"{name}.json")
+        if not state or state.get("key") != key:
+            return None
+        return cls(name, key, state)
+
+    @classmethod
+    def from_history(cls, name: str, key: str, dates: list, values: list, through: str = None):
+        """State after `dates`/`values` (ascending), built with sorts rather than n inserts."""
+        st = cls(name, key)
+        st.through = through or (dates[-1] if dates else None)
+        if not dates:
+            return st
+        st.first = dates[0]
+        st.all = sorted(values)
+        longest = years_before(dates[-1], max(WINDOW_YEARS))
+        lo = bisect_right(dates, longest)
+        st.recent = [[d, v] for d, v in zip(dates[lo:], values[lo:])]
+        recent_dates = dates[lo:]
+        for y in WINDOW_YEARS:
+            st.start[y] = bisect_right(recent_dates, years_before(dates[-1], y))
+            st.windows[y] = sorted(values[lo + st.start[y]:])
+        return st
+
+    def save(self):
+        write_json(self.path, {
+            "key": self.key, "first": self.first, "through": self.through, "all": self.all,
+            "recent": self.recent, "windows": self.windows, "start": self.start,
+        }, separators=(",", ":"))
+
+    def _remove_last(self):
+        """Undo the latest point (its value is being revised); it is in every window."""
+        value = self.recent.pop()[1]
+        self.all.pop(bisect_left(self.all, value))
+        for lst in self.windows.values():
+            lst.pop(bisect_left(lst, value))
+
+    def update(self, date: str, value: float) -> dict:
+        """Add one point (a revision if `date` is the last one seen) and return its rank fields."""
+        fields = _fields(self.key)
+        if self.through is not None and date < self.through:
+            raise ValueError(f"{self.name}: {date} is before {self.through}; rebuild with rank_rows")
+        if self.recent and self.recent[-1][0] == date:
+            self._remove_last()
+        self.through = date
+        if value is None:
+            return {f: None for f in fields.values()}
+        if self.first is None:
+            self.first = date
+        insort(self.all, value)
+        self.recent.append([date, value])
+        for y in WINDOW_YEARS:
+            lst = self.windows.setdefault(y, [])
+            insort(lst, value)
+            cutoff = years_before(date, y)
+            i = self.start.get(y, 0)
+            while self.recent[i][0] <= cutoff:
+                lst.pop(bisect_left(lst, self.recent[i][1]))
+                i += 1
+            self.start[y] = i
+        drop = min(self.start.values())  # expired from every window
+        if drop:
+            self.recent = self.recent[drop:]
+            self.start = {y: i - drop for y, i in self.start.items()}
+
+        ranks = {fields[None]: percentile_of(self.all, value)
+                 if years_before(date, MIN_HISTORY_YEARS) >= self.first else None}
+        for y in WINDOW_YEARS:
+            ranks[fields[y]] = percentile_of(self.windows[y], value) if years_before(date, y) >= self.first else None
+        return ranks
+
+
+def rank_log(log, key: str) -> PercentileState:
+    """
+    Incremental state for a SeriesLog. If the saved state does not end where
+    the log does, or the log's rows carry no ranks (first run, backfill,
+    interrupted append), the whole log is ranked in batch and rewritten first.
+    """
+    state = PercentileState.load(log.name, key)
+    last = log.last_row() or {}
+    if state is None or state.through != last.get("date") or f"{key}_pctile" not in last:
+        rows = rank_rows(list(log.iter_rows()), key, log.name)
+        log.rewrite(rows)
+        print(f"  Ranked {len(rows)} {log.name} rows by {key} (batch)")
+        state = PercentileState.load(log.name, key)
+    return state
+
+
+def rank_new_rows(state: PercentileState, rows: list) -> list:
+    """`rows` (ascending, from the log's last date on) with their rank fields; older rows dropped."""
+    out = []
+    for r in rows:
+        if state.through is not None and r["date"] < state.through:
+            continue
+        out.append({**r, **state.update(r["date"], r.get(state.key))})
+    return out
+
+
+def main():
+    for dataset, (fname, array_key, key) in RANKED.items():
+        data = read_json(PUBLIC_DIR / fname)
+        rows = (data or {}).get(array_key, [])
+        last = next((r for r in reversed(rows) if r.get(f"{key}_pctile") is not None), None)
+        if last is None:
+            print(f"  {dataset:<11} no ranks yet")
+            continue
+        fields = _fields(key)
+        print(f"  {dataset:<11} {last['date']}  {key}={last[key]}  "
+              + "  ".join(f"{'all' if w is None else f'{w}y'}: {last.get(f)}" for w, f in fields.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Publish stage: minified, content-hashed copies of the datasets.
+
+For every dataset in the manifest this writes
+  public/data/<name>.<hash>.json       minified JSON
+and records the hashed path in the dataset's manifest entry under
+"published". The frontend resolves dataset URLs through the manifest, so
+hashed files can be cached forever; only manifest.json is revalidated.
+Compression is left to the host: Vercel and GitHub Pages both gzip/brotli
+JSON on the fly and serve no precompressed siblings.
+
+The canonical public/*.json files stay pretty-printed for readable diffs.
+
+Runs before the frontend build (stdlib only):
+  python scripts/publish.py
+vercel.json (Cache-Control headers) is read by Vercel before the build runs,
+so it is generated here but committed by the data job, not written during the
+build:
+  python scripts/publish.py --vercel-config
+"""
+
+import hashlib
+import json
+import sys
+
+from common import PUBLIC_DIR, ROOT_DIR, update_json, write_json
+from manifest import DATASETS, LEVELS, MANIFEST_PATH
+
+PUBLISH_DIR  = PUBLIC_DIR / "data"
+VERCEL_PATH  = ROOT_DIR / "vercel.json"
+HASH_CHARS   = 12
+IMMUTABLE    = "public, max-age=31536000, immutable"
+REVALIDATE   = "public, max-age=0, must-revalidate"
+
+
+def minify(obj) -> bytes:
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def write_hashed(stem: str, body: bytes) -> dict:
+    """Write the content-hashed file; returns the publish record."""
+    digest = hashlib.sha256(body).hexdigest()[:HASH_CHARS]
+    name = f"{stem}.{digest}.json"
+    path = PUBLISH_DIR / name
+    if not path.exists():
+        path.write_bytes(body)
+    return {"path": f"data/{name}", "hash": digest, "bytes": len(body)}
+
+
+def prune(stem: str, keep: str):
+    """Remove older hashed generations of one dataset."""
+    for old in PUBLISH_DIR.glob(f"{stem}.*.json*"):
+        if not old.name.startswith(keep):
+            old.unlink()
+
+
+def publish_dataset(name: str) -> dict:
+    fname = DATASETS[name][0]
+    src = PUBLIC_DIR / fname
+    if not src.exists():
+        return None
+    with open(src) as f:
+        body = minify(json.load(f))
+    stem = fname[:-len(".json")]
+    record = write_hashed(stem, body)
+    prune(stem, f"{stem}.{record['hash']}.json")
+    return record
+
+
+def vercel_config() -> dict:
+    return {
+        "buildCommand": "python3 scripts/publish.py && vite build",
+        "outputDirectory": "dist",
+        "framework": None,
+        "headers": [
+            {"source": "/data/(.*)", "headers": [{"key": "Cache-Control", "value": IMMUTABLE}]},
+            {"source": "/manifest.json", "headers": [{"key": "Cache-Control", "value": REVALIDATE}]},
+        ] + [
+            # Unhashed canonical files remain available for older clients and external consumers
+            {"source": f"/{fname}", "headers": [{"key": "Cache-Control", "value": REVALIDATE}]}
+            for fname, _, _ in DATASETS.values()
+        ] + [
+            {"source": "/(.*).delta.json", "headers": [{"key": "Cache-Control", "value": REVALIDATE}]},
+        ] + [
+            {"source": f"/(.*).{points}.json", "headers": [{"key": "Cache-Control", "value": REVALIDATE}]}
+            for points in LEVELS
+        ],
+    }
+
+
+def main():
+    if "--vercel-config" in sys.argv:
+        write_json(VERCEL_PATH, vercel_config(), indent=2)
+        print(f"Wrote {VERCEL_PATH.name}")
+        return
+    PUBLISH_DIR.mkdir(parents=True, exist_ok=True)
+    records = {}
+    for name in DATASETS:
+        record = publish_dataset(name)
+        if record is None:
+            continue
+        records[name] = record
+        raw = (PUBLIC_DIR / DATASETS[name][0]).stat().st_size
+        print(f"  {name:<11} {raw:>9,} → min={record['bytes']:,}  {record['path']}")
+
+    def apply(manifest):
+        for name, record in records.items():
+            entry = manifest.setdefault("datasets", {}).get(name)
+            if entry is not None:
+                entry["published"] = record
+        return manifest
+
+    update_json(MANIFEST_PATH, apply, indent=2)
+    print(f"Published {len(records)} dataset(s) to {PUBLISH_DIR}")
+
+
+if __name__ == "__main__":
+    main()
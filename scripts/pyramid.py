@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Resolution pyramids for the long daily series: public/<file>.<points>.json.
+
+A chart a few hundred pixels wide can't show more than ~1,000 points, so next
+to each full file the fetchers write reduced copies with at most LEVELS
+points each (same layout as the full file, compact, plus a "level" field):
+
+  sofr_data.250.json, sofr_data.1000.json, sofr_data.json (full)
+
+Rows are chosen by Largest-Triangle-Three-Buckets on the dataset's main value,
+which keeps the visual shape of the line. Datasets with an envelope (SOFR's
+1st/99th percentiles) split the budget: half LTTB on the value, half min/max
+decimation of the envelope, so month-end spikes survive at every level.
+Selected rows are copied unchanged, never averaged.
+
+The manifest lists each dataset's levels; the dashboard draws the smallest one
+that still gives enough points for the visible range, then swaps in the full
+file (src/utils/manifest.js: pickLevel).
+
+  python scripts/pyramid.py            # rebuild levels from the files in public/
+"""
+
+import json
+
+import numpy as np
+
+from common import PUBLIC_DIR, write_json
+from manifest import LEVELS, level_path
+
+# dataset -> (full file, row array key, value column, envelope columns (low, high) or None)
+PYRAMID_DATASETS = {
+    "sofr":       ("sofr_data.json",        "data",       "rate",  ("percentile_1", "percentile_99")),
+    "fear_greed": ("fear_greed_index.json", "historical", "value", None),
+}
+
+
+def _number(v) -> float:
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return np.nan  # missing, or a placeholder such as "NA"
+
+
+def _column(rows: list, key: str) -> np.ndarray:
+    return np.array([_number(r.get(key)) for r in rows], dtype=float)
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n: int) -> np.ndarray:
+    """
+    Indices of the n points Largest-Triangle-Three-Buckets keeps: the first and
+    last points, plus from each of n-2 equal-count buckets the point forming
+    the largest triangle with the previously kept point and the next bucket's mean.
+    """
+    size = len(y)
+    if n >= size or n < 3:
+        return np.arange(size)
+    edges = (np.arange(n - 1) * (size - 2) / (n - 2)).astype(int) + 1
+    edges[-1] = size - 1
+    keep = np.empty(n, dtype=int)
+    keep[0], keep[-1] = 0, size - 1
+    a = 0
+    for i in range(n - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nlo, nhi = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (size - 1, size)
+        cx = x[nlo:nhi].mean()
+        cy = np.nanmean(y[nlo:nhi]) if np.isfinite(y[nlo:nhi]).any() else y[a]
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(np.nan_to_num(area, nan=-1.0)))
+        keep[i + 1] = a
+    return keep
+
+
+def minmax(low: np.ndarray, high: np.ndarray, n: int) -> np.ndarray:
+    """Indices of the lowest `low` and highest `high` row in each of n/2 equal-count buckets."""
+    size = len(low)
+    buckets = max(n // 2, 1)
+    if 2 * buckets >= size:
+        return np.arange(size)
+    bucket = np.arange(size) * buckets // size
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    # lexsort: by bucket, then value (NaN last), so each bucket's first entry is its extreme
+    lows = np.lexsort((low, bucket))[starts]
+    highs = np.lexsort((-high, bucket))[starts]
+    return np.union1d(lows, highs)
+
+
+def decimate(rows: list, value: str, envelope, n: int) -> np.ndarray:
+    """Sorted indices of at most n rows to keep."""
+    x = np.array([r["date"] for r in rows], dtype="datetime64[D]").astype(float)
+    y = _column(rows, value)
+    if not envelope:
+        return lttb(x, y, n)
+    return np.union1d(lttb(x, y, n // 2), minmax(_column(rows, envelope[0]), _column(rows, envelope[1]), n // 2))
+
+
+def write_levels(dataset: str, output: dict) -> list:
+    """
+    Write every pyramid level of `dataset` from its publish output. `output`'s
+    row array may be a streamed view (series_log.LogRows). Levels that would
+    not be smaller than the full file are removed instead.
+    """
+    fname, array_key, value, envelope = PYRAMID_DATASETS[dataset]
+    rows = list(output.get(array_key, []))
+    meta = {k: v for k, v in output.items() if k != array_key}
+    written = []
+    for points in LEVELS:
+        path = level_path(fname, points)
+        if len(rows) <= points:
+            path.unlink(missing_ok=True)
+            continue
+        keep = decimate(rows, value, envelope, points)
+        level = {"points": points, "rows": int(len(keep)), "of": len(rows)}
+        write_json(path, {**meta, "level": level, array_key: [rows[i] for i in keep]},
+                   separators=(",", ":"))
+        written.append(level)
+    if written:
+        print("  Levels: " + ", ".join(f"{lv['rows']}/{lv['of']}" for lv in written)
+              + f" rows → {level_path(fname, '*').name}")
+    return written
+
+
+def main():
+    for dataset, (fname, _, _, _) in PYRAMID_DATASETS.items():
+        path = PUBLIC_DIR / fname
+        if not path.exists():
+            print(f"  {dataset}: {fname} missing — skipped")
+            continue
+        with open(path) as f:
+            write_levels(dataset, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
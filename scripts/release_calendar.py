@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Predict when each source can next have new data, so fetchers can skip
+runs where no release could have happened yet.
+
+Rules are deliberately conservative: each window opens at the *earliest*
+plausible publication date, so an early release is never missed. Once a
+window opens the fetcher runs on every invocation until the new point shows
+up in the stored data.
+
+  finra       monthly; month M published around the 3rd week of M+1
+              (window opens on the 15th of M+1)
+  ppi         monthly; month M published by BLS around mid M+1
+              (window opens on the 9th of M+1; release days vary 9th–16th)
+  aaii        monthly survey; month M published in the first days of M+1
+  gdp         quarterly; BEA advance / second / third estimates near the end
+              of the 1st / 2nd / 3rd month after quarter end (window opens the 22nd)
+  sofr        NY Fed business days (Federal Reserve holiday calendar)
+  fear_greed  NYSE trading days
+  put_call    NYSE trading days
+  buffett     daily Wilshire on NYSE trading days, or a new GDP estimate
+
+Fetchers call `should_fetch(<manifest dataset>)`; pass --force on the
+command line (or set FORCE_FETCH=1) to bypass the calendar. --reprocess runs
+(archive.py) never touch the network and always go ahead.
+
+  python scripts/release_calendar.py        # show next expected release per source
+"""
+
+import os
+import sys
+from datetime import date, datetime, timedelta
+
+from archive import REPROCESS
+from manifest import load_manifest
+
+FORCE = "--force" in sys.argv or os.environ.get("FORCE_FETCH") == "1"
+
+MON, TUE, WED, THU, FRI, SAT, SUN = range(7)
+
+
+# ── Holiday calendars ──────────────────────────────────────────────────────
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """n-th `weekday` of a month (n=-1 for the last one)."""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    nxt = date(year + month // 12, month % 12 + 1, 1)
+    last = nxt - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _easter(year: int) -> date:
+    """Gregorian Easter Sunday (anonymous Gregorian algorithm)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def fed_holidays(year: int) -> set:
+    """Federal Reserve holidays. Sunday holidays move to Monday; Saturday ones are not observed."""
+    fixed = [date(year, 1, 1), date(year, 7, 4), date(year, 11, 11), date(year, 12, 25)]
+    if year >= 2022:
+        fixed.append(date(year, 6, 19))
+    days = {d + timedelta(days=1) if d.weekday() == SUN else d for d in fixed if d.weekday() != SAT}
+    days |= {
+        _nth_weekday(year, 1, MON, 3),    # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, MON, 3),    # Washington's Birthday
+        _nth_weekday(year, 5, MON, -1),   # Memorial Day
+        _nth_weekday(year, 9, MON, 1),    # Labor Day
+        _nth_weekday(year, 10, MON, 2),   # Columbus Day
+        _nth_weekday(year, 11, THU, 4),   # Thanksgiving
+    }
+    return days
+
+
+def nyse_holidays(year: int) -> set:
+    """NYSE full-day closures. Saturday holidays move to Friday (except New Year's), Sunday to Monday."""
+    fixed = [date(year, 1, 1), date(year, 7, 4), date(year, 12, 25)]
+    if year >= 2022:
+        fixed.append(date(year, 6, 19))
+    days = set()
+    for d in fixed:
+        if d.weekday() == SUN:
+            days.add(d + timedelta(days=1))
+        elif d.weekday() == SAT:
+            if d.month != 1:
+                days.add(d - timedelta(days=1))
+        else:
+            days.add(d)
+    days |= {
+        _nth_weekday(year, 1, MON, 3),
+        _nth_weekday(year, 2, MON, 3),
+        _easter(year) - timedelta(days=2),  # Good Friday
+        _nth_weekday(year, 5, MON, -1),
+        _nth_weekday(year, 9, MON, 1),
+        _nth_weekday(year, 11, THU, 4),
+    }
+    return days
+
+
+def is_business_day(d: date, holidays=fed_holidays) -> bool:
+    return d.weekday() < SAT and d not in holidays(d.year)
+
+
+def next_business_day(d: date, holidays=fed_holidays) -> date:
+    d += timedelta(days=1)
+    while not is_business_day(d, holidays):
+        d += timedelta(days=1)
+    return d
+
+
+# ── Release rules ──────────────────────────────────────────────────────────
+
+def _parse_date(s: str) -> date:
+    s = str(s)[:10]
+    return datetime.strptime(s, "%Y-%m-%d").date() if len(s) == 10 else datetime.strptime(s[:7], "%Y-%m").date()
+
+
+def _add_months(d: date, n: int) -> date:
+    y, m = divmod(d.month - 1 + n, 12)
+    return date(d.year + y, m + 1, 1)
+
+
+def monthly_release(last_date: str, open_day: int, lag_months: int = 2) -> date:
+    """Window for the month after `last_date`: `open_day` of the month `lag_months` after last_date."""
+    return _add_months(_parse_date(last_date).replace(day=1), lag_months).replace(day=open_day)
+
+
+def gdp_windows(quarter_start: date) -> list:
+    """Advance / second / third estimate windows for the quarter beginning `quarter_start`."""
+    quarter_end_month = _add_months(quarter_start, 3)  # first day of the month after quarter end
+    return [_add_months(quarter_end_month, k).replace(day=22) for k in range(3)]
+
+
+def gdp_release(last_date: str, last_fetch: date = None) -> date:
+    """Next GDP estimate window after the last fetch: a revision of the last quarter or the next advance."""
+    q = _parse_date(last_date).replace(day=1)
+    candidates = gdp_windows(q)[1:] + gdp_windows(_add_months(q, 3))[:1]
+    after = last_fetch or date.min
+    future = [w for w in candidates if w > after]
+    return min(future) if future else candidates[-1]
+
+
+def next_release(source: str, last_date: str, last_fetch: date = None, extra: dict = None) -> date:
+    """Date on which new data for `source` could first be available, given its last stored point."""
+    if source == "margin":
+        return monthly_release(last_date, 15)
+    if source == "ppi":
+        return monthly_release(last_date, 9)
+    if source == "aaii":
+        return monthly_release(last_date, 1)
+    if source == "gdp":
+        return gdp_release(last_date, last_fetch)
+    if source == "sofr":
+        return next_business_day(_parse_date(last_date), fed_holidays)
+    if source in ("fear_greed", "put_call"):
+        return next_business_day(_parse_date(last_date), nyse_holidays)
+    if source == "buffett":
+        extra = extra or {}
+        as_of = extra.get("as_of") or last_date
+        wilshire = next_business_day(_parse_date(as_of), nyse_holidays)
+        if extra.get("gdp_date"):
+            return min(wilshire, gdp_release(extra["gdp_date"], last_fetch))
+        return wilshire
+    raise KeyError(f"No release rule for {source!r}")
+
+
+def should_fetch(dataset: str, today: date = None) -> bool:
+    """
+    True if `dataset` (a manifest name) may have new data today.
+
+    Prints the decision. Unknown state (no manifest entry), --force,
+    FORCE_FETCH=1 and --reprocess always fetch.
+    """
+    if REPROCESS:
+        return True
+    if FORCE:
+        print(f"Release calendar: --force, fetching {dataset}")
+        return True
+    entry = load_manifest().get("datasets", {}).get(dataset)
+    if not entry or not entry.get("latest_date"):
+        return True
+    today = today or date.today()
+    last_fetch = _parse_date(entry["last_updated"]) if entry.get("last_updated") else None
+    expected = next_release(dataset, entry["latest_date"], last_fetch, entry.get("headline"))
+    if today >= expected:
+        print(f"Release calendar: {dataset} window open since {expected} (latest stored {entry['latest_date']})")
+        return True
+    print(f"Release calendar: no new {dataset} data expected before {expected} "
+          f"(latest stored {entry['latest_date']}); skipping fetch. Use --force to override.")
+    return False
+
+
+def main():
+    datasets = load_manifest().get("datasets", {})
+    today = date.today()
+    for name, entry in sorted(datasets.items()):
+        last_fetch = _parse_date(entry["last_updated"]) if entry.get("last_updated") else None
+        try:
+            expected = next_release(name, entry["latest_date"], last_fetch, entry.get("headline"))
+        except KeyError:
+            continue
+        state = "OPEN" if today >= expected else "closed"
+        print(f"  {name:<11} latest={entry['latest_date']:<11} next window={expected}  [{state}]")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Refresh data sources on their own cadences instead of all at once.
+
+Each source has a refresh interval matched to how often it publishes
+(SOFR and Fear & Greed daily, FINRA / AAII / PPI monthly-ish, ...). The
+scheduler keeps the last attempt and last success per source in
+data/state/scheduler_state.json and only runs fetchers that are due.
+
+Stale-while-revalidate: a refresh never deletes or truncates the published
+file. Fetchers replace their output in one step when they finish, so the
+previous file keeps being served while the refresh runs and stays in place
+if it fails (a failed source is retried after RETRY_AFTER, not the full
+cadence).
+
+--force and --all also set FORCE_FETCH=1 for the fetchers they start, so each
+one fetches even outside its release window (release_calendar.should_fetch);
+--due-only and the daemon leave that check to the fetchers.
+
+Usage:
+  python scripts/scheduler.py --due-only      # one pass: run due sources, then exit
+  python scripts/scheduler.py                 # daemon: loop forever, waking every --interval seconds
+  python scripts/scheduler.py --force sofr    # run named sources now regardless of cadence
+  python scripts/scheduler.py --all           # run every source now
+  python scripts/scheduler.py --list          # show when each source is next due
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from common import STATE_DIR, read_json, update_json
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+STATE_PATH  = STATE_DIR / "scheduler_state.json"
+
+# source -> (fetch script, refresh cadence)
+SOURCES = {
+    "sofr":       ("fetch_sofr_data.py",         timedelta(hours=20)),
+    "fear_greed": ("fetch_fear_greed.py",        timedelta(hours=20)),
+    "buffett":    ("fetch_buffett_indicator.py", timedelta(days=1)),
+    "put_call":   ("fetch_cboe_putcall.py",      timedelta(days=1)),
+    "ppi":        ("fetch_ppi_data.py",          timedelta(days=7)),
+    "finra":      ("fetch_finra_data.py",        timedelta(days=7)),
+    "aaii":       ("fetch_aaii_allocation.py",   timedelta(days=7)),
+    "sector_backtest": ("backtest_zscores.py",   timedelta(days=7)),
+    "correlations":    ("correlations.py",       timedelta(days=7)),
+    "changepoints":    ("changepoints.py",       timedelta(days=1)),
+}
+
+RETRY_AFTER     = timedelta(hours=6)   # after a failure, try again sooner than the cadence
+FETCH_TIMEOUT_S = 15 * 60
+MAX_CONCURRENT  = 4
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _iso(dt: datetime) -> str:
+    return dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _parse(ts):
+    if not ts:
+        return None
+    return datetime.strptime(ts, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+
+
+def load_state() -> dict:
+    return read_json(STATE_PATH, {})
+
+
+def next_due(name: str, state: dict) -> datetime:
+    """When `name` should next run: cadence after last success, RETRY_AFTER after a failure."""
+    _, cadence = SOURCES[name]
+    entry = state.get(name, {})
+    last_success = _parse(entry.get("last_success"))
+    last_attempt = _parse(entry.get("last_attempt"))
+    if entry.get("last_status") == "failed" and last_attempt:
+        return last_attempt + RETRY_AFTER
+    if last_success:
+        return last_success + cadence
+    return datetime.min.replace(tzinfo=timezone.utc)
+
+
+def due_sources(state: dict, now: datetime = None) -> list:
+    now = now or _now()
+    return [name for name in SOURCES if next_due(name, state) <= now]
+
+
+def record_result(name: str, started: datetime, ok: bool, duration_s: float, returncode: int):
+    def apply(state):
+        entry = state.setdefault(name, {})
+        entry["last_attempt"] = _iso(started)
+        entry["last_status"] = "ok" if ok else "failed"
+        entry["last_duration_s"] = round(duration_s, 1)
+        entry["last_returncode"] = returncode
+        if ok:
+            entry["last_success"] = _iso(started)
+            entry["consecutive_failures"] = 0
+        else:
+            entry["consecutive_failures"] = entry.get("consecutive_failures", 0) + 1
+        return state
+
+    update_json(STATE_PATH, apply, indent=2, sort_keys=True)
+
+
+async def run_source(name: str, sem: asyncio.Semaphore, force: bool = False) -> bool:
+    script, _ = SOURCES[name]
+    async with sem:
+        started = _now()
+        t0 = time.monotonic()
+        print(f"[{_iso(started)}] {name}: starting {script}", flush=True)
+        proc = await asyncio.create_subprocess_exec(
+            sys.executable, str(SCRIPTS_DIR / script),
+            cwd=str(SCRIPTS_DIR.parent),
+            env={**os.environ, "FORCE_FETCH": "1"} if force else None,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+        )
+        try:
+            out, _ = await asyncio.wait_for(proc.communicate(), timeout=FETCH_TIMEOUT_S)
+        except asyncio.TimeoutError:
+            proc.kill()
+            out, _ = await proc.communicate()
+            print(f"  {name}: timed out after {FETCH_TIMEOUT_S}s")
+        duration = time.monotonic() - t0
+        ok = proc.returncode == 0
+        print(f"=== {name} ({'ok' if ok else f'exit {proc.returncode}'}, {duration:.1f}s) ===")
+        print(out.decode(errors="replace"), flush=True)
+        record_result(name, started, ok, duration, proc.returncode)
+        return ok
+
+
+async def run_pass(names: list, force: bool = False) -> dict:
+    sem = asyncio.Semaphore(MAX_CONCURRENT)
+    results = await asyncio.gather(*(run_source(n, sem, force) for n in names))
+    return dict(zip(names, results))
+
+
+def print_schedule(state: dict):
+    now = _now()
+    for name in SOURCES:
+        due = next_due(name, state)
+        entry = state.get(name, {})
+        when = "now" if due <= now else _iso(due)
+        print(f"  {name:<11} due={when:<21} last_success={entry.get('last_success', 'never')}")
+
+
+async def daemon(interval_s: int):
+    print(f"Scheduler running; checking every {interval_s}s")
+    while True:
+        names = due_sources(load_state())
+        if names:
+            await run_pass(names)
+        await asyncio.sleep(interval_s)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--due-only", action="store_true", help="run due sources once and exit")
+    parser.add_argument("--force", nargs="+", choices=sorted(SOURCES), metavar="SOURCE",
+                        help="run these sources now regardless of cadence and release calendar")
+    parser.add_argument("--all", action="store_true", help="run every source now, as --force")
+    parser.add_argument("--list", action="store_true", help="print the schedule and exit")
+    parser.add_argument("--interval", type=int, default=15 * 60, help="daemon wake-up interval (seconds)")
+    args = parser.parse_args()
+
+    state = load_state()
+    if args.list:
+        print_schedule(state)
+        return
+
+    if args.all:
+        args.force = list(SOURCES)
+
+    if args.force or args.due_only:
+        names = args.force or due_sources(state)
+        if not names:
+            print("No sources due.")
+            print_schedule(state)
+            return
+        print(f"Running: {', '.join(names)}")
+        results = asyncio.run(run_pass(names, force=bool(args.force)))
+        failed = [n for n, ok in results.items() if not ok]
+        for n in failed:
+            print(f"::warning::{n} fetch failed — serving previous data")
+        return
+
+    asyncio.run(daemon(args.interval))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Append-only NDJSON logs for daily series (data/series/<name>.ndjson).
+
+One compact JSON row per line, ascending by key, followed by a single footer
+line that indexes the file:
+
+  {"date":"2018-04-02","rate":1.8,...}
+  ...
+  {"_index":{"rows":2004,"last_key":"2026-10-16","last_offset":301872}}
+
+`last_offset` is the byte offset of the last row, so the last key is read by
+seeking to the tail and a revised last row is replaced by truncating there.
+Appending new rows costs O(new rows): truncate the footer, write the rows,
+write a new footer. The published JSON is regenerated by streaming rows from
+the log (`publish`), never holding the full history as one list.
+
+A log without a valid footer (e.g. a crash mid-append) is re-indexed by a
+full scan the next time it is opened.
+
+  python scripts/series_log.py sofr     # show a log's index
+"""
+
+import json
+import os
+import sys
+from collections.abc import Sequence
+
+from common import SERIES_DIR, atomic_write
+
+TAIL_BYTES = 4096  # the footer always fits in this
+
+
+def _row_line(row: dict) -> bytes:
+    return (json.dumps(row, separators=(",", ":")) + "\n").encode()
+
+
+def _footer_line(index: dict) -> bytes:
+    return (json.dumps({"_index": index}, separators=(",", ":")) + "\n").encode()
+
+
+class SeriesLog:
+    """An append-only row log keyed by `key` (ISO dates sort correctly as strings)."""
+
+    def __init__(self, name: str, key: str = "date"):
+        self.name = name
+        self.key = key
+        self.path = SERIES_DIR / f"{name}.ndjson"
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    # ── Index ───────────────────────────────────────────────────────────────
+
+    def index(self) -> dict:
+        """Footer of the log: rows, last_key, last_offset, plus footer_offset (where it starts)."""
+        if not self.exists():
+            return {"rows": 0, "last_key": None, "last_offset": None, "footer_offset": 0}
+        with open(self.path, "rb") as f:
+            size = f.seek(0, os.SEEK_END)
+            f.seek(max(0, size - TAIL_BYTES))
+            tail = f.read()
+        line = tail.rstrip(b"\n").rsplit(b"\n", 1)[-1]
+        try:
+            index = json.loads(line)["_index"]
+        except (ValueError, KeyError, TypeError):
+            return self._reindex()
+        return {**index, "footer_offset": size - len(line) - 1}
+
+    def _reindex(self) -> dict:
+        """Rebuild a missing/corrupt footer by scanning the whole file."""
+        print(f"  {self.path.name}: no valid index footer — rescanning")
+        rows, last_key, last_offset, end = 0, None, None, 0
+        with open(self.path, "rb") as f:
+            while True:
+                offset = f.tell()
+                line = f.readline()
+                if not line.endswith(b"\n"):
+                    break  # EOF, or a torn final line from an interrupted append
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    break
+                if "_index" not in row:
+                    rows, last_key, last_offset = rows + 1, row[self.key], offset
+                end = f.tell()
+        index = {"rows": rows, "last_key": last_key, "last_offset": last_offset}
+        with open(self.path, "r+b") as f:
+            f.truncate(end)
+            f.seek(end)
+            f.write(_footer_line(index))
+        return {**index, "footer_offset": end}
+
+    def last_key(self):
+        return self.index()["last_key"]
+
+    def last_row(self) -> dict:
+        index = self.index()
+        if index["last_offset"] is None:
+            return None
+        with open(self.path, "rb") as f:
+            f.seek(index["last_offset"])
+            return json.loads(f.readline())
+
+    # ── Writing ─────────────────────────────────────────────────────────────
+
+    def append(self, rows: list) -> int:
+        """
+        Append rows (ascending by key) that are not yet in the log.
+
+        Rows older than the last stored key are ignored — history is only
+        rewritten by `rewrite`. A row for the last stored key replaces the
+        stored one if it differs (e.g. an intraday value that has since
+        settled). Returns the number of rows written.
+        """
+        index = self.index()
+        last_key = index["last_key"]
+        new = [r for r in rows if last_key is None or r[self.key] >= last_key]
+        skipped = len(rows) - len(new)
+        if skipped:
+            print(f"  {self.path.name}: ignored {skipped} row(s) at or before {last_key}")
+
+        cut, count = index["footer_offset"], index["rows"]
+        if new and new[0][self.key] == last_key:
+            if new[0] == self.last_row():
+                new = new[1:]
+            else:
+                cut, count = index["last_offset"], count - 1
+        if not new:
+            return 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "r+b" if self.exists() else "w+b") as f:
+            f.truncate(cut)
+            f.seek(cut)
+            for row in new:
+                last_offset = f.tell()
+                f.write(_row_line(row))
+            f.write(_footer_line({"rows": count + len(new), "last_key": new[-1][self.key],
+                                  "last_offset": last_offset}))
+        return len(new)
+
+    def rewrite(self, rows) -> int:
+        """Replace the whole log (backfill / seeding). `rows` may be any iterable, ascending by key."""
+        count, last_key, last_offset = 0, None, None
+        with atomic_write(self.path, "wb") as f:
+            for row in rows:
+                last_offset = f.tell()
+                f.write(_row_line(row))
+                count, last_key = count + 1, row[self.key]
+            f.write(_footer_line({"rows": count, "last_key": last_key, "last_offset": last_offset}))
+        return count
+
+    # ── Reading ─────────────────────────────────────────────────────────────
+
+    def iter_rows(self):
+        """Stream rows from the start of the log."""
+        if not self.exists():
+            return
+        with open(self.path, "rb") as f:
+            for line in f:
+                row = json.loads(line)
+                if "_index" in row:
+                    return
+                yield row
+
+    def rows(self) -> "LogRows":
+        return LogRows(self)
+
+    def publish(self, path, meta: dict, array_key: str, indent: int = None):
+        """
+        Write {**meta, array_key: rows} to `path` by streaming the log.
+
+        Output is byte-identical to json.dump(..., indent=indent) — or, with
+        indent=None, to json.dump(..., separators=(",", ":")) — so switching a
+        fetcher to the log doesn't churn its published file.
+        """
+        item_sep, key_sep = (",", ": ") if indent else (",", ":")
+        nl, pad = ("\n", " " * indent) if indent else ("", "")
+
+        def dump(value, level):
+            text = json.dumps(value, indent=indent, separators=(item_sep, key_sep))
+            return text.replace("\n", "\n" + pad * level) if indent else text
+
+        with atomic_write(path) as f:
+            f.write("{")
+            for k, v in meta.items():
+                f.write(f"{nl}{pad}{json.dumps(k)}{key_sep}{dump(v, 1)}{item_sep}")
+            f.write(f"{nl}{pad}{json.dumps(array_key)}{key_sep}[")
+            first = True
+            for row in self.iter_rows():
+                f.write(("" if first else item_sep) + nl + pad * 2 + dump(row, 2))
+                first = False
+            f.write(("" if first else nl + pad) + "]" + nl + "}")
+
+
+class LogRows(Sequence):
+    """
+    Read-only view of a log's rows: len() and [-1] come from the footer,
+    iteration streams the file. Lets the manifest, delta and staleness
+    helpers take the log wherever they expect a row list.
+    """
+
+    def __init__(self, log: SeriesLog):
+        self.log = log
+
+    def __len__(self):
+        return self.log.index()["rows"]
+
+    def __iter__(self):
+        return self.log.iter_rows()
+
+    def __getitem__(self, i):
+        if i == -1 or i == len(self) - 1:
+            row = self.log.last_row()
+            if row is None:
+                raise IndexError(i)
+            return row
+        for n, row in enumerate(self.log.iter_rows()):
+            if n == i % len(self):
+                return row
+        raise IndexError(i)
+
+
+def main():
+    name = sys.argv[1] if len(sys.argv) > 1 else "sofr"
+    log = SeriesLog(name)
+    if not log.exists():
+        print(f"{log.path} does not exist")
+        return
+    index = log.index()
+    print(f"{log.path}: {index['rows']} rows, last {index['last_key']} "
+          f"(offset {index['last_offset']}), {log.path.stat().st_size:,} bytes")
+
+
+if __name__ == "__main__":
+    main()
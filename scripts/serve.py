@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Local read API over the published datasets (stdlib asyncio, no framework).
+
+Every dataset in manifest.DATASETS is loaded once into columns: a sorted date
+list plus one list per field. Queries binary-search the dates, so the cost of
+a request depends on the rows it returns, not on the length of the history.
+
+  GET /series                       datasets with their fields, row counts and date span
+  GET /series/<name>?start=&end=&fields=&resolution=
+      start, end    ISO dates or months, inclusive (either may be omitted);
+                    a month bound covers the whole month of a daily series
+      fields        comma-separated columns (default: all)
+      resolution    raw (default) | weekly | monthly | quarterly — last row of
+                    each period, indexed at load time — or an integer N: at
+                    most N evenly spaced rows, always ending on the last one
+  GET /health                       loaded datasets and their versions
+
+Responses are columnar JSON ({"date": [...], "<field>": [...]}), gzip-encoded
+when the client accepts it, with an ETag derived from the file's sha256 and
+the query, so If-None-Match revalidation returns 304 without a body. Files are
+polled every RELOAD_INTERVAL_S; a fetcher's atomic rewrite is picked up by the
+next poll and swapped in whole, so a request never sees a half-loaded dataset.
+
+  python scripts/serve.py                  # http://127.0.0.1:8765
+  python scripts/serve.py --port 9000 --host 0.0.0.0
+  curl 'localhost:8765/series/sofr?start=2026-01&fields=rate,rate_pctile'
+"""
+
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from datetime import date as Date
+from http import HTTPStatus
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from common import PUBLIC_DIR
+from manifest import DATASETS
+
+DEFAULT_PORT = 8765
+RELOAD_INTERVAL_S = 1.0
+GZIP_MIN_BYTES = 1024
+CACHE_ENTRIES = 256
+MAX_HEADER_BYTES = 16 * 1024
+
+# resolution -> period key of an ISO date string
+PERIODS = {
+    "weekly":    lambda d: Date.fromisoformat(d[:10]).isocalendar()[:2] if len(d) >= 10 else d[:7],
+    "monthly":   lambda d: d[:7],
+    "quarterly": lambda d: (d[:4], (int(d[5:7]) - 1) // 3),
+}
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def _minify(obj) -> bytes:
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+# ── Columnar datasets ──────────────────────────────────────────────────────
+
+class Dataset:
+    """One dataset file as columns, with a date index per resolution."""
+
+    def __init__(self, name: str):
+        fname, rows_fn, _ = DATASETS[name]
+        self.name = name
+        self.path = PUBLIC_DIR / fname
+        self.mtime_ns = self.path.stat().st_mtime_ns
+        raw = self.path.read_bytes()
+        self.version = hashlib.sha256(raw).hexdigest()[:16]
+        data = json.loads(raw)
+        rows = [r for r in rows_fn(data) if r.get("date")]
+        self.last_updated = data.get("last_updated")
+        self.dates = [r["date"] for r in rows]
+        self.fields = list(dict.fromkeys(k for r in rows for k in r if k != "date"))
+        self.columns = {f: [r.get(f) for r in rows] for f in self.fields}
+        # resolution -> (dates of the kept rows, their row indices)
+        self.index = {"raw": (self.dates, None)}
+        for res, period in PERIODS.items():
+            keys = [period(d) for d in self.dates]
+            keep = [i for i in range(len(keys)) if i + 1 == len(keys) or keys[i + 1] != keys[i]]
+            self.index[res] = ([self.dates[i] for i in keep], keep)
+
+    def describe(self) -> dict:
+        return {
+            "rows":         len(self.dates),
+            "start":        self.dates[0] if self.dates else None,
+            "end":          self.dates[-1] if self.dates else None,
+            "fields":       self.fields,
+            "version":      self.version,
+            "last_updated": self.last_updated,
+        }
+
+    def _bounds(self, dates: list, start: str, end: str):
+        """Slice [lo, hi) of `dates` within start..end (inclusive, prefix-aware)."""
+        width = len(dates[0]) if dates else 10
+        lo = bisect_left(dates, start[:width]) if start else 0
+        hi = bisect_right(dates, end[:width] + "\uffff") if end else len(dates)
+        return lo, hi
+
+    def query(self, start: str = None, end: str = None, fields: list = None, resolution: str = None) -> dict:
+        fields = fields or self.fields
+        unknown = [f for f in fields if f not in self.columns]
+        if unknown:
+            raise BadRequest(f"unknown field(s) {', '.join(unknown)}; available: {', '.join(self.fields)}")
+
+        points = None
+        if resolution and resolution.isdigit():
+            points, resolution = int(resolution), "raw"
+            if points < 1:
+                raise BadRequest("resolution must be a positive number of points")
+        resolution = resolution or "raw"
+        if resolution not in self.index:
+            raise BadRequest(f"unknown resolution {resolution!r}; use raw, {', '.join(PERIODS)} or a point count")
+
+        dates, rows = self.index[resolution]
+        lo, hi = self._bounds(dates, start, end)
+        if rows is None:
+            sel = range(lo, hi)
+        else:
+            sel = rows[lo:hi]
+        if points and len(sel) > points:
+            step = -(-len(sel) // points)
+            sel = sel[::-1][::step][::-1]  # keep the last row
+        out = {"name": self.name, "version": self.version, "resolution": resolution if points is None else points,
+               "rows": len(sel)}
+        if isinstance(sel, range) and sel.step == 1:
+            out["date"] = self.dates[sel.start:sel.stop]
+            out.update({f: self.columns[f][sel.start:sel.stop] for f in fields})
+        else:
+            out["date"] = [self.dates[i] for i in sel]
+            out.update({f: [self.columns[f][i] for i in sel] for f in fields})
+        return out
+
+
+class Store:
+    """The loaded datasets; reloads any whose file changed since it was read."""
+
+    def __init__(self):
+        self.datasets = {}
+        self.cache = OrderedDict()  # (name, version, query) -> (etag, body, gzipped body)
+
+    def refresh(self) -> list:
+        """(Re)load new or rewritten files; returns the names that changed."""
+        changed = []
+        for name, (fname, _, _) in DATASETS.items():
+            path = PUBLIC_DIR / fname
+            current = self.datasets.get(name)
+            try:
+                mtime = path.stat().st_mtime_ns
+            except FileNotFoundError:
+                if current:
+                    del self.datasets[name]
+                    changed.append(name)
+                continue
+            if current and current.mtime_ns == mtime:
+                continue
+            try:
+                self.datasets[name] = Dataset(name)
+            except (OSError, ValueError) as e:
+                print(f"  {name}: reload failed ({e}); keeping the loaded version")
+                continue
+            changed.append(name)
+        return changed
+
+    def response(self, name: str, params: dict):
+        """(etag, body, gzipped body) for one query, memoized per dataset version."""
+        ds = self.datasets.get(name)
+        if ds is None:
+            raise KeyError(name)
+        key = (name, ds.version, tuple(sorted(params.items())))
+        hit = self.cache.get(key)
+        if hit:
+            self.cache.move_to_end(key)
+            return hit
+        fields = [f for f in params.get("fields", "").split(",") if f]
+        body = _minify(ds.query(params.get("start"), params.get("end"), fields, params.get("resolution")))
+        etag = '"' + hashlib.sha256(repr(key).encode()).hexdigest()[:20] + '"'
+        entry = (etag, body, gzip.compress(body, compresslevel=5, mtime=0) if len(body) >= GZIP_MIN_BYTES else None)
+        self.cache[key] = entry
+        if len(self.cache) > CACHE_ENTRIES:
+            self.cache.popitem(last=False)
+        return entry
+
+
+# ── HTTP ───────────────────────────────────────────────────────────────────
+
+def _head(status: HTTPStatus, headers: dict) -> bytes:
+    lines = [f"HTTP/1.1 {status.value} {status.phrase}"] + [f"{k}: {v}" for k, v in headers.items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+def _json_response(status: HTTPStatus, obj) -> tuple:
+    return status, {"Content-Type": "application/json"}, _minify(obj)
+
+
+def handle(store: Store, method: str, target: str, headers: dict) -> tuple:
+    """(status, headers, body) for one request."""
+    if method not in ("GET", "HEAD"):
+        return _json_response(HTTPStatus.METHOD_NOT_ALLOWED, {"error": "only GET and HEAD"})
+    url = urlsplit(target)
+    parts = [unquote(p) for p in url.path.strip("/").split("/") if p]
+    params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+    if parts == ["health"]:
+        return _json_response(HTTPStatus.OK, {"datasets": {n: d.version for n, d in store.datasets.items()}})
+    if parts == ["series"]:
+        return _json_response(HTTPStatus.OK, {n: d.describe() for n, d in store.datasets.items()})
+    if len(parts) != 2 or parts[0] != "series":
+        return _json_response(HTTPStatus.NOT_FOUND, {"error": f"no route {url.path}"})
+
+    try:
+        etag, body, gz = store.response(parts[1], params)
+    except KeyError:
+        return _json_response(HTTPStatus.NOT_FOUND, {"error": f"unknown dataset {parts[1]}",
+                                                     "datasets": sorted(store.datasets)})
+    except BadRequest as e:
+        return _json_response(HTTPStatus.BAD_REQUEST, {"error": str(e)})
+
+    out = {"Content-Type": "application/json", "ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if etag in [t.strip() for t in headers.get("if-none-match", "").split(",")]:
+        return HTTPStatus.NOT_MODIFIED, out, b""
+    if gz is not None and "gzip" in headers.get("accept-encoding", ""):
+        out["Content-Encoding"] = "gzip"
+        body = gz
+    return HTTPStatus.OK, out, body
+
+
+async def serve_client(store: Store, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+        while True:
+            try:
+                head = await reader.readuntil(b"\r\n\r\n")
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                break
+            lines = head.decode("latin-1").split("\r\n")
+            try:
+                method, target, version = lines[0].split(" ", 2)
+            except ValueError:
+                writer.write(_head(HTTPStatus.BAD_REQUEST, {"Content-Length": 0, "Connection": "close"}))
+                break
+            headers = {}
+            for line in lines[1:]:
+                if ":" in line:
+                    k, v = line.split(":", 1)
+                    headers[k.strip().lower()] = v.strip()
+
+            status, out, body = handle(store, method, target, headers)
+            keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+            out["Content-Length"] = len(body)
+            out["Connection"] = "keep-alive" if keep_alive else "close"
+            writer.write(_head(status, out) + (body if method == "GET" else b""))
+            await writer.drain()
+            if not keep_alive:
+                break
+    finally:
+        writer.close()
+
+
+async def watch(store: Store):
+    while True:
+        await asyncio.sleep(RELOAD_INTERVAL_S)
+        changed = await asyncio.to_thread(store.refresh)
+        if changed:
+            print(f"  reloaded {', '.join(changed)}")
+
+
+async def run(host: str, port: int):
+    store = Store()
+    store.refresh()
+    for name, ds in store.datasets.items():
+        print(f"  {name:<11} {len(ds.dates):>6} rows  {len(ds.fields):>2} fields  {ds.version}")
+    server = await asyncio.start_server(lambda r, w: serve_client(store, r, w), host, port,
+                                        limit=MAX_HEADER_BYTES)
+    print(f"Serving {len(store.datasets)} dataset(s) on http://{host}:{port}/series")
+    async with server:
+        await asyncio.gather(server.serve_forever(), watch(store))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+    try:
+        asyncio.run(run(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
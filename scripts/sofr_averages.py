@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+SOFR Averages, SOFR Index and dispersion, derived from the daily SOFR log.
+
+Fields added to every row of data/series/sofr.ndjson (and sofr_data.json):
+
+  avg_30d, avg_90d, avg_180d   compounded average SOFR over the 30/90/180
+                               calendar days before the row's date, in %
+  sofr_index                   compounded value of 1 from the first stored date
+  dispersion                   percentile_99 − percentile_1 (pp), the spread of
+                               the day's repo transactions
+
+Methodology as published by the NY Fed: a rate accrues simple interest on an
+actual/360 basis for every calendar day until the next business day, so a
+Friday rate counts three times:
+
+  index(t)       = Π (1 + r_i · d_i / 360)   over business days i before t
+  avg_N(t)       = (Π (1 + r_i · d_i / 360) − 1) · 360 / N   over the N days before t
+
+A window that opens on a weekend or holiday takes the preceding business day's
+rate for its first days. Row t's values use rates up to the previous business
+day — they are the averages and index the NY Fed publishes on t — so they never
+change when t's own rate is revised. Averages are rounded to 5 decimals and the
+index to 8, as published; the index is 1 on the first row (2018-04-02 after a
+backfill, the NY Fed's base date).
+
+Batch (`derive_rows`): the log index is a cumulative sum of log(1 + r_i·d_i/360),
+so each average is one difference of two prefix sums plus the partial first
+day — O(n) arithmetic for the whole history, with window starts found by one
+vectorized searchsorted.
+
+Incremental (`AverageState`): data/state/sofr_averages.json keeps the log
+index at the last date and the last 180 days of [date, rate, log index]. An
+appended row costs one log1p and one bisect per window.
+
+  python scripts/sofr_averages.py   # latest averages, index and dispersion
+"""
+
+import math
+from bisect import bisect_right
+from datetime import date as Date, timedelta
+
+import numpy as np
+
+from common import PUBLIC_DIR, STATE_DIR, read_json, write_json
+
+AVERAGE_STATE_PATH = STATE_DIR / "sofr_averages.json"
+AVERAGE_DAYS = (30, 90, 180)
+DAY_COUNT = 360
+AVERAGE_DECIMALS = 5
+INDEX_DECIMALS = 8
+
+FIELDS = tuple(f"avg_{n}d" for n in AVERAGE_DAYS) + ("sofr_index", "dispersion")
+
+
+def dispersion(row: dict):
+    """p99 − p1 of the day's transactions (pp), or None when either is missing."""
+    try:
+        return round(float(row["percentile_99"]) - float(row["percentile_1"]), 4)
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _days_before(date: str, days: int) -> str:
+    return (Date.fromisoformat(date) - timedelta(days=days)).isoformat()
+
+
+def _average(log_growth: float, days: int) -> float:
+    return round(math.expm1(log_growth) * DAY_COUNT / days * 100, AVERAGE_DECIMALS)
+
+
+# ── Batch ──────────────────────────────────────────────────────────────────
+
+def _days(dates: list) -> np.ndarray:
+    return np.array(dates, dtype="datetime64[D]").astype(np.int64)
+
+
+def _log_index(day: np.ndarray, r: np.ndarray) -> np.ndarray:
+    """log of the index on each date: rate i accrues from its date to the next one."""
+    return np.r_[0.0, np.cumsum(np.log1p(r[:-1] * np.diff(day) / DAY_COUNT))]
+
+
+def derive_series(dates: list, rates) -> dict:
+    """{field: array} of the averages (NaN until a window is covered) and index for ascending dates."""
+    day, r = _days(dates), np.asarray(rates, dtype=float) / 100
+    n = len(day)
+    if n == 0:
+        return {f: np.array([]) for f in FIELDS[:-1]}
+    log_index = _log_index(day, r)
+    out = {"sofr_index": np.round(np.exp(log_index), INDEX_DECIMALS)}
+    for days in AVERAGE_DAYS:
+        start = day - days
+        k = np.searchsorted(day, start, side="right") - 1  # last business day on or before the window start
+        valid = k >= 0
+        k = np.maximum(k, 0)
+        nxt = np.minimum(k + 1, n - 1)
+        # rate k accrues from the window start rather than from its own date
+        first = np.log1p(r[k] * (day[nxt] - start) / DAY_COUNT)
+        growth = log_index - log_index[nxt] + first
+        avg = np.round(np.expm1(growth) * DAY_COUNT / days * 100, AVERAGE_DECIMALS)
+        out[f"avg_{days}d"] = np.where(valid, avg, np.nan)
+    return out
+
+
+def derive_rows(rows: list, save: bool = False) -> list:
+    """Rows with FIELDS added. With `save`, also writes the incremental state after the last row."""
+    series = derive_series([r["date"] for r in rows], [r["rate"] for r in rows])
+    out = []
+    for i, r in enumerate(rows):
+        derived = {f: (None if np.isnan(v[i]) else float(v[i])) for f, v in series.items()}
+        out.append({**r, **derived, "dispersion": dispersion(r)})
+    if save:
+        AverageState.from_history(rows).save()
+    return out
+
+
+# ── Incremental ────────────────────────────────────────────────────────────
+
+class AverageState:
+    """Persisted log index and recent rates for O(1) derived fields of appended rows."""
+
+    def __init__(self, state: dict = None):
+        state = state or {}
+        self.first = state.get("first")
+        self.through = state.get("through")
+        self.recent = state.get("recent", [])  # [[date, rate, log index]], oldest first
+
+    @classmethod
+    def load(cls):
+        state = read_json(AVERAGE_STATE_PATH)
+        return cls(state) if state else None
+
+    @classmethod
+    def from_history(cls, rows: list):
+        st = cls()
+        if not rows:
+            return st
+        dates = [r["date"] for r in rows]
+        log_index = _log_index(_days(dates), np.array([r["rate"] for r in rows], dtype=float) / 100)
+        lo = max(bisect_right(dates, _days_before(dates[-1], max(AVERAGE_DAYS))) - 1, 0)
+        st.first, st.through = dates[0], dates[-1]
+        st.recent = [[d, row["rate"], float(c)] for d, row, c in zip(dates[lo:], rows[lo:], log_index[lo:])]
+        return st
+
+    def save(self):
+        write_json(AVERAGE_STATE_PATH, {"first": self.first, "through": self.through, "recent": self.recent},
+                   separators=(",", ":"))
+
+    def update(self, row: dict) -> dict:
+        """Add one row (a revision if its date is the last one seen) and return its derived fields."""
+        date, rate = row["date"], row["rate"]
+        if self.through is not None and date < self.through:
+            raise ValueError(f"sofr: {date} is before {self.through}; rebuild with derive_rows")
+        if self.recent and self.recent[-1][0] == date:
+            self.recent[-1][1] = rate  # accrues from here on; this row's own fields don't use it
+        elif self.recent:
+            prev_date, prev_rate, prev_log = self.recent[-1]
+            gap = (Date.fromisoformat(date) - Date.fromisoformat(prev_date)).days
+            self.recent.append([date, rate, prev_log + math.log1p(prev_rate / 100 * gap / DAY_COUNT)])
+        else:
+            self.first = date
+            self.recent.append([date, rate, 0.0])
+        self.through = date
+
+        dates = [e[0] for e in self.recent]
+        log_index = self.recent[-1][2]
+        out = {}
+        for days in AVERAGE_DAYS:
+            start = _days_before(date, days)
+            if start < self.first:
+                out[f"avg_{days}d"] = None
+                continue
+            k = bisect_right(dates, start) - 1
+            _, r_k, _ = self.recent[k]
+            next_date, _, next_log = self.recent[k + 1]
+            first_days = (Date.fromisoformat(next_date) - Date.fromisoformat(start)).days
+            out[f"avg_{days}d"] = _average(log_index - next_log + math.log1p(r_k / 100 * first_days / DAY_COUNT),
+                                           days)
+        out["sofr_index"] = round(math.exp(log_index), INDEX_DECIMALS)
+        out["dispersion"] = dispersion(row)
+
+        keep = max(bisect_right(dates, _days_before(date, max(AVERAGE_DAYS))) - 1, 0)
+        self.recent = self.recent[keep:]
+        return out
+
+
+def average_log(log) -> AverageState:
+    """
+    Incremental state for the SOFR log. If the saved state does not end where
+    the log does, or the log's rows lack the derived fields (first run,
+    backfill, interrupted append), the whole log is derived in batch and
+    rewritten first.
+    """
+    state = AverageState.load()
+    last = log.last_row() or {}
+    if state is None or state.through != last.get("date") or "sofr_index" not in last:
+        rows = derive_rows(list(log.iter_rows()), save=True)
+        log.rewrite(rows)
+        print(f"  Derived SOFR averages and index for {len(rows)} rows (batch)")
+        state = AverageState.load()
+    return state
+
+
+def average_new_rows(state: AverageState, rows: list) -> list:
+    """`rows` (ascending, from the log's last date on) with their derived fields; older rows dropped."""
+    return [{**r, **state.update(r)} for r in rows if state.through is None or r["date"] >= state.through]
+
+
+def main():
+    data = read_json(PUBLIC_DIR / "sofr_data.json")
+    last = next((r for r in reversed((data or {}).get("data", [])) if r.get("sofr_index") is not None), None)
+    if last is None:
+        print("No SOFR averages in the published data yet.")
+        return
+    print(f"  SOFR {last['date']}  rate={last['rate']}%  index={last['sofr_index']:.8f}  "
+          f"dispersion={last['dispersion']}pp")
+    print("  " + "  ".join(f"{n}d avg: {last.get(f'avg_{n}d')}%" for n in AVERAGE_DAYS))
+
+
+if __name__ == "__main__":
+    main()
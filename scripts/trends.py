@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Alternative trend models for the Buffett Indicator.
+
+The headline trend is a log-linear OLS fit over the whole history since 1971
+(fetch_buffett_indicator.compute_indicator), which moves with the start date
+and with the last decade's level. These estimators fit the same quarterly
+log ratio in other ways:
+
+  hp         Hodrick–Prescott filter, λ = HP_LAMBDA. (I + λ·DᵀD) τ = y is
+             pentadiagonal and symmetric positive definite, solved by a banded
+             LDLᵀ factorization in O(n)
+  loess      local linear regression with tricube weights over the nearest
+             LOESS_SPAN_YEARS of data (LOWESS without robustness passes);
+             O(n·k) for a window of k points, so linear in n
+  piecewise  continuous piecewise-linear fit with fixed breaks (PIECEWISE_BREAKS)
+  rolling    trailing ROLLING_YEARS log-linear OLS, valued at each window's end
+             (expanding until the window is full), from cumulative sums — O(n)
+
+Time is in decimal years. Each model returns the log trend on the fitted points
+and on a second axis (the daily series): interpolated between quarters and
+extended linearly past either end, except for the piecewise fit, which is
+evaluated directly. σ is the sample std of each model's log residuals, so bands
+are trend · exp(±kσ), as for the headline trend. Models run in parallel in a
+process pool (`fit_all`).
+
+  python scripts/trends.py           # σ-deviation of the latest ratio under each model
+  python scripts/trends.py --check   # estimators against dense reference computations
+"""
+
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from common import PUBLIC_DIR, read_json
+
+HP_LAMBDA = 1e5                       # quarterly; 1600 would track valuation cycles
+LOESS_SPAN_YEARS = 15
+PIECEWISE_BREAKS = (1982.5, 1995.0, 2009.25)   # disinflation bull market, the 1990s re-rating, post-GFC
+ROLLING_YEARS = 20
+ROLLING_MIN_YEARS = 10
+
+
+def decimal_years(index: pd.DatetimeIndex) -> np.ndarray:
+    return (index.year + (index.dayofyear - 1) / 365.25).to_numpy(dtype=float)
+
+
+# ── Estimators ─────────────────────────────────────────────────────────────
+
+def solve_pentadiagonal(a0, a1, a2, b) -> np.ndarray:
+    """
+    Solve A x = b for symmetric A with main diagonal a0 and off-diagonals a1
+    (length n−1) and a2 (length n−2), by A = L D Lᵀ with unit lower-banded L.
+    """
+    n = len(a0)
+    d = np.zeros(n)
+    l1 = np.zeros(n + 1)  # l1[i] = L[i, i-1]
+    l2 = np.zeros(n + 2)  # l2[i] = L[i, i-2]
+    for i in range(n):
+        d[i] = a0[i] - l1[i] ** 2 * (d[i - 1] if i >= 1 else 0.0) - l2[i] ** 2 * (d[i - 2] if i >= 2 else 0.0)
+        if i + 1 < n:
+            l1[i + 1] = (a1[i] - l2[i + 1] * l1[i] * (d[i - 1] if i >= 1 else 0.0)) / d[i]
+        if i + 2 < n:
+            l2[i + 2] = a2[i] / d[i]
+    z = np.zeros(n)
+    for i in range(n):
+        z[i] = b[i] - (l1[i] * z[i - 1] if i >= 1 else 0.0) - (l2[i] * z[i - 2] if i >= 2 else 0.0)
+    x = z / d
+    for i in range(n - 2, -1, -1):
+        x[i] -= l1[i + 1] * x[i + 1] + (l2[i + 2] * x[i + 2] if i + 2 < n else 0.0)
+    return x
+
+
+def hp_filter(y: np.ndarray, lam: float = HP_LAMBDA) -> np.ndarray:
+    """HP trend: argmin Σ(y − τ)² + λ Σ(Δ²τ)²."""
+    n = len(y)
+    if n < 3:
+        return y.astype(float).copy()
+    # DᵀD for the (n−2)×n second-difference operator D, each row [1, −2, 1],
+    # summed row by row so short series get the right band (n=3: [1, 4, 1])
+    main = np.zeros(n)
+    main[:-2] += 1.0
+    main[1:-1] += 4.0
+    main[2:] += 1.0
+    off1 = np.zeros(n - 1)
+    off1[:-1] -= 2.0
+    off1[1:] -= 2.0
+    off2 = np.ones(n - 2)
+    return solve_pentadiagonal(1.0 + lam * main, lam * off1, lam * off2, y)
+
+
+def loess(t: np.ndarray, y: np.ndarray, span_years: float = LOESS_SPAN_YEARS) -> np.ndarray:
+    """Local linear fit at every t over its k nearest points, tricube weights, vectorized."""
+    n = len(t)
+    step = np.median(np.diff(t)) if n > 1 else 1.0
+    k = int(min(n, max(3, round(span_years / step) + 1)))
+    start = np.clip(np.arange(n) - k // 2, 0, n - k)
+    idx = start[:, None] + np.arange(k)
+    tw, yw = t[idx], y[idx]
+    dist = np.abs(tw - t[:, None])
+    h = dist.max(axis=1, keepdims=True) * 1.0001
+    w = (1 - (dist / h) ** 3) ** 3
+    sw = w.sum(axis=1)
+    mt = (w * tw).sum(axis=1) / sw
+    my = (w * yw).sum(axis=1) / sw
+    dt = tw - mt[:, None]
+    slope = (w * dt * (yw - my[:, None])).sum(axis=1) / (w * dt * dt).sum(axis=1)
+    return my + slope * (t - mt)
+
+
+def _hinges(t: np.ndarray, breaks) -> np.ndarray:
+    return np.column_stack([np.ones_like(t), t] + [np.maximum(t - b, 0.0) for b in breaks])
+
+
+def piecewise_linear(t: np.ndarray, y: np.ndarray, breaks=PIECEWISE_BREAKS) -> tuple:
+    """(coefficients, breaks used) of the continuous piecewise-linear least-squares fit (hinge basis)."""
+    breaks = [b for b in breaks if t[0] < b < t[-1]]
+    return np.linalg.lstsq(_hinges(t, breaks), y, rcond=None)[0], breaks
+
+
+def rolling_linear(t: np.ndarray, y: np.ndarray, window_years: float = ROLLING_YEARS,
+                   min_years: float = ROLLING_MIN_YEARS) -> np.ndarray:
+    """Trailing-window OLS value at each point (NaN until min_years of history)."""
+    s1, st, sy, stt, sty = (np.r_[0.0, np.cumsum(a)] for a in (np.ones_like(t), t, y, t * t, t * y))
+    end = np.arange(1, len(t) + 1)
+    start = np.searchsorted(t, t - window_years, side="right")
+    m = s1[end] - s1[start]
+    mt, my = (st[end] - st[start]) / m, (sy[end] - sy[start]) / m
+    var = (stt[end] - stt[start]) / m - mt * mt
+    cov = (sty[end] - sty[start]) / m - mt * my
+    with np.errstate(invalid="ignore", divide="ignore"):
+        fit = my + cov / var * (t - mt)
+    return np.where(t - t[0] >= min_years, fit, np.nan)
+
+
+def extend(t: np.ndarray, trend: np.ndarray, t_eval: np.ndarray) -> np.ndarray:
+    """`trend` (defined on t) at t_eval: linear in between, along the end slopes beyond."""
+    ok = ~np.isnan(trend)
+    t, trend = t[ok], trend[ok]
+    out = np.interp(t_eval, t, trend)
+    if len(t) > 1:
+        lo, hi = t_eval < t[0], t_eval > t[-1]
+        out[lo] = trend[0] + (t_eval[lo] - t[0]) * (trend[1] - trend[0]) / (t[1] - t[0])
+        out[hi] = trend[-1] + (t_eval[hi] - t[-1]) * (trend[-1] - trend[-2]) / (t[-1] - t[-2])
+    return out
+
+
+# ── Models ─────────────────────────────────────────────────────────────────
+
+MODELS = {
+    "hp":        f"Hodrick–Prescott trend (λ = {HP_LAMBDA:g})",
+    "loess":     f"LOESS, local linear over {LOESS_SPAN_YEARS} years",
+    "piecewise": "Piecewise-linear, breaks " + ", ".join(f"{b:g}" for b in PIECEWISE_BREAKS),
+    "rolling":   f"Trailing {ROLLING_YEARS}-year log-linear trend",
+}
+
+
+def fit_model(name: str, t: np.ndarray, y: np.ndarray, t_eval: np.ndarray) -> dict:
+    """{trend, at, sigma}: log trend on t and on t_eval, and the std of log residuals."""
+    if name == "piecewise":
+        coef, breaks = piecewise_linear(t, y)
+        trend, at = _hinges(t, breaks) @ coef, _hinges(t_eval, breaks) @ coef
+    elif name == "rolling":
+        trend = rolling_linear(t, y)
+        at = extend(t, trend, t_eval)
+        at[t_eval < t[~np.isnan(trend)][0]] = np.nan  # no trend before ROLLING_MIN_YEARS of history
+    else:
+        trend = hp_filter(y) if name == "hp" else loess(t, y)
+        at = extend(t, trend, t_eval)
+    res = (y - trend)[~np.isnan(trend)]
+    return {"trend": trend, "at": at, "sigma": float(np.std(res, ddof=1))}
+
+
+def fit_all(t: np.ndarray, y: np.ndarray, t_eval: np.ndarray) -> dict:
+    """Every model of MODELS, fitted concurrently in worker processes."""
+    with ProcessPoolExecutor(max_workers=min(len(MODELS), os.cpu_count() or 1)) as pool:
+        futures = {name: pool.submit(fit_model, name, t, y, t_eval) for name in MODELS}
+        return {name: f.result() for name, f in futures.items()}
+
+
+# ── Reference checks ───────────────────────────────────────────────────────
+
+def _dense_hp(y: np.ndarray, lam: float) -> np.ndarray:
+    n = len(y)
+    d = np.diff(np.eye(n), 2, axis=0)
+    return np.linalg.solve(np.eye(n) + lam * d.T @ d, y)
+
+
+def _direct_loess(t: np.ndarray, y: np.ndarray, span_years: float) -> np.ndarray:
+    """Weighted least squares at every point, one lstsq per point."""
+    step = np.median(np.diff(t))
+    k = int(min(len(t), max(3, round(span_years / step) + 1)))
+    out = np.empty(len(t))
+    for i, t0 in enumerate(t):
+        lo = int(np.clip(i - k // 2, 0, len(t) - k))
+        tw, yw = t[lo:lo + k], y[lo:lo + k]
+        dist = np.abs(tw - t0)
+        w = np.sqrt((1 - (dist / (dist.max() * 1.0001)) ** 3) ** 3)
+        coef = np.linalg.lstsq(np.column_stack([np.ones(k), tw - t0]) * w[:, None], yw * w, rcond=None)[0]
+        out[i] = coef[0]
+    return out
+
+
+def check() -> list:
+    """Compare each estimator with a dense/direct computation; returns the failures."""
+    rng = np.random.default_rng(0)
+    failures = []
+
+    def close(name, got, want, tol):
+        ok = np.allclose(got, want, rtol=tol, atol=tol, equal_nan=True)
+        err = np.nanmax(np.abs(got - want)) if len(got) else 0.0
+        print(f"  {'ok  ' if ok else 'FAIL'} {name:<34} max error {err:.2e}")
+        if not ok:
+            failures.append(name)
+
+    for n in (3, 4, 5, 6, 10, 57, 400):
+        y = np.cumsum(rng.normal(size=n)) * 0.1
+        for lam in (1600.0, HP_LAMBDA):
+            close(f"hp_filter n={n} λ={lam:g}", hp_filter(y, lam), _dense_hp(y, lam), 1e-7)
+
+    n = 50
+    a0 = rng.uniform(5, 10, n)
+    a1, a2 = rng.uniform(-1, 1, n - 1), rng.uniform(-1, 1, n - 2)
+    dense = np.diag(a0) + np.diag(a1, 1) + np.diag(a1, -1) + np.diag(a2, 2) + np.diag(a2, -2)
+    b = rng.normal(size=n)
+    close("solve_pentadiagonal n=50", solve_pentadiagonal(a0, a1, a2, b), np.linalg.solve(dense, b), 1e-10)
+
+    t = 1971 + np.arange(220) / 4
+    y = 0.02 * (t - 1971) + 0.3 * np.sin(t / 3) + rng.normal(scale=0.05, size=len(t))
+    close("loess vs per-point lstsq", loess(t, y), _direct_loess(t, y, LOESS_SPAN_YEARS), 1e-9)
+
+    want = np.full(len(t), np.nan)
+    for i in range(len(t)):
+        lo = np.searchsorted(t, t[i] - ROLLING_YEARS, side="right")
+        if t[i] - t[0] >= ROLLING_MIN_YEARS:
+            want[i] = np.polyval(np.polyfit(t[lo:i + 1], y[lo:i + 1], 1), t[i])
+    close("rolling_linear vs polyfit", rolling_linear(t, y), want, 1e-7)
+
+    exact = 1.0 + 0.03 * (t - t[0]) + sum(c * np.maximum(t - b, 0) for c, b in zip((-0.05, 0.04, -0.02),
+                                                                                     PIECEWISE_BREAKS))
+    coef, breaks = piecewise_linear(t, exact)
+    close("piecewise_linear exact recovery", _hinges(t, breaks) @ coef, exact, 1e-9)
+    return failures
+
+
+def main():
+    if "--check" in sys.argv:
+        failures = check()
+        if failures:
+            raise SystemExit(f"{len(failures)} trend estimator check(s) failed")
+        print("All trend estimators match their references.")
+        return
+    data = read_json(PUBLIC_DIR / "buffett_indicator_data.json")
+    current = (data or {}).get("current", {})
+    if not current.get("trends"):
+        print("No trend models in the published Buffett data yet.")
+        return
+    print(f"  Buffett ratio {current['ratio_pct']}% on {current['as_of']}")
+    for name, m in current["trends"].items():
+        print(f"  {name:<11} trend {m['trend_pct']:>6.1f}%  σ={m['sigma']:.3f}  "
+              f"{m['std_devs']:+.2f}σ  {m['valuation']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Vintage (revision) history for series that get revised after release.
+
+FRED GDP, BLS PPI (revised for four months after release) and FINRA debit
+balances are refetched in full on every run and the published files only
+show the latest values. Each fetcher also hands its series to `record`,
+which appends one line to data/vintages/<series>.ndjson holding only the
+observations that differ from the previous vintage:
+
+  {"as_of":"2026-07-30T14:02:11Z","set":{"1947-01-01":243.164,...}}   first run: full history
+  {"as_of":"2026-08-28T14:01:52Z","set":{"2026-04-01":30353.9}}       a revision
+  {"as_of":"2026-10-30T14:03:05Z","set":{"2026-07-01":30812.0}}       a new release
+
+Observations that disappear upstream are listed under "drop". Runs that
+change nothing write nothing (nor do --reprocess runs, see archive.py), so a file grows with the number of revisions
+rather than runs × history. Any past vintage is rebuilt by replaying lines
+up to a point in time (`as_of`).
+
+  python scripts/vintages.py                                   # list tracked series
+  python scripts/vintages.py fred_gdp --as-of 2025-06-30       # values as known then (CSV)
+  python scripts/vintages.py ppi_WPUFD4 --revisions            # first vs latest value per date
+"""
+
+import argparse
+import json
+import sys
+from datetime import datetime, timezone
+
+from archive import REPROCESS
+from common import ROOT_DIR
+
+VINTAGE_DIR = ROOT_DIR / "data" / "vintages"
+
+
+def _path(series: str):
+    return VINTAGE_DIR / f"{series}.ndjson"
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _cutoff(when: str) -> str:
+    """A bare date means the end of that day."""
+    return f"{when}T23:59:59Z" if len(when) == 10 else when
+
+
+def iter_vintages(series: str):
+    """Stream the stored change sets of one series, oldest first."""
+    path = _path(series)
+    if not path.exists():
+        return
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def as_of(series: str, when: str = None) -> dict:
+    """{date: value} as the series stood at `when` (ISO date or timestamp; default: latest)."""
+    cutoff = _cutoff(when) if when else None
+    values = {}
+    for v in iter_vintages(series):
+        if cutoff and v["as_of"] > cutoff:
+            break
+        values.update(v["set"])
+        for key in v.get("drop", []):
+            values.pop(key, None)
+    return dict(sorted(values.items()))
+
+
+def record(series: str, values: dict, when: str = None) -> int:
+    """
+    Store a new vintage of `series` ({date: value}) if anything changed.
+
+    Only new or revised observations (and dates that disappeared) are
+    written. Returns the number of observations that changed. Reprocessing
+    archived payloads records nothing: they are not news as of now.
+    """
+    if REPROCESS:
+        return 0
+    values = {k: v for k, v in values.items() if v is not None}
+    previous = as_of(series)
+    changed = {k: v for k, v in values.items() if previous.get(k) != v}
+    dropped = sorted(previous.keys() - values.keys())
+    if not changed and not dropped:
+        return 0
+    entry = {"as_of": when or _now(), "set": dict(sorted(changed.items()))}
+    if dropped:
+        entry["drop"] = dropped
+    VINTAGE_DIR.mkdir(parents=True, exist_ok=True)
+    with open(_path(series), "a") as f:
+        f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+    if previous:
+        print(f"  Vintage {series}: {len(changed)} revised/new, {len(dropped)} dropped")
+    else:
+        print(f"  Vintage {series}: first vintage, {len(changed)} observations")
+    return len(changed) + len(dropped)
+
+
+def record_frame(frame, prefix: str, columns=None, date_format: str = "%Y-%m-%d") -> int:
+    """`record` each column of a date-indexed DataFrame as series `<prefix><column>`."""
+    keys = frame.index.strftime(date_format)
+    total = 0
+    for col in columns or frame.columns:
+        if col not in frame:
+            continue
+        s = frame[col]
+        mask = s.notna().values
+        total += record(f"{prefix}{col}", dict(zip(keys[mask], s.values[mask].tolist())))
+    return total
+
+
+def revisions(series: str) -> list:
+    """Per date: first published value, latest value, and how many times it was revised."""
+    first, latest, count = {}, {}, {}
+    for v in iter_vintages(series):
+        for key, value in v["set"].items():
+            if key in first:
+                count[key] = count.get(key, 0) + 1
+            else:
+                first[key] = value
+            latest[key] = value
+        for key in v.get("drop", []):
+            latest.pop(key, None)
+    return [
+        {"date": k, "first": first[k], "latest": latest[k], "revisions": count.get(k, 0),
+         "change": round(latest[k] - first[k], 6)}
+        for k in sorted(latest) if count.get(k)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("series", nargs="?", help="series name (omit to list all)")
+    parser.add_argument("--as-of", help="reconstruct the vintage at this date/timestamp")
+    parser.add_argument("--revisions", action="store_true", help="list revised dates")
+    args = parser.parse_args()
+
+    if not args.series:
+        for path in sorted(VINTAGE_DIR.glob("*.ndjson")):
+            stored = list(iter_vintages(path.stem))
+            changes = sum(len(v["set"]) for v in stored)
+            print(f"  {path.stem:<24} {len(stored):>4} vintages  {changes:>6} stored values  "
+                  f"{stored[0]['as_of']} → {stored[-1]['as_of']}")
+        return
+
+    if not _path(args.series).exists():
+        sys.exit(f"No vintages for {args.series} in {VINTAGE_DIR}")
+    if args.revisions:
+        for r in revisions(args.series):
+            print(f"  {r['date']}  {r['first']} → {r['latest']}  ({r['change']:+}, {r['revisions']}×)")
+        return
+    print("date,value")
+    for k, v in as_of(args.series, args.as_of).items():
+        print(f"{k},{v}")
+
+
+if __name__ == "__main__":
+    main()
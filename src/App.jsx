@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import {
   Line, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer,
-  ReferenceLine, Area, ComposedChart, Bar, Cell
+  ReferenceLine, ReferenceArea, Area, ComposedChart, Bar, Cell
 } from 'recharts';
 import { SectorZScore } from './components/SectorZScore';
 import { BuffettIndicator } from './components/BuffettIndicator';
@@ -12,6 +12,8 @@ import { PpiIndex } from './components/PpiIndex';
 import { ExportCsvButton } from './components/ExportCsvButton';
 import { ChartToggle } from './components/ChartToggle';
 import { formatDate } from './utils/formatDate';
+import { loadManifest, formatHeadlines, fetchDataset } from './utils/manifest';
+import { loadDatasetCached } from './utils/datasetCache';
 
 const FINRA_CSV_URL = 'https://www.finra.org/sites/default/files/2021-03/margin-statistics.csv';
 
@@ -62,6 +64,15 @@ const normalizeMonthKey = (dateStr) => {
   return dateStr;
 };
 
+// Regime segments from scripts/changepoints.py, clipped to the months on screen
+const visibleRegimes = (segments, rows) => {
+  if (!segments?.length || !rows.length) return [];
+  const first = rows[0].date, last = rows[rows.length - 1].date;
+  return segments
+    .filter(s => s.end >= first && s.start <= last)
+    .map(s => ({ ...s, x1: s.start < first ? first : s.start, x2: s.end > last ? last : s.end }));
+};
+
 const parseFinraMarginCsv = (text) => {
   const lines = text.trim().split(/\r?\n/).filter(Boolean);
   if (lines.length < 2) return [];
@@ -108,6 +119,8 @@ export default function App() {
   const [metadata, setMetadata] = useState(null);
   const [aaiiRawData, setAaiiRawData] = useState([]);
   const [aaiiMetadata, setAaiiMetadata] = useState(null);
+  const [manifest, setManifest] = useState(null);
+  const [marginRegimes, setMarginRegimes] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   const [timeRange, setTimeRange] = useState('all');
@@ -125,6 +138,23 @@ export default function App() {
     return () => window.removeEventListener('resize', handleResize);
   }, []);
 
+  // Small summary file — lets headline values paint before full histories load
+  useEffect(() => {
+    let cancelled = false;
+    loadManifest().then(m => { if (!cancelled) setManifest(m); });
+    return () => { cancelled = true; };
+  }, []);
+
+  // Optional regime shading for the YoY chart
+  useEffect(() => {
+    let cancelled = false;
+    fetch('./changepoints.json')
+      .then(res => (res.ok ? res.json() : null))
+      .then(json => { if (!cancelled) setMarginRegimes(json?.series?.margin_yoy?.segments ?? []); })
+      .catch(() => {});
+    return () => { cancelled = true; };
+  }, []);
+
   useEffect(() => {
     let cancelled = false;
     const loadData = async () => {
@@ -155,9 +185,7 @@ export default function App() {
             }
           } catch { /* try next */ }
         }
-        const res = await fetch('./margin_data.json');
-        if (!res.ok) throw new Error('Failed to load margin data');
-        const json = await res.json();
+        const json = await loadDatasetCached('margin', 'margin_data.json');
         if (!json.data?.length) throw new Error('No margin data in local file');
         if (!cancelled) {
           setRawData(json.data);
@@ -166,7 +194,7 @@ export default function App() {
       };
 
       const loadAaiiData = async () => {
-        const res = await fetch('./aaii_allocation_data.json');
+        const res = await fetchDataset('aaii', 'aaii_allocation_data.json');
         if (!res.ok) throw new Error('Failed to load AAII allocation data');
         const json = await res.json();
         if (!json.data?.length) throw new Error('No AAII data in local file');
@@ -195,6 +223,9 @@ export default function App() {
     : timeRange === '5y'  ? data.slice(-60)
     : data.slice(-24);
   const chartInterval = Math.floor((filteredData.length || 1) / 8);
+  const yoyData = filteredData.filter(d => d.yoy_growth !== null);
+  const yoyRegimes = visibleRegimes(marginRegimes, yoyData);
+  const currentRegime = marginRegimes[marginRegimes.length - 1];
   const currentDebt = data[data.length - 1];
   const peak2021 = data.find(d => d.date === '2021-10') || data[data.length - 1];
   const peak2000 = data.find(d => d.date === '2000-03') || data[0];
@@ -244,6 +275,7 @@ export default function App() {
   };
 
   const thresholdStats = data.length ? calculateThresholdStats(data) : null;
+  const headlines = formatHeadlines(manifest);
 
   // ── Loading / Error states ─────────────────────────────────
   if (loading) {
@@ -259,6 +291,15 @@ export default function App() {
           <div style={{ fontFamily: 'var(--font-mono)', color: 'var(--bb-gray-2)', fontSize: '12px' }}>
             Loading FINRA margin statistics...
           </div>
+          {headlines.length > 0 && (
+            <div style={{ display: 'flex', flexWrap: 'wrap', justifyContent: 'center', gap: '12px', marginTop: '16px' }}>
+              {headlines.map(h => (
+                <span key={h.key} style={{ fontFamily: 'var(--font-mono)', fontSize: '11px', color: 'var(--bb-gray-2)' }}>
+                  {h.label} <span style={{ color: 'var(--bb-white)' }}>{h.value}</span>
+                </span>
+              ))}
+            </div>
+          )}
           <div style={{ height: '2px', background: 'var(--bb-border)', marginTop: '20px', overflow: 'hidden' }}>
             <div className="pulse-animation" style={{ height: '100%', width: '60%', background: 'var(--bb-orange)' }} />
           </div>
@@ -310,10 +351,20 @@ export default function App() {
         </div>
 
         {/* ── Subtitle bar ── */}
-        <div style={{ background: '#111827', borderBottom: '1px solid #1F2937', padding: '6px 16px' }}>
+        <div style={{ background: '#111827', borderBottom: '1px solid #1F2937', padding: '6px 16px', display: 'flex', justifyContent: 'space-between', gap: '16px' }}>
           <span style={{ fontFamily: 'var(--font-mono)', fontSize: '11px', color: '#6B7280' }}>
             {TAB_SUBTITLE[activeTab]}
           </span>
+          {!isMobile && headlines.length > 0 && (
+            <span style={{ fontFamily: 'var(--font-mono)', fontSize: '11px', color: '#6B7280', whiteSpace: 'nowrap' }}>
+              {headlines.map(h => (
+                <span key={h.key} style={{ marginLeft: '12px' }}>
+                  {h.label} <span style={{ color: '#D1D5DB' }}>{h.value}</span>
+                  {h.pctile && <span title="Percentile rank vs. full history" style={{ marginLeft: '4px' }}>{h.pctile}</span>}
+                </span>
+              ))}
+            </span>
+          )}
         </div>
 
         {/* ── Tab Navigation ── */}
@@ -457,11 +508,18 @@ export default function App() {
               </div>
               <div style={{ padding: isMobile ? '12px' : '16px' }}>
                 <ResponsiveContainer width="100%" height={isMobile ? 200 : 260}>
-                  <ComposedChart data={filteredData.filter(d => d.yoy_growth !== null)} margin={{ top: 10, right: 10, left: 0, bottom: 0 }}>
+                  <ComposedChart data={yoyData} margin={{ top: 10, right: 10, left: 0, bottom: 0 }}>
                     <CartesianGrid strokeDasharray="1 3" stroke="#111827" />
                     <XAxis dataKey="date" stroke="#374151" tick={{ fill: '#6B7280', fontSize: 10, fontFamily: 'JetBrains Mono' }} tickFormatter={formatDate} interval={chartInterval} />
                     <YAxis stroke="#374151" tick={{ fill: '#6B7280', fontSize: 10, fontFamily: 'JetBrains Mono' }} tickFormatter={v => `${v}%`} />
                     <Tooltip content={<CustomTooltip />} />
+                    {yoyRegimes.map(r => (
+                      <ReferenceArea
+                        key={r.start} x1={r.x1} x2={r.x2} stroke="none"
+                        fill={r.mean >= 0 ? '#F59E0B' : '#10B981'}
+                        fillOpacity={0.03 + Math.min(Math.abs(r.mean) / 400, 0.12)}
+                      />
+                    ))}
                     <ReferenceLine y={0} stroke="#4B5563" strokeWidth={1} />
                     <ReferenceLine y={30}  stroke="#EF4444" strokeDasharray="4 4" strokeOpacity={0.8} label={{ value: '+30%', fill: '#EF4444', fontSize: 9 }} />
                     <ReferenceLine y={-30} stroke="#10B981" strokeDasharray="4 4" strokeOpacity={0.8} label={{ value: '-30%', fill: '#10B981', fontSize: 9 }} />
@@ -475,6 +533,11 @@ export default function App() {
                 <div style={{ display: 'flex', gap: '16px', marginTop: '8px', fontSize: '10px', flexWrap: 'wrap', fontFamily: 'JetBrains Mono' }}>
                   <div className="badge badge-warning">+30% EUPHORIA ZONE</div>
                   <div className="badge badge-success">-30% CAPITULATION ZONE</div>
+                  {currentRegime && (
+                    <div className="badge badge-info">
+                      REGIME SINCE {formatDate(currentRegime.start)}: AVG {currentRegime.mean > 0 ? '+' : ''}{currentRegime.mean.toFixed(1)}%
+                    </div>
+                  )}
                 </div>
               </div>
             </div>
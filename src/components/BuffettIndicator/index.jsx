@@ -38,6 +38,22 @@ const TIME_RANGE_OPTIONS = [
   { label: 'ALL', value: 'all' },
 ];
 
+const TREND_MODEL_LABELS = {
+  log_linear: 'LOG-LINEAR', hp: 'HP', loess: 'LOESS', piecewise: 'PIECEWISE', rolling: 'ROLLING 20Y',
+};
+
+// Swap in an alternative trend (JSON "trends") and its ±σ bands; null trend values give null bands
+const withTrendModel = (rows, trend, key) => {
+  const values = trend?.[key];
+  if (!values || values.length !== rows.length) return rows;
+  const band = (t, k) => (t == null ? null : parseFloat((t * Math.exp(k * trend.sigma)).toFixed(2)));
+  return rows.map((r, i) => ({
+    ...r,
+    trend_pct: values[i], band_plus1: band(values[i], 1), band_plus2: band(values[i], 2),
+    band_minus1: band(values[i], -1), band_minus2: band(values[i], -2),
+  }));
+};
+
 const CashTooltip = ({ active, payload, label }) => {
   if (!active || !payload?.length) return null;
   return (
@@ -90,6 +106,7 @@ const valuationColorFor = (sd) => {
 
 export const BuffettIndicator = ({ isMobile }) => {
   const [timeRange, setTimeRange]         = useState('all');
+  const [trendModel, setTrendModel]       = useState('log_linear');
   const [buffettMainType, setBuffettMain] = useState('line');
   const [cashMainType, setCashMain]       = useState('bar');
   const [cashYoyType, setCashYoy]         = useState('bar');
@@ -128,16 +145,23 @@ export const BuffettIndicator = ({ isMobile }) => {
   }, [ENRICHED]);
 
   const biChartData = useMemo(() => {
-    if (!biData?.data?.length) return [];
-    if (timeRange === 'all') return biData.data;
+    // Daily series (downsampled) on the snapshot path; the live FRED result is quarterly
+    const key = biData?.daily?.length ? 'daily' : 'data';
+    const base = biData?.[key];
+    if (!base?.length) return [];
+    const rows = trendModel === 'log_linear' ? base : withTrendModel(base, biData.trends?.[trendModel], key);
+    if (timeRange === 'all') return rows;
     const years = { '10y': 10, '15y': 15, '20y': 20, '25y': 25 }[timeRange] ?? 99;
     const cutoff = new Date();
     cutoff.setFullYear(cutoff.getFullYear() - years);
-    return biData.data.filter(d => new Date(d.date) >= cutoff);
-  }, [biData, timeRange]);
+    return rows.filter(d => new Date(d.date) >= cutoff);
+  }, [biData, timeRange, trendModel]);
 
   const biCurrent = biData?.current;
-  const valColor  = valuationColorFor(biCurrent?.std_devs);
+  const trendModels = ['log_linear', ...Object.keys(biData?.trends ?? {})];
+  // Deviation / σ / valuation under the selected trend (alternatives come from current.trends)
+  const vsTrend   = (trendModel !== 'log_linear' && biCurrent?.trends?.[trendModel]) || biCurrent;
+  const valColor  = valuationColorFor(vsTrend?.std_devs);
   const axTick    = { fill: 'var(--text-dim)', fontSize: 10, fontFamily: 'var(--font-mono)' };
   const gridStroke = 'var(--rule)';
 
@@ -188,26 +212,41 @@ export const BuffettIndicator = ({ isMobile }) => {
                 <div className="stat-card">
                   <div className="stat-block-label">vs Trend</div>
                   <div className="stat-block-value" style={{ color: valColor }}>
-                    {biCurrent.deviation_pct >= 0 ? '+' : ''}{biCurrent.deviation_pct.toFixed(1)}%
+                    {vsTrend.deviation_pct >= 0 ? '+' : ''}{vsTrend.deviation_pct.toFixed(1)}%
+                  </div>
+                  <div className="stat-block-sub">
+                    Trend: {vsTrend.trend_pct.toFixed(1)}%{vsTrend.trend_as_of ? ` (fit to ${vsTrend.trend_as_of})` : ''}
                   </div>
-                  <div className="stat-block-sub">Trend: {biCurrent.trend_pct.toFixed(1)}%</div>
                 </div>
                 <div className="stat-card">
                   <div className="stat-block-label">Std Devs</div>
                   <div className="stat-block-value" style={{ color: valColor }}>
-                    {biCurrent.std_devs >= 0 ? '+' : ''}{biCurrent.std_devs.toFixed(2)}σ
+                    {vsTrend.std_devs >= 0 ? '+' : ''}{vsTrend.std_devs.toFixed(2)}σ
                   </div>
-                  <div className="stat-block-sub">From log trend</div>
+                  <div className="stat-block-sub">From {TREND_MODEL_LABELS[trendModel]?.toLowerCase() ?? trendModel} trend</div>
                 </div>
                 <div className="stat-card">
                   <div className="stat-block-label">Valuation</div>
-                  <div className="stat-block-value sm" style={{ color: valColor }}>{biCurrent.valuation}</div>
+                  <div className="stat-block-value sm" style={{ color: valColor }}>{vsTrend.valuation}</div>
                   <div className="stat-block-sub">
                     {biCurrent.gdp_billions > 0 ? `GDP $${biCurrent.gdp_billions.toLocaleString()}B` : 'Wilshire / GDP'}
                   </div>
                 </div>
               </div>
 
+              {trendModels.length > 1 && (
+                <div style={{ display: 'flex', alignItems: 'center', gap: '2px', marginBottom: '10px', flexWrap: 'wrap' }}>
+                  <span style={{ fontFamily: 'var(--font-mono)', fontSize: '8px', letterSpacing: '0.18em', color: 'var(--text-dim)', marginRight: '6px' }}>TREND</span>
+                  {trendModels.map(m => (
+                    <button key={m} onClick={() => setTrendModel(m)}
+                      title={biData.trends?.[m]?.label ?? 'Log-linear OLS over the full history'}
+                      className={`period-btn ${trendModel === m ? 'active' : ''}`}>
+                      {TREND_MODEL_LABELS[m] ?? m.toUpperCase()}
+                    </button>
+                  ))}
+                </div>
+              )}
+
               <div style={{ display: 'flex', gap: '16px', marginBottom: '8px', flexWrap: 'wrap' }}>
                 {[
                   { label: 'RATIO', color: 'var(--accent)', dash: false },
@@ -249,8 +288,16 @@ export const BuffettIndicator = ({ isMobile }) => {
 
               <div style={{ marginTop: '12px', fontFamily: 'var(--font-mono)', fontSize: '8px', letterSpacing: '0.12em', color: 'var(--text-dim)', lineHeight: '1.7', borderTop: '1px solid var(--rule)', paddingTop: '10px' }}>
                 <span style={{ color: 'var(--text-mid)' }}>FORMULA:</span> Wilshire 5000 Full Cap Index ÷ Nominal GDP × 100.
-                Bands show ±1σ and ±2σ from a log-linear trend fit over the full history (1971–present).
-                <span style={{ color: 'var(--text-dim)', marginLeft: 6 }}>Sources: FRED WILL5000INDFC, GDP — computed live in your browser; falls back to a weekly CI snapshot if FRED is unreachable.</span>
+                {!biData.daily?.length
+                  ? ' Quarterly points.'
+                  : ' Daily points divide each close by GDP interpolated between quarterly releases, extended past the latest release along its recent trend.'}
+                {' '}Bands show ±1σ and ±2σ from the selected trend: by default a log-linear fit over the full history (1971–present);
+                HP, LOESS, piecewise-linear and trailing 20-year fits are alternatives, each with its own σ, fitted in the weekly CI snapshot.
+                <span style={{ color: 'var(--text-dim)', marginLeft: 6 }}>
+                  Sources: FRED WILL5000INDFC, GDP — {rawBiStatus === 'live'
+                    ? 'ratio and log-linear trend computed live in your browser.'
+                    : `weekly CI snapshot (FRED unreachable from your browser), as of ${biCurrent.as_of ?? biData.last_updated?.slice(0, 10)}.`}
+                </span>
               </div>
             </>
           )}
@@ -11,11 +11,18 @@
  *      source of Berkshire cash hoard data (not available from FRED) in
  *      both cases.
  *
+ * The live result charts its own quarterly rows; the snapshot's daily series
+ * is only shown on the fallback path. Alternative trend models are fitted in
+ * CI only: on the live path their quarterly values are matched to the live
+ * rows by quarter, and their deviation is taken from the live ratio (with the
+ * snapshot date when the live quarter is newer than the snapshot's fit).
+ *
  * Returns { biData, biStatus }
  *   biStatus: 'loading' | 'live' | 'fallback' | 'error'
  */
 
 import { useState, useEffect } from 'react';
+import { fetchDataset } from '../../utils/manifest';
 
 const WILL5000_URL =
   'https://fred.stlouisfed.org/graph/fredgraph.csv?id=WILL5000INDFC&freq=q&agg_method=eop';
@@ -62,6 +69,44 @@ const getValuationLabel = (sd) => {
   return 'STRONGLY UNDERVALUED';
 };
 
+// Snapshot alternative trends re-keyed onto the live quarterly rows (null where the snapshot has no quarter)
+const alignTrends = (snapshot, data) => {
+  const out = {};
+  for (const [name, model] of Object.entries(snapshot?.trends ?? {})) {
+    const byQuarter = new Map();
+    (snapshot.data ?? []).forEach((r, i) => byQuarter.set(toQuarterKey(r.date), model.data?.[i] ?? null));
+    out[name] = {
+      label: model.label,
+      sigma: model.sigma,
+      data:  data.map(r => byQuarter.get(toQuarterKey(r.date)) ?? null),
+    };
+  }
+  return out;
+};
+
+// Live ratio against each alternative trend: same quarter if the snapshot has it, else the snapshot's latest fit
+const liveTrendDeviations = (snapshot, trends, data) => {
+  const last = data[data.length - 1];
+  const out = {};
+  for (const [name, model] of Object.entries(trends)) {
+    const aligned = model.data[model.data.length - 1];
+    const fallback = snapshot?.current?.trends?.[name]?.trend_pct;
+    const trend = aligned ?? fallback;
+    if (trend == null || !(model.sigma > 0)) continue;
+    const sd = Math.log(last.ratio_pct / trend) / model.sigma;
+    out[name] = {
+      trend_pct:     parseFloat(trend.toFixed(1)),
+      deviation_pct: parseFloat(((last.ratio_pct - trend) / trend * 100).toFixed(1)),
+      sigma:         model.sigma,
+      std_devs:      parseFloat(sd.toFixed(2)),
+      valuation:     getValuationLabel(sd),
+      // set only when the trend value is from a different date than the ratio
+      trend_as_of:   aligned == null ? snapshot?.current?.as_of ?? null : null,
+    };
+  }
+  return out;
+};
+
 const fetchFredCsv = async (url) => {
   const controller = new AbortController();
   const timer = setTimeout(() => controller.abort(), 15000);
@@ -141,7 +186,7 @@ export const useFredBuffettData = () => {
       // Used only as a fallback (and as the source of Berkshire cash data,
       // which FRED doesn't provide).
       let staticData = null;
-      const staticPromise = fetch('./buffett_indicator_data.json')
+      const staticPromise = fetchDataset('buffett', 'buffett_indicator_data.json')
         .then(res => (res.ok ? res.json() : null))
         .then(json => { staticData = json; return json; })
         .catch(() => null);
@@ -159,6 +204,11 @@ export const useFredBuffettData = () => {
           await staticPromise;
           if (!cancelled) {
             built.berkshire_cash = staticData?.berkshire_cash ?? null;
+            // The daily series (GDP interpolation + nowcast) is only built in CI, so the
+            // live result charts its quarterly rows. Alternative trends are CI-only too:
+            // re-key them onto the live quarters and measure the live ratio against them.
+            built.trends = alignTrends(staticData, built.data);
+            built.current.trends = liveTrendDeviations(staticData, built.trends, built.data);
             setBiData(built);
             setBiStatus('live');
           }
@@ -7,6 +7,7 @@ import { ExportCsvButton } from './ExportCsvButton';
 import { ChartToggle } from './ChartToggle';
 import { ChartTooltip } from './ChartTooltip';
 import { formatDate } from '../utils/formatDate';
+import { fetchDataset } from '../utils/manifest';
 
 // ── Colour helpers ────────────────────────────────────────
 const momColor = v => {
@@ -493,9 +494,64 @@ function SubSection({ title, children, exportBtn, toggle }) {
   );
 }
 
+// ── Component breakdown (final demand / intermediate demand tree) ──
+const GROUP_LABELS = {
+  core:         'Core',
+  goods:        'Goods',
+  services:     'Services',
+  construction: 'Construction',
+  intermediate: 'Intermediate Demand',
+  stages:       'Intermediate Demand Stages',
+};
+
+function ComponentBreakdown({ components }) {
+  const groups = Object.keys(GROUP_LABELS)
+    .map(g => ({ key: g, rows: components.filter(c => c.group === g) }))
+    .filter(g => g.rows.length > 0);
+  const cell = { padding: '4px 8px', fontFamily: 'var(--font-mono)', fontSize: '11px', textAlign: 'right' };
+  return (
+    <div style={{ padding: '4px 20px 20px', overflowX: 'auto' }}>
+      <table style={{ width: '100%', borderCollapse: 'collapse' }}>
+        <thead>
+          <tr style={{ color: 'var(--text-dim)', fontSize: '9px', letterSpacing: '0.14em' }}>
+            <th style={{ ...cell, textAlign: 'left', fontSize: '9px' }}>SERIES</th>
+            <th style={{ ...cell, fontSize: '9px' }}>DATE</th>
+            <th style={{ ...cell, fontSize: '9px' }}>MOM</th>
+            <th style={{ ...cell, fontSize: '9px' }}>YOY</th>
+          </tr>
+        </thead>
+        <tbody>
+          {groups.map(g => (
+            <React.Fragment key={g.key}>
+              <tr>
+                <td colSpan={4} style={{ ...cell, textAlign: 'left', color: 'var(--accent)', fontSize: '9px', letterSpacing: '0.14em', paddingTop: '10px' }}>
+                  {GROUP_LABELS[g.key].toUpperCase()}
+                </td>
+              </tr>
+              {g.rows.map(c => (
+                <tr key={c.id} style={{ borderTop: '1px solid var(--rule)' }}>
+                  <td style={{ ...cell, textAlign: 'left', color: 'var(--text-mid)' }}>{c.label}</td>
+                  <td style={{ ...cell, color: 'var(--text-dim)' }}>{c.latest?.date ?? '—'}</td>
+                  <td style={{ ...cell, color: momColor(c.latest?.mom) }}>
+                    {c.latest?.mom != null ? `${c.latest.mom > 0 ? '+' : ''}${c.latest.mom.toFixed(2)}%` : '—'}
+                  </td>
+                  <td style={{ ...cell, color: yoyColor(c.latest?.yoy) }}>
+                    {c.latest?.yoy != null ? `${c.latest.yoy > 0 ? '+' : ''}${c.latest.yoy.toFixed(2)}%` : '—'}
+                  </td>
+                </tr>
+              ))}
+            </React.Fragment>
+          ))}
+        </tbody>
+      </table>
+    </div>
+  );
+}
+
 // ── Main PpiDashboard export ──────────────────────────────
 export function PpiDashboard() {
   const [rawData, setRawData]   = useState({ unadj: [], adj: [] });
+  const [components, setComponents] = useState([]);
   const [loading, setLoading]   = useState(true);
   const [period, setPeriod]     = useState('ALL');
   const [chartType, setChartType]         = useState('bar');
@@ -506,7 +562,7 @@ export function PpiDashboard() {
 
   useEffect(() => {
     let cancelled = false;
-    fetch('./ppi_data.json')
+    fetchDataset('ppi', 'ppi_data.json')
       .then(r => r.ok ? r.json() : Promise.reject('No data'))
       .then(json => {
         if (cancelled) return;
@@ -514,6 +570,11 @@ export function PpiDashboard() {
           unadj: json.series?.WPUFD4?.data     || [],
           adj:   json.series?.WPUFD49104?.data || [],
         });
+        setComponents(
+          Object.entries(json.series || {})
+            .filter(([, s]) => s.group && s.group !== 'headline')
+            .map(([id, s]) => ({ id, label: s.label, group: s.group, latest: s.data?.[s.data.length - 1] }))
+        );
       })
       .catch(() => {})
       .finally(() => { if (!cancelled) setLoading(false); });
@@ -736,6 +797,28 @@ export function PpiDashboard() {
           </SubSection>
         )}
 
+        {/* ── Component breakdown ── */}
+        {!loading && components.length > 0 && (
+          <SubSection
+            title="PPI Components — Latest Month"
+            exportBtn={
+              <ExportCsvButton
+                data={components.map(c => ({ id: c.id, label: c.label, date: c.latest?.date, mom: c.latest?.mom, yoy: c.latest?.yoy }))}
+                filename="ppi_components"
+                columns={[
+                  { key: 'id',    label: 'Series ID' },
+                  { key: 'label', label: 'Series' },
+                  { key: 'date',  label: 'Date' },
+                  { key: 'mom',   label: 'MoM Change (%)' },
+                  { key: 'yoy',   label: 'YoY Change (%)' },
+                ]}
+              />
+            }
+          >
+            <ComponentBreakdown components={components} />
+          </SubSection>
+        )}
+
       </main>
     </>
   );
@@ -7,6 +7,7 @@ import { SourceLink } from './SourceLink';
 import { ExportCsvButton } from './ExportCsvButton';
 import { ChartToggle } from './ChartToggle';
 import { formatDate } from '../utils/formatDate';
+import { fetchDataset } from '../utils/manifest';
 import { ChartTooltip } from './ChartTooltip';
 
 const ppiFormatValue = (p) =>
@@ -49,7 +50,7 @@ export function PpiIndex({ isMobile }) {
     const load = async () => {
       setLoading(true); setError(null);
       try {
-        const r = await fetch('./ppi_data.json');
+        const r = await fetchDataset('ppi', 'ppi_data.json');
         if (!r.ok) throw new Error('Failed to load PPI data');
         const json = await r.json();
         const unadj = json.series?.WPUFD4?.data    || [];
@@ -7,22 +7,32 @@ import { SourceLink } from './SourceLink';
 import { ExportCsvButton } from './ExportCsvButton';
 import { ChartToggle } from './ChartToggle';
 import { formatDate } from '../utils/formatDate';
+import { loadDatasetCached } from '../utils/datasetCache';
 import { ChartTooltip } from './ChartTooltip';
+import { withSofrAverages } from '../utils/sofrAverages';
 
 const sofrFormatValue = (p) =>
   typeof p.value === 'number' ? `${p.value.toFixed(2)}%` : p.value;
 const CustomTooltip = (props) => <ChartTooltip {...props} formatValue={sofrFormatValue} />;
 
+// Months shown per range, and roughly how many daily rows that is
+const RANGE_MONTHS = { '6m': 6, '2y': 24, '5y': 60 };
+const TRADING_DAYS_PER_MONTH = 21;
+const INITIAL_RANGE = '2y';
+
 export function SofrRate({ isMobile }) {
   const [rawData, setRawData] = useState([]);
   const [metadata, setMetadata] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
-  const [timeRange, setTimeRange] = useState('2y');
+  const [timeRange, setTimeRange] = useState(INITIAL_RANGE);
+  // True while the charts show a reduced-resolution level and the full file is still loading
+  const [isPreview, setIsPreview] = useState(false);
 
   const [sofrMainType, setSofrMainType] = useState('line');
   const [sofrBandType, setSofrBandType] = useState('line');
   const [sofrVolType, setSofrVolType] = useState('line');
+  const [sofrAvgType, setSofrAvgType] = useState('line');
 
   useEffect(() => {
     let cancelled = false;
@@ -51,9 +61,15 @@ export function SofrRate({ isMobile }) {
         } catch { /* fall through to static file */ }
 
         if (!records.length) {
-          const r = await fetch('./sofr_data.json');
-          if (!r.ok) throw new Error('Failed to load SOFR data');
-          const json = await r.json();
+          const json = await loadDatasetCached('sofr', 'sofr_data.json', {
+            viewRows: RANGE_MONTHS[INITIAL_RANGE] * TRADING_DAYS_PER_MONTH,
+            onPreview: (preview) => {
+              if (cancelled || !preview.data?.length) return;
+              setRawData(preview.data);
+              setIsPreview(true);
+              setLoading(false);
+            },
+          });
           records = json.data || [];
           if (!cancelled) setMetadata({ lastUpdated: json.last_updated, source: json.source, sourceUrl: json.source_url });
         } else {
@@ -65,7 +81,12 @@ export function SofrRate({ isMobile }) {
         }
 
         if (!records.length) throw new Error('No SOFR records found');
-        if (!cancelled) setRawData(records);
+        // Live API rows lack the averages and index the published file carries
+        if (records[records.length - 1].sofr_index === undefined) records = withSofrAverages(records);
+        if (!cancelled) {
+          setRawData(records);
+          setIsPreview(false);
+        }
       } catch (e) {
         if (!cancelled) setError(e.message);
       } finally {
@@ -88,16 +109,21 @@ export function SofrRate({ isMobile }) {
     </div>
   );
 
-  const filtered = timeRange === 'all' ? rawData
-    : timeRange === '5y' ? rawData.slice(-1260)
-    : timeRange === '2y' ? rawData.slice(-504)
-    : rawData.slice(-126);
-
+  // Filter by date rather than row count so a reduced-resolution preview covers the same span
   const latest = rawData[rawData.length - 1];
-  const prev = rawData[rawData.length - 2];
+  let filtered = rawData;
+  if (timeRange !== 'all' && latest) {
+    const cutoff = new Date(latest.date);
+    cutoff.setMonth(cutoff.getMonth() - RANGE_MONTHS[timeRange]);
+    const from = cutoff.toISOString().slice(0, 10);
+    filtered = rawData.filter(d => d.date > from);
+  }
+
+  // Row-offset comparisons need the full daily series
+  const prev = isPreview ? null : rawData[rawData.length - 2];
   const dayChange = latest && prev ? (latest.rate - prev.rate).toFixed(2) : null;
 
-  const yearAgo = rawData[rawData.length - 252];
+  const yearAgo = isPreview ? null : rawData[rawData.length - 252];
   const yoyChange = latest && yearAgo ? (latest.rate - yearAgo.rate).toFixed(2) : null;
 
   const allRates = rawData.map(d => d.rate);
@@ -135,6 +161,17 @@ export function SofrRate({ isMobile }) {
           <div className="stat-block-value sm neutral">{minRate.toFixed(2)}% – {maxRate.toFixed(2)}%</div>
           <div className="stat-block-sub">AVG: {avgRate}%</div>
         </div>
+
+        <div className="stat-card">
+          <div className="stat-block-label">30D Compounded Avg</div>
+          <div className="stat-block-value neutral">{typeof latest?.avg_30d === 'number' ? `${latest.avg_30d.toFixed(3)}%` : 'N/A'}</div>
+          <div className="stat-block-sub">INDEX: {typeof latest?.sofr_index === 'number' ? latest.sofr_index.toFixed(8) : 'N/A'}</div>
+        </div>
+
+        <div className="stat-card">
+          <div className="stat-block-label">P99 – P1 Dispersion</div>
+          <div className="stat-block-value neutral">{typeof latest?.dispersion === 'number' ? `${Math.round(latest.dispersion * 100)} bp` : 'N/A'}</div>
+        </div>
       </div>
 
       {/* Time Range Selector */}
@@ -288,6 +325,68 @@ export function SofrRate({ isMobile }) {
         </div>
       </div>
 
+      {/* Compounded Averages Chart */}
+      <div className="glass-card animate-in" style={{ padding: '0', marginBottom: '20px', animationDelay: '250ms' }}>
+        <div className="bb-panel-header" style={{ display: 'flex', justifyContent: 'space-between', alignItems: 'center' }}>
+          <span>SOFR COMPOUNDED AVERAGES (30 / 90 / 180 DAY)</span>
+          <div style={{ display: 'flex', gap: '8px', alignItems: 'center' }}>
+            <ExportCsvButton
+              data={filtered}
+              filename="sofr_averages"
+              columns={[
+                { key: 'date',       label: 'Date' },
+                { key: 'rate',       label: 'SOFR Rate (%)' },
+                { key: 'avg_30d',    label: '30-Day Average (%)' },
+                { key: 'avg_90d',    label: '90-Day Average (%)' },
+                { key: 'avg_180d',   label: '180-Day Average (%)' },
+                { key: 'sofr_index', label: 'SOFR Index' },
+                { key: 'dispersion', label: 'P99 - P1 Dispersion (%)' },
+              ]}
+            />
+            <ChartToggle type={sofrAvgType} setType={setSofrAvgType} />
+          </div>
+        </div>
+        <div style={{ padding: isMobile ? '16px 8px' : '24px 16px' }}>
+          <ResponsiveContainer width="100%" height={isMobile ? 200 : 280}>
+            <ComposedChart data={filtered} margin={{ top: 10, right: 10, left: 0, bottom: 0 }}>
+              <CartesianGrid strokeDasharray="1 3" stroke="var(--rule)" vertical={false} />
+              <XAxis
+                dataKey="date"
+                stroke="var(--rule)"
+                tick={{ fill: 'var(--text-dim)', fontSize: 10, fontFamily: 'var(--font-mono)' }}
+                tickFormatter={formatDate}
+                interval={chartInterval}
+                axisLine={false}
+                tickLine={false}
+              />
+              <YAxis
+                stroke="var(--rule)"
+                tick={{ fill: 'var(--text-dim)', fontSize: 10, fontFamily: 'var(--font-mono)' }}
+                tickFormatter={v => `${v.toFixed(1)}%`}
+                domain={['auto', 'auto']}
+                axisLine={false}
+                tickLine={false}
+              />
+              <Tooltip content={<CustomTooltip />} />
+              {sofrAvgType === 'line' ? (
+                <>
+                  <Line type="monotone" dataKey="rate" stroke="var(--text-dim)" strokeWidth={1} dot={false} name="SOFR" strokeDasharray="3 3" />
+                  <Line type="monotone" dataKey="avg_30d" stroke="var(--accent)" strokeWidth={1.5} dot={false} name="30D Avg" />
+                  <Line type="monotone" dataKey="avg_90d" stroke="var(--bb-orange)" strokeWidth={1.5} dot={false} name="90D Avg" />
+                  <Line type="monotone" dataKey="avg_180d" stroke="var(--pos)" strokeWidth={1.5} dot={false} name="180D Avg" />
+                </>
+              ) : (
+                <>
+                  <Bar dataKey="avg_30d" fill="var(--accent)" name="30D Avg" />
+                  <Bar dataKey="avg_90d" fill="var(--bb-orange)" name="90D Avg" />
+                  <Bar dataKey="avg_180d" fill="var(--pos)" name="180D Avg" />
+                </>
+              )}
+            </ComposedChart>
+          </ResponsiveContainer>
+        </div>
+      </div>
+
       {/* Transaction Volume Chart */}
       <div className="glass-card animate-in" style={{ padding: '0', marginBottom: '20px', animationDelay: '300ms' }}>
         <div className="bb-panel-header" style={{ display: 'flex', justifyContent: 'space-between', alignItems: 'center' }}>
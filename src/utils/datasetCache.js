@@ -0,0 +1,85 @@
+import { loadManifest, getDatasetEntry, fetchDataset, pickLevel } from './manifest';
+
+// Local copies of the static datasets, keyed by the manifest's sha256.
+// When the manifest version matches, nothing is downloaded; when it has
+// moved on, the small *.delta.json feed patches the cached copy; otherwise
+// (no cache, version too old, any error) the full file is fetched.
+//
+// While the full file downloads, `onPreview` (if given) receives a reduced-
+// resolution level from the manifest sized for `viewRows` rows on screen —
+// or the largest level when none is detailed enough — for a fast first paint.
+const CACHE_PREFIX = 'dataset:';
+
+const readCache = (name) => {
+  try {
+    const raw = localStorage.getItem(CACHE_PREFIX + name);
+    return raw ? JSON.parse(raw) : null;
+  } catch {
+    return null;
+  }
+};
+
+const writeCache = (name, version, data) => {
+  if (!version) return;
+  try {
+    localStorage.setItem(CACHE_PREFIX + name, JSON.stringify({ version, data }));
+  } catch {
+    // Quota exceeded — drop our entry; the full file is still served over HTTP cache
+    try { localStorage.removeItem(CACHE_PREFIX + name); } catch { /* unavailable */ }
+  }
+};
+
+// Apply a delta feed (see scripts/delta.py) to a cached dataset at `baseVersion`.
+// Returns the patched dataset, or null if the delta can't be applied to it.
+export const applyDelta = (cached, delta, baseVersion) => {
+  const baseSeq = delta?.bases?.[baseVersion];
+  if (baseSeq == null || !cached) return null;
+  const { array_key: arrayKey, key } = delta;
+  const rows = new Map((cached[arrayKey] || []).map(r => [r[key], r]));
+  for (const [seq, row] of delta.changes || []) {
+    if (seq > baseSeq) rows.set(row[key], row);
+  }
+  for (const [seq, k] of delta.removed || []) {
+    if (seq > baseSeq) rows.delete(k);
+  }
+  const merged = [...rows.values()].sort((a, b) => String(a[key]).localeCompare(String(b[key])));
+  return { ...cached, ...delta.meta, [arrayKey]: merged };
+};
+
+const loadPreview = async (entry, { onPreview, viewRows, targetPoints }) => {
+  const level = pickLevel(entry, viewRows, targetPoints) ?? entry.levels[entry.levels.length - 1];
+  try {
+    const res = await fetch(`./${level.file}`);
+    if (res.ok) onPreview(await res.json());
+  } catch { /* the full file follows anyway */ }
+};
+
+export const loadDatasetCached = async (name, fallbackFile, options = {}) => {
+  const entry = getDatasetEntry(await loadManifest(), name);
+  const version = entry?.sha256;
+  const cached = readCache(name);
+
+  if (cached && version && cached.version === version) return cached.data;
+
+  if (cached && version && entry?.delta) {
+    try {
+      const res = await fetch(`./${entry.delta}`);
+      if (res.ok) {
+        const delta = await res.json();
+        const patched = delta.version === version ? applyDelta(cached.data, delta, cached.version) : null;
+        if (patched) {
+          writeCache(name, version, patched);
+          return patched;
+        }
+      }
+    } catch { /* fall through to full download */ }
+  }
+
+  const full = fetchDataset(name, fallbackFile);
+  if (options.onPreview && entry?.levels?.length) await loadPreview(entry, options);
+  const res = await full;
+  if (!res.ok) throw new Error(`Failed to load ${fallbackFile}`);
+  const data = await res.json();
+  writeCache(name, version, data);
+  return data;
+};
@@ -0,0 +1,94 @@
+import { describe, it, expect, beforeEach, vi } from 'vitest';
+import { applyDelta, loadDatasetCached } from './datasetCache';
+import { resetManifestCache } from './manifest';
+
+const cached = {
+  last_updated: '2026-08-13T00:00:00Z',
+  data: [
+    { date: '2026-08-12', rate: 3.61 },
+    { date: '2026-08-13', rate: 3.62 },
+  ],
+};
+
+const delta = {
+  version: 'v3',
+  array_key: 'data',
+  key: 'date',
+  bases: { v1: 1, v2: 2 },
+  changes: [
+    [2, { date: '2026-08-13', rate: 3.62 }],
+    [3, { date: '2026-08-13', rate: 3.65 }],
+    [3, { date: '2026-08-14', rate: 3.60 }],
+  ],
+  removed: [],
+  meta: { last_updated: '2026-08-14T00:00:00Z' },
+};
+
+const jsonResponse = (body) => ({ ok: true, json: () => Promise.resolve(body) });
+
+describe('applyDelta', () => {
+  it('applies only changes newer than the base version', () => {
+    const patched = applyDelta(cached, delta, 'v2');
+    expect(patched.data).toEqual([
+      { date: '2026-08-12', rate: 3.61 },
+      { date: '2026-08-13', rate: 3.65 },
+      { date: '2026-08-14', rate: 3.60 },
+    ]);
+    expect(patched.last_updated).toBe('2026-08-14T00:00:00Z');
+  });
+
+  it('removes rows dropped after the base version', () => {
+    const patched = applyDelta(cached, { ...delta, changes: [], removed: [[3, '2026-08-12']] }, 'v2');
+    expect(patched.data.map(r => r.date)).toEqual(['2026-08-13']);
+  });
+
+  it('returns null for an unknown base version', () => {
+    expect(applyDelta(cached, delta, 'v0')).toBeNull();
+  });
+});
+
+describe('loadDatasetCached', () => {
+  beforeEach(() => {
+    resetManifestCache();
+    vi.clearAllMocks();
+    vi.unstubAllGlobals();
+  });
+
+  it('patches the cached copy from the delta feed', async () => {
+    const manifest = { datasets: { sofr: { file: 'sofr_data.json', sha256: 'v3', delta: 'sofr_data.delta.json' } } };
+    localStorage.getItem.mockReturnValue(JSON.stringify({ version: 'v2', data: cached }));
+    const fetchMock = vi.fn(url => Promise.resolve(jsonResponse(url.includes('delta') ? delta : manifest)));
+    vi.stubGlobal('fetch', fetchMock);
+
+    const data = await loadDatasetCached('sofr', 'sofr_data.json');
+    expect(data.data).toHaveLength(3);
+    expect(fetchMock.mock.calls.map(c => c[0])).toEqual(['./manifest.json', './sofr_data.delta.json']);
+    expect(localStorage.setItem).toHaveBeenCalled();
+  });
+
+  it('downloads the full file when there is no usable cache', async () => {
+    const manifest = { datasets: { sofr: { file: 'sofr_data.json', sha256: 'v3' } } };
+    localStorage.getItem.mockReturnValue(null);
+    const fetchMock = vi.fn(url => Promise.resolve(jsonResponse(url.includes('manifest') ? manifest : cached)));
+    vi.stubGlobal('fetch', fetchMock);
+
+    const data = await loadDatasetCached('sofr', 'sofr_data.json');
+    expect(data).toEqual(cached);
+    expect(fetchMock.mock.calls.map(c => c[0])).toEqual(['./manifest.json', './sofr_data.json']);
+  });
+
+  it('hands a reduced-resolution level to onPreview before the full file', async () => {
+    const level = { ...cached, level: { points: 250, rows: 1, of: 2 }, data: [cached.data[1]] };
+    const manifest = {
+      datasets: { sofr: { file: 'sofr_data.json', sha256: 'v3', rows: 2, levels: [{ points: 250, rows: 1, file: 'sofr_data.250.json' }] } },
+    };
+    localStorage.getItem.mockReturnValue(null);
+    const bodies = { './manifest.json': manifest, './sofr_data.250.json': level, './sofr_data.json': cached };
+    vi.stubGlobal('fetch', vi.fn(url => Promise.resolve(jsonResponse(bodies[url]))));
+    const onPreview = vi.fn();
+
+    const data = await loadDatasetCached('sofr', 'sofr_data.json', { onPreview, viewRows: 2, targetPoints: 1 });
+    expect(onPreview).toHaveBeenCalledWith(level);
+    expect(data).toEqual(cached);
+  });
+});
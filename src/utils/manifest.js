@@ -0,0 +1,70 @@
+// public/manifest.json is a ~2 KB per-dataset summary written by the fetch
+// scripts (latest date, row count, hash, headline values). Load it once and
+// share the promise so every component can read headlines before the full
+// histories arrive.
+let manifestPromise = null;
+
+export const loadManifest = () => {
+  if (!manifestPromise) {
+    manifestPromise = fetch('./manifest.json')
+      .then(res => (res.ok ? res.json() : null))
+      .catch(() => null);
+  }
+  return manifestPromise;
+};
+
+export const resetManifestCache = () => {
+  manifestPromise = null;
+};
+
+export const getDatasetEntry = (manifest, name) => manifest?.datasets?.[name] ?? null;
+
+export const getHeadline = (manifest, name) => getDatasetEntry(manifest, name)?.headline ?? null;
+
+// URL for a dataset: the content-hashed, immutable copy written by
+// scripts/publish.py when available, otherwise the canonical file.
+export const datasetUrl = async (name, fallbackFile) => {
+  const entry = getDatasetEntry(await loadManifest(), name);
+  if (entry?.published?.path) return `./${entry.published.path}`;
+  return `./${entry?.file || fallbackFile}`;
+};
+
+export const fetchDataset = async (name, fallbackFile, init) =>
+  fetch(await datasetUrl(name, fallbackFile), init);
+
+// Reduced-resolution copies of a dataset (scripts/pyramid.py), listed
+// smallest first. Picks the smallest level that still puts `targetPoints`
+// rows on screen when the chart shows `viewRows` rows of the full history;
+// null means only the full file has enough detail.
+export const pickLevel = (entry, viewRows, targetPoints = 400) => {
+  const total = entry?.rows;
+  if (!total || !entry.levels?.length) return null;
+  const share = Math.min(viewRows ?? total, total) / total;
+  return entry.levels.find(level => level.rows * share >= targetPoints) ?? null;
+};
+
+const fmt = (v, digits, suffix = '') =>
+  typeof v === 'number' && isFinite(v) ? `${v.toFixed(digits)}${suffix}` : null;
+
+// Historical percentile rank (scripts/percentiles.py) as "P93", or null.
+const pctileLabel = (p) => (typeof p === 'number' && isFinite(p) ? `P${Math.round(p)}` : null);
+
+// Short "label value" strings for the headline ticker, in display order.
+export const formatHeadlines = (manifest) => {
+  const items = [];
+  const margin = getHeadline(manifest, 'margin');
+  const marginDebt = fmt(margin?.margin_debt / 1000, 0);
+  if (marginDebt) items.push({ key: 'margin', label: 'MARGIN', value: `$${marginDebt}B` });
+  const buffett = getHeadline(manifest, 'buffett');
+  const ratio = fmt(buffett?.ratio_pct, 1, '%');
+  if (ratio) items.push({ key: 'buffett', label: 'BUFFETT', value: ratio, pctile: pctileLabel(buffett?.ratio_pctile) });
+  const sofrHeadline = getHeadline(manifest, 'sofr');
+  const sofr = fmt(sofrHeadline?.rate, 2, '%');
+  if (sofr) items.push({ key: 'sofr', label: 'SOFR', value: sofr, pctile: pctileLabel(sofrHeadline?.rate_pctile) });
+  const ppi = fmt(getHeadline(manifest, 'ppi')?.yoy, 1, '% YOY');
+  if (ppi) items.push({ key: 'ppi', label: 'PPI', value: ppi });
+  const fg = getHeadline(manifest, 'fear_greed');
+  const score = fmt(fg?.score, 0);
+  if (score) items.push({ key: 'fear_greed', label: 'F&G', value: score, pctile: pctileLabel(fg?.value_pctile) });
+  return items;
+};
@@ -0,0 +1,78 @@
+import { describe, it, expect, beforeEach, vi } from 'vitest';
+import { loadManifest, resetManifestCache, getHeadline, formatHeadlines, datasetUrl, pickLevel } from './manifest';
+
+const manifest = {
+  datasets: {
+    margin:     { headline: { margin_debt: 1417225, yoy_growth: 38.6 } },
+    buffett:    { headline: { ratio_pct: 204.0, valuation: 'FAIR VALUE', ratio_pctile: 97.3 } },
+    sofr:       { headline: { rate: 3.62, volume_bn: 2932 } },
+    ppi:        { headline: { index: 156.9, mom: -0.1, yoy: 4.689 } },
+    fear_greed: { headline: { score: 65.0, rating: 'greed' } },
+  },
+};
+
+describe('manifest utilities', () => {
+  beforeEach(() => {
+    resetManifestCache();
+    vi.restoreAllMocks();
+  });
+
+  it('fetches the manifest once and shares the promise', async () => {
+    const fetchMock = vi.fn().mockResolvedValue({ ok: true, json: () => Promise.resolve(manifest) });
+    vi.stubGlobal('fetch', fetchMock);
+
+    const [a, b] = await Promise.all([loadManifest(), loadManifest()]);
+    expect(a).toEqual(manifest);
+    expect(b).toBe(a);
+    expect(fetchMock).toHaveBeenCalledTimes(1);
+    vi.unstubAllGlobals();
+  });
+
+  it('resolves to null when the manifest is missing', async () => {
+    vi.stubGlobal('fetch', vi.fn().mockResolvedValue({ ok: false }));
+    expect(await loadManifest()).toBeNull();
+    vi.unstubAllGlobals();
+  });
+
+  it('returns headline values by dataset name', () => {
+    expect(getHeadline(manifest, 'sofr')).toEqual({ rate: 3.62, volume_bn: 2932 });
+    expect(getHeadline(manifest, 'unknown')).toBeNull();
+    expect(getHeadline(null, 'sofr')).toBeNull();
+  });
+
+  it('formats headline ticker items and skips missing values', () => {
+    const items = formatHeadlines(manifest);
+    expect(items.map(i => i.key)).toEqual(['margin', 'buffett', 'sofr', 'ppi', 'fear_greed']);
+    expect(items[0].value).toBe('$1417B');
+    expect(items[2].value).toBe('3.62%');
+    expect(items[1].pctile).toBe('P97');
+    expect(items[2].pctile).toBeNull();
+    expect(formatHeadlines({ datasets: { sofr: { headline: { rate: null } } } })).toEqual([]);
+  });
+
+  it('resolves dataset URLs to the published hashed copy when present', async () => {
+    const published = {
+      datasets: {
+        sofr: { file: 'sofr_data.json', published: { path: 'data/sofr_data.abc123.json' } },
+        ppi:  { file: 'ppi_data.json' },
+      },
+    };
+    vi.stubGlobal('fetch', vi.fn().mockResolvedValue({ ok: true, json: () => Promise.resolve(published) }));
+    expect(await datasetUrl('sofr', 'sofr_data.json')).toBe('./data/sofr_data.abc123.json');
+    expect(await datasetUrl('ppi', 'ppi_data.json')).toBe('./ppi_data.json');
+    expect(await datasetUrl('margin', 'margin_data.json')).toBe('./margin_data.json');
+    vi.unstubAllGlobals();
+  });
+
+  it('picks the smallest resolution level with enough points for the view', () => {
+    const entry = {
+      rows: 2000,
+      levels: [{ points: 250, rows: 250, file: 'sofr_data.250.json' }, { points: 1000, rows: 1000, file: 'sofr_data.1000.json' }],
+    };
+    expect(pickLevel(entry, 2000, 200).file).toBe('sofr_data.250.json');
+    expect(pickLevel(entry, 2000, 400).file).toBe('sofr_data.1000.json');
+    expect(pickLevel(entry, 500, 400)).toBeNull();
+    expect(pickLevel(entry, Infinity, 400).file).toBe('sofr_data.1000.json');
+    expect(pickLevel({ rows: 2000 }, 2000)).toBeNull();
+  });
+});
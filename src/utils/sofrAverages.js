@@ -0,0 +1,46 @@
+// SOFR Averages, SOFR Index and p99 − p1 dispersion for rows fetched live from
+// the NY Fed API (the published sofr_data.json already carries them, see
+// scripts/sofr_averages.py). Each rate accrues actual/360 simple interest until
+// the next business day; row t uses rates through the previous business day.
+
+export const AVERAGE_DAYS = [30, 90, 180];
+const DAY_MS = 86400000;
+const DAY_COUNT = 360;
+
+const dayNumber = (iso) => Date.parse(`${iso}T00:00:00Z`) / DAY_MS;
+const round = (v, decimals) => Math.round(v * 10 ** decimals) / 10 ** decimals;
+
+export const dispersion = (r) => {
+  const hi = r.p99 ?? r.percentile_99;
+  const lo = r.p1 ?? r.percentile_1;
+  return typeof hi === 'number' && typeof lo === 'number' ? round(hi - lo, 4) : null;
+};
+
+// Rows (ascending by date, with `rate` in %) plus avg_30d / avg_90d / avg_180d,
+// sofr_index and dispersion. One pass over cumulative log growth: O(n).
+export function withSofrAverages(rows) {
+  const n = rows.length;
+  const day = rows.map((r) => dayNumber(r.date));
+  const logIndex = new Float64Array(n);
+  for (let i = 1; i < n; i++) {
+    logIndex[i] = logIndex[i - 1] + Math.log1p((rows[i - 1].rate / 100) * (day[i] - day[i - 1]) / DAY_COUNT);
+  }
+  const starts = AVERAGE_DAYS.map(() => 0); // last row on or before each window's start
+  return rows.map((r, i) => {
+    const out = { ...r, sofr_index: round(Math.exp(logIndex[i]), 8), dispersion: dispersion(r) };
+    AVERAGE_DAYS.forEach((days, w) => {
+      const start = day[i] - days;
+      if (start < day[0]) {
+        out[`avg_${days}d`] = null;
+        return;
+      }
+      let k = starts[w];
+      while (day[k + 1] <= start) k++;
+      starts[w] = k;
+      // rate k accrues from the window start rather than from its own date
+      const growth = logIndex[i] - logIndex[k + 1] + Math.log1p((rows[k].rate / 100) * (day[k + 1] - start) / DAY_COUNT);
+      out[`avg_${days}d`] = round(Math.expm1(growth) * DAY_COUNT / days * 100, 5);
+    });
+    return out;
+  });
+}
@@ -0,0 +1,48 @@
+import { describe, it, expect } from 'vitest';
+import { withSofrAverages, dispersion } from './sofrAverages';
+
+// Every calendar day from `start` for `days` days, at a constant rate
+const daily = (start, days, rate) =>
+  Array.from({ length: days }, (_, i) => ({
+    date: new Date(Date.parse(`${start}T00:00:00Z`) + i * 86400000).toISOString().slice(0, 10),
+    rate,
+  }));
+
+describe('withSofrAverages', () => {
+  it('starts the index at 1 and weights a Friday rate by three days', () => {
+    const out = withSofrAverages([
+      { date: '2026-10-15', rate: 3.6 },
+      { date: '2026-10-16', rate: 3.6 },
+      { date: '2026-10-19', rate: 3.7 },
+    ]);
+    expect(out[0].sofr_index).toBe(1);
+    expect(out[2].sofr_index).toBeCloseTo((1 + 0.036 / 360) * (1 + 0.036 * 3 / 360), 8);
+    expect(out[2].avg_30d).toBeNull();
+  });
+
+  it('compounds a constant rate over the window', () => {
+    const out = withSofrAverages(daily('2026-01-01', 200, 3.6));
+    const expected = (Math.pow(1 + 0.036 / 360, 30) - 1) * 360 / 30 * 100;
+    expect(out[30].avg_30d).toBeCloseTo(expected, 5);
+    expect(out[29].avg_30d).toBeNull();
+    expect(out[199].avg_180d).toBeCloseTo((Math.pow(1 + 0.036 / 360, 180) - 1) * 2 * 100, 5);
+  });
+
+  it('uses the preceding business day rate for a window opening on a weekend', () => {
+    // 2026-09-19 (30 days before Mon 2026-10-19) is a Saturday: Friday's rate covers the 19th and 20th
+    const rows = [{ date: '2026-09-18', rate: 5 }, ...daily('2026-09-21', 29, 3)];
+    const out = withSofrAverages(rows);
+    const last = out[out.length - 1];
+    expect(last.date).toBe('2026-10-19');
+    const growth = (1 + 0.05 * 2 / 360) * Math.pow(1 + 0.03 / 360, 28);
+    expect(last.avg_30d).toBeCloseTo((growth - 1) * 360 / 30 * 100, 5);
+  });
+});
+
+describe('dispersion', () => {
+  it('reads live or published percentile keys', () => {
+    expect(dispersion({ p1: 3.59, p99: 3.7 })).toBe(0.11);
+    expect(dispersion({ percentile_1: 3.59, percentile_99: 3.7 })).toBe(0.11);
+    expect(dispersion({ p1: null, p99: 3.7 })).toBeNull();
+  });
+});